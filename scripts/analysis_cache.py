@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Analysis Result Cache
+=====================
+
+Memoizes OpenCV analysis results by the content of both input images and the
+analyzer parameters, so repeated or overlapping runs return the stored stats
+and artifact paths instead of recomputing and writing another timestamped set.
+
+Each entry is a directory holding the artifacts (hard-linked from the run
+that produced them when possible) and an ``entry.json`` with the stats. An
+entry directory's mtime records its last use; once the cache grows past its
+size limit the least recently used entries are evicted. There is no shared
+index, so batch worker processes can use one cache concurrently.
+
+Requirements:
+- pillow (PIL), via screenshot_store for pixel content hashes
+
+Usage:
+    python3 analysis_cache.py stats [--cache-dir opencv_analysis/cache]
+    python3 analysis_cache.py evict --max-size 256
+    python3 analysis_cache.py clear
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+from screenshot_store import ScreenshotStore
+
+
+CACHE_VERSION = 3  # Bump when the analysis output changes for the same inputs and parameters
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+ENTRY_FILE = "entry.json"
+
+
+class AnalysisCache:
+    """Content-keyed, size-bounded cache of analysis results and artifacts."""
+    
+    def __init__(self, root="opencv_analysis/cache", max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+    
+    @staticmethod
+    def make_key(input_paths, parameters):
+        """Key from the pixel content hash of each input (in order) and the parameters."""
+        material = {
+            'version': CACHE_VERSION,
+            'inputs': [ScreenshotStore.content_hash(path) for path in input_paths],
+            'parameters': parameters,
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode()).hexdigest()
+    
+    def _entry_dir(self, key):
+        return self.root / key[:2] / key
+    
+    def get(self, key):
+        """Return the stored entry (with an ``entry_dir``) and mark it used, or None."""
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(entry_dir / ENTRY_FILE, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not all((entry_dir / name).exists() for name in entry['files'].values()):
+            return None  # Partially removed by hand; recompute
+        
+        os.utime(entry_dir)
+        entry['entry_dir'] = entry_dir
+        return entry
+    
+    def put(self, key, source_dir, files, stats, metadata=None):
+        """Store ``files`` (names in ``source_dir``) and ``stats`` under ``key``.
+        
+        The entry is assembled in a temporary directory and renamed into place,
+        so readers never see a half-written entry.
+        """
+        entry_dir = self._entry_dir(key)
+        tmp_dir = entry_dir.with_name(f"{key}.tmp-{os.getpid()}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+        
+        size = 0
+        for name in files.values():
+            source, target = Path(source_dir) / name, tmp_dir / name
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copyfile(source, target)
+            size += target.stat().st_size
+        
+        entry = {
+            'key': key,
+            'files': files,
+            'stats': stats,
+            'size': size,
+            'created': datetime.now().isoformat(timespec="seconds"),
+            **(metadata or {}),
+        }
+        with open(tmp_dir / ENTRY_FILE, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, indent=2)
+        
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # Another process stored the same key first; its entry is equivalent
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        
+        self.evict(keep=key)
+        entry['entry_dir'] = entry_dir
+        return entry
+    
+    def entries(self):
+        """``(last_used, size, entry_dir)`` for every complete entry, oldest first."""
+        found = []
+        for entry_file in self.root.glob(f"*/*/{ENTRY_FILE}"):
+            entry_dir = entry_file.parent
+            if ".tmp-" in entry_dir.name:
+                continue
+            try:
+                size = sum(p.stat().st_size for p in entry_dir.iterdir())
+                found.append((entry_dir.stat().st_mtime, size, entry_dir))
+            except OSError:
+                continue  # Evicted by another process while scanning
+        return sorted(found)
+    
+    def evict(self, max_bytes=None, keep=None):
+        """Remove least recently used entries until the cache fits ``max_bytes``."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, entry_dir in entries:
+            if total <= max_bytes:
+                break
+            if entry_dir.name == keep:
+                continue
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+    
+    def stats(self):
+        """Entry count, size and age of the cache."""
+        entries = self.entries()
+        return {
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'oldest_use': datetime.fromtimestamp(entries[0][0]).isoformat(timespec="seconds") if entries else None,
+        }
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description="Inspect and trim the OpenCV analysis cache")
+    parser.add_argument("command", choices=["stats", "evict", "clear"])
+    parser.add_argument("--cache-dir", default="opencv_analysis/cache",
+                        help="Cache directory (default: opencv_analysis/cache)")
+    parser.add_argument("--max-size", type=float, default=DEFAULT_MAX_BYTES / 1024 / 1024,
+                        help="Size limit in MB for evict (default: 512)")
+    args = parser.parse_args()
+    
+    cache = AnalysisCache(args.cache_dir, int(args.max_size * 1024 * 1024))
+    if args.command == "evict":
+        start_time = time.perf_counter()
+        removed = cache.evict()
+        print(f"🧹 Evicted {removed} entries in {time.perf_counter() - start_time:.2f}s")
+    elif args.command == "clear":
+        removed = cache.evict(max_bytes=0)
+        print(f"🧹 Removed {removed} entries")
+    
+    stats = cache.stats()
+    print(f"📊 {stats['entries']} cached analyses, {stats['bytes'] / 1024 / 1024:.1f} MB "
+          f"of {stats['max_bytes'] / 1024 / 1024:.0f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Perceptual Color Difference
+===========================
+
+Per-pixel delta-E between two BGR images in CIE L*a*b*, so a brand color that
+drifted between the storefront and backoffice chat bubbles is measured the way
+it is seen, while anti-aliasing noise of a few RGB levels stays below the
+just-noticeable difference (JND).
+
+- CIE76: Euclidean distance in Lab. Cheap; overstates saturated colors.
+- CIEDE2000: the current CIE formula with lightness, chroma and hue weights.
+  Evaluated without per-pixel trigonometry except one arctan2: the mean hue
+  comes from the sum of the two hue unit vectors, the hue difference from the
+  dot and cross products, and the hue weighting terms from multiple-angle
+  identities.
+
+Only pixels that differ at all are converted and measured; identical pixels are
+0 by definition, so the cost scales with the changed area and near-identical
+screenshot pairs cost little more than an absdiff. Lab conversion decodes sRGB
+through a 256-entry lookup table; delta-E is evaluated in cache-sized chunks
+of float32.
+
+Measured with ``--benchmark`` at 1920x941, a pair where 6% of the pixels
+changed (JPEG noise) costs about 5x the absdiff threshold with CIE76 and 8x
+with CIEDE2000. Every changed pixel still goes through the Lab conversion and
+the formula, so two different pages (80% changed) cost 25x and 60x. A
+quantized RGB -> Lab table does not close that gap in NumPy: interpolating it
+takes more passes over the pixels than the exact conversion. The optional
+``floor`` fast path instead skips pixels whose channels all differ by at most
+``floor`` levels and reports them as 0. That only pays off where most changes
+are that small, and it is an approximation: such a pixel can still have a
+delta-E of up to ``FLOOR_MAX_DELTA_E`` (dark, near-neutral colors), over one
+CIEDE2000 JND.
+
+Requirements:
+- opencv-python
+- numpy
+
+Usage:
+    from color_difference import delta_e_map
+    
+    delta_e = delta_e_map(image1, image2, method="ciede2000")
+    
+    python3 color_difference.py image1.png image2.png [--method cie76] [--floor 1]
+    python3 color_difference.py --benchmark [image1.png image2.png]
+"""
+
+import sys
+import math
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+
+METHODS = ("cie76", "ciede2000")
+JND = {'cie76': 2.3, 'ciede2000': 1.0}  # Delta-E of one just-noticeable difference
+POW25_7 = 25.0 ** 7
+TINY = 1e-30  # Chroma floor: a*/b* of an achromatic color are 0, so dividing by it gives 0
+CHUNK = 1 << 14
+# Largest delta-E between any two sRGB colors whose channels differ by at most 1 or 2 levels
+# (exhaustive over the 8-bit cube); what the ``floor`` fast path can hide
+FLOOR_MAX_DELTA_E = {1: {'cie76': 1.93, 'ciede2000': 2.45}, 2: {'cie76': 3.85, 'ciede2000': 4.85}}
+
+# uint8 sRGB level -> linear intensity, as the 1x256 table cv2.LUT expects
+_levels = np.arange(256) / 255
+SRGB_TO_LINEAR = np.where(_levels <= 0.04045, _levels / 12.92,
+                          ((_levels + 0.055) / 1.055) ** 2.4).astype(np.float32).reshape(1, 256)
+# Linear BGR -> XYZ relative to the D65 white point, and f(XYZ) -> L*a*b* (with the L* offset)
+_RGB_TO_XYZ = np.array([[0.412453, 0.357580, 0.180423],
+                        [0.212671, 0.715160, 0.072169],
+                        [0.019334, 0.119193, 0.950227]])
+BGR_TO_XYZ = (_RGB_TO_XYZ / _RGB_TO_XYZ.sum(axis=1, keepdims=True))[:, ::-1].astype(np.float32)
+XYZ_TO_LAB = np.array([[0, 116, 0, -16], [500, -500, 0, 0], [0, 200, -200, 0]], dtype=np.float32)
+LAB_EPSILON = 0.008856  # Below this f(t) is linear instead of the cube root
+LAB_SLOPE = 7.787
+# Python floats keep float32 arrays float32 (NumPy scalars would promote them to float64)
+COS_30, SIN_30 = math.cos(math.radians(30)), math.sin(math.radians(30))
+COS_6, SIN_6 = math.cos(math.radians(6)), math.sin(math.radians(6))
+COS_63, SIN_63 = math.cos(math.radians(63)), math.sin(math.radians(63))
+
+
+def _pow7(x):
+    x2 = x * x
+    return x2 * x2 * x2 * x
+
+
+def changed_pixels(image1, image2, floor=0):
+    """Flat indices of the pixels whose BGR values differ by more than ``floor`` in any channel."""
+    diff = cv2.absdiff(image1, image2)
+    cv2.threshold(diff, floor, 255, cv2.THRESH_BINARY, dst=diff)
+    # Every channel weight of the gray conversion is large enough that one channel at 255 stays
+    # nonzero, so this is exact; unlike cv2.split it allocates a single plane
+    changed = cv2.cvtColor(diff, cv2.COLOR_BGR2GRAY)
+    # A 0/1 mask read as bool: NumPy finds nonzero bools several times faster than nonzero bytes
+    cv2.threshold(changed, 0, 1, cv2.THRESH_BINARY, dst=changed)
+    return np.flatnonzero(changed.view(bool))
+
+
+def bgr_to_lab(pixels):
+    """CIE L*a*b* (D65) as float32 for a uint8 BGR image.
+    
+    The sRGB decoding of the 256 channel levels is a lookup table, the rest two
+    3x3 transforms and a cube root. Same constants as OpenCV's float BGR2Lab
+    without its one-off table setup (over 100 ms on the first call of a
+    process) or its spline-interpolated gamma.
+    """
+    xyz = cv2.transform(cv2.LUT(pixels, SRGB_TO_LINEAR), BGR_TO_XYZ)
+    f = np.cbrt(xyz)
+    # Few values are this dark, so only they are recomputed
+    dark = np.flatnonzero(xyz <= LAB_EPSILON)
+    if len(dark):
+        f.reshape(-1)[dark] = xyz.reshape(-1)[dark] * LAB_SLOPE + 16 / 116
+    return cv2.transform(f, XYZ_TO_LAB)
+
+
+def delta_e_cie76(lab1, lab2):
+    """CIE76 delta-E of two (..., 3) Lab arrays."""
+    difference = lab1 - lab2
+    return np.sqrt(np.einsum("...i,...i->...", difference, difference))
+
+
+def _ciede2000(L1, a1, b1, L2, a2, b2):
+    """CIEDE2000 of contiguous 1-D float32 channel arrays."""
+    # a* rescaled by the mean chroma
+    C_bar = (cv2.magnitude(a1, b1) + cv2.magnitude(a2, b2)).ravel() * 0.5
+    C_bar7 = _pow7(C_bar)
+    G1 = 1.5 - 0.5 * np.sqrt(C_bar7 / (C_bar7 + POW25_7))
+    a1p, a2p = a1 * G1, a2 * G1
+    C1p, C2p = cv2.magnitude(a1p, b1).ravel(), cv2.magnitude(a2p, b2).ravel()
+    
+    # Hue difference: |dH'|^2 = 2 (C1' C2' - a1' a2' - b1 b2), signed like the cross product
+    chroma_product = C1p * C2p
+    dH = np.sqrt(np.maximum(2 * (chroma_product - a1p * a2p - b1 * b2), 0))
+    dH = np.copysign(dH, a1p * b2 - a2p * b1)
+    
+    # Mean hue: direction of the sum of the two hue unit vectors (a zero chroma adds nothing)
+    inverse1, inverse2 = 1 / np.maximum(C1p, TINY), 1 / np.maximum(C2p, TINY)
+    x = a1p * inverse1 + a2p * inverse2
+    y = b1 * inverse1 + b2 * inverse2
+    # Exactly opposite hues cancel out; take the arithmetic mean of the two hue angles instead
+    opposite = np.flatnonzero((x * x + y * y < 1e-12) & (chroma_product > 0))
+    if len(opposite):
+        h_sum = (np.arctan2(b1[opposite], a1p[opposite]) % (2 * np.pi)
+                 + np.arctan2(b2[opposite], a2p[opposite]) % (2 * np.pi))
+        x[opposite], y[opposite] = np.cos(h_sum / 2), np.sin(h_sum / 2)
+    h_bar = cv2.phase(x, y, angleInDegrees=True).ravel()  # Both achromatic: x = y = 0 gives 0
+    norm = cv2.magnitude(x, y).ravel()
+    achromatic = norm == 0
+    norm[achromatic] = 1
+    x[achromatic] = 1
+    cos_h, sin_h = x / norm, y / norm
+    
+    cos_2h, sin_2h = cos_h * cos_h - sin_h * sin_h, 2 * sin_h * cos_h
+    cos_3h, sin_3h = cos_2h * cos_h - sin_2h * sin_h, sin_2h * cos_h + cos_2h * sin_h
+    cos_4h, sin_4h = cos_2h * cos_2h - sin_2h * sin_2h, 2 * sin_2h * cos_2h
+    T = (1
+         - 0.17 * (cos_h * COS_30 + sin_h * SIN_30)
+         + 0.24 * cos_2h
+         + 0.32 * (cos_3h * COS_6 - sin_3h * SIN_6)
+         - 0.20 * (cos_4h * COS_63 + sin_4h * SIN_63))
+    
+    d_theta = math.radians(30) * np.exp(-(((h_bar - 275) / 25) ** 2))
+    Cp_bar = (C1p + C2p) * 0.5
+    Cp_bar7 = _pow7(Cp_bar)
+    R_T = -2 * np.sqrt(Cp_bar7 / (Cp_bar7 + POW25_7)) * np.sin(2 * d_theta)
+    
+    Lp_bar50 = ((L1 + L2) * 0.5 - 50) ** 2
+    dL = (L2 - L1) / (1 + 0.015 * Lp_bar50 / np.sqrt(20 + Lp_bar50))
+    dC = (C2p - C1p) / (1 + 0.045 * Cp_bar)
+    dH = dH / (1 + 0.015 * Cp_bar * T)
+    return np.sqrt(np.maximum(dL * dL + dC * dC + dH * dH + R_T * dC * dH, 0))
+
+
+def delta_e_ciede2000(lab1, lab2):
+    """CIEDE2000 delta-E (kL = kC = kH = 1) of two (..., 3) float32 Lab arrays.
+    
+    Evaluated in chunks of ``CHUNK`` pixels so the temporaries stay in cache.
+    """
+    shape = lab1.shape[:-1]
+    lab1 = lab1.reshape(-1, 3).astype(np.float32, copy=False)
+    lab2 = lab2.reshape(-1, 3).astype(np.float32, copy=False)
+    delta_e = np.empty(len(lab1), dtype=np.float32)
+    for start in range(0, len(lab1), CHUNK):
+        chunk = slice(start, start + CHUNK)
+        channels = [np.ascontiguousarray(lab[chunk, i]) for lab in (lab1, lab2) for i in range(3)]
+        delta_e[chunk] = _ciede2000(*channels)
+    return delta_e.reshape(shape)
+
+
+def delta_e_map(image1, image2, method="ciede2000", floor=0):
+    """Per-pixel delta-E (float32, same height and width) of two uint8 BGR images.
+    
+    With ``floor`` > 0, pixels whose channels all differ by at most ``floor``
+    levels are skipped and left at 0 (see ``FLOOR_MAX_DELTA_E``).
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown delta-E method {method!r}; expected one of {', '.join(METHODS)}")
+    height, width = image1.shape[:2]
+    delta_e = np.zeros(height * width, dtype=np.float32)
+    measure = delta_e_ciede2000 if method == "ciede2000" else delta_e_cie76
+    pixels1, pixels2 = image1.reshape(-1, 3), image2.reshape(-1, 3)
+    changed = changed_pixels(image1, image2, floor)
+    # Gather, convert and measure a chunk of changed pixels at a time, so every step works in cache;
+    # each chunk is a one-row image for the LUT and transforms
+    for start in range(0, len(changed), CHUNK):
+        indices = changed[start:start + CHUNK]
+        lab1 = bgr_to_lab(np.take(pixels1, indices, axis=0)[None])[0]
+        lab2 = bgr_to_lab(np.take(pixels2, indices, axis=0)[None])[0]
+        delta_e[indices] = measure(lab1, lab2)
+    return delta_e.reshape(height, width)
+
+
+def summarize(delta_e, method="ciede2000", threshold_jnd=1.0):
+    """Distribution of a delta-E map in delta-E and JND units."""
+    jnd = JND[method]
+    over = int(np.count_nonzero(delta_e > threshold_jnd * jnd))
+    return {
+        'method': method,
+        'jnd': jnd,
+        'threshold_jnd': threshold_jnd,
+        'mean': float(delta_e.mean()),
+        'p95': float(np.percentile(delta_e, 95)),
+        'max': float(delta_e.max()),
+        'pixels_over_threshold': over,
+        'noticeable_pixels': int(np.count_nonzero(delta_e > jnd)),
+    }
+
+
+def _reference_ciede2000(lab1, lab2):
+    """Straightforward float64 CIEDE2000 (Sharma, Wu and Dalal 2005), for checking."""
+    L1, a1, b1 = (lab1[..., i].astype(np.float64) for i in range(3))
+    L2, a2, b2 = (lab2[..., i].astype(np.float64) for i in range(3))
+    C_bar = (np.hypot(a1, b1) + np.hypot(a2, b2)) / 2
+    G = 0.5 * (1 - np.sqrt(C_bar ** 7 / (C_bar ** 7 + 25.0 ** 7)))
+    a1p, a2p = a1 * (1 + G), a2 * (1 + G)
+    C1p, C2p = np.hypot(a1p, b1), np.hypot(a2p, b2)
+    h1p, h2p = np.arctan2(b1, a1p) % (2 * np.pi), np.arctan2(b2, a2p) % (2 * np.pi)
+    chroma_product = C1p * C2p
+    dhp = h2p - h1p
+    dhp = np.where(dhp > np.pi, dhp - 2 * np.pi, np.where(dhp < -np.pi, dhp + 2 * np.pi, dhp))
+    dhp = np.where(chroma_product == 0, 0, dhp)
+    dHp = 2 * np.sqrt(chroma_product) * np.sin(dhp / 2)
+    h_sum = h1p + h2p
+    h_bar = np.where(chroma_product == 0, h_sum,
+                     np.where(np.abs(h1p - h2p) <= np.pi, h_sum / 2,
+                              np.where(h_sum < 2 * np.pi, h_sum / 2 + np.pi, h_sum / 2 - np.pi)))
+    T = (1 - 0.17 * np.cos(h_bar - np.radians(30)) + 0.24 * np.cos(2 * h_bar)
+         + 0.32 * np.cos(3 * h_bar + np.radians(6)) - 0.20 * np.cos(4 * h_bar - np.radians(63)))
+    d_theta = np.radians(30) * np.exp(-((np.degrees(h_bar) - 275) / 25) ** 2)
+    Cp_bar = (C1p + C2p) / 2
+    R_C = 2 * np.sqrt(Cp_bar ** 7 / (Cp_bar ** 7 + 25.0 ** 7))
+    Lp_bar50 = ((L1 + L2) / 2 - 50) ** 2
+    S_L = 1 + 0.015 * Lp_bar50 / np.sqrt(20 + Lp_bar50)
+    S_C, S_H = 1 + 0.045 * Cp_bar, 1 + 0.015 * Cp_bar * T
+    dL, dC, dH = (L2 - L1) / S_L, (C2p - C1p) / S_C, dHp / S_H
+    return np.sqrt(dL ** 2 + dC ** 2 + dH ** 2 - np.sin(2 * d_theta) * R_C * dC * dH)
+
+
+def _benchmark_images(paths):
+    if paths:
+        image1, image2 = (cv2.imread(str(p)) for p in paths)
+        if image1 is None or image2 is None:
+            raise SystemExit("❌ Could not load both images")
+        return image1, cv2.resize(image2, image1.shape[1::-1])
+    rng = np.random.default_rng(0)
+    image1 = rng.integers(0, 256, (600, 800, 3), dtype=np.uint8)
+    image2 = cv2.add(image1, rng.integers(0, 8, image1.shape, dtype=np.uint8))
+    return image1, image2
+
+
+def _time(function, repeats):
+    """Fastest of ``repeats`` calls in ms; the minimum is what is least disturbed by other load."""
+    function()
+    fastest = float('inf')
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        function()
+        fastest = min(fastest, time.perf_counter() - start_time)
+    return fastest * 1000
+
+
+def run_benchmark(paths=None, repeats=5, floors=(1, 2)):
+    """Time delta-E (exact and with ``floors``) against the absdiff threshold and check the formula."""
+    image1, image2 = _benchmark_images(paths)
+    pixel_count = image1[..., 0].size
+    print(f"⏱️  Delta-E on {image1.shape[1]}x{image1.shape[0]}, "
+          f"{len(changed_pixels(image1, image2)) / pixel_count * 100:.1f}% of pixels changed")
+    
+    def absdiff_threshold():
+        gray = cv2.cvtColor(cv2.absdiff(image1, image2), cv2.COLOR_BGR2GRAY)
+        return cv2.threshold(gray, 30, 255, cv2.THRESH_BINARY)[1]
+    
+    baseline = _time(absdiff_threshold, repeats)
+    print(f"  {'absdiff + threshold':<22} {baseline:8.1f} ms")
+    for method in METHODS:
+        exact = delta_e_map(image1, image2, method)
+        milliseconds = _time(lambda: delta_e_map(image1, image2, method), repeats)
+        print(f"  {method:<22} {milliseconds:8.1f} ms  ({milliseconds / baseline:.0f}x absdiff)")
+        for floor in floors:
+            measured = len(changed_pixels(image1, image2, floor)) / pixel_count * 100
+            milliseconds = _time(lambda: delta_e_map(image1, image2, method, floor), repeats)
+            missed = np.count_nonzero((exact > JND[method]) & (delta_e_map(image1, image2, method, floor) == 0))
+            print(f"  {f'{method} --floor {floor}':<22} {milliseconds:8.1f} ms  ({milliseconds / baseline:.0f}x absdiff, "
+                  f"{measured:.1f}% of pixels measured, {missed:,} pixels over 1 JND missed)")
+    
+    changed = changed_pixels(image1, image2)
+    lab1 = bgr_to_lab(np.take(image1.reshape(-1, 3), changed, axis=0)[None])[0]
+    lab2 = bgr_to_lab(np.take(image2.reshape(-1, 3), changed, axis=0)[None])[0]
+    error = np.abs(delta_e_ciede2000(lab1, lab2) - _reference_ciede2000(lab1, lab2)).max() if len(changed) else 0.0
+    opencv_lab = cv2.cvtColor(np.multiply(image1, np.float32(1 / 255), dtype=np.float32), cv2.COLOR_BGR2Lab)
+    lab_difference = np.abs(bgr_to_lab(image1) - opencv_lab).max()
+    print(f"🔍 CIEDE2000 vs. float64 reference: max error {error:.2e}; "
+          f"Lab vs. OpenCV's float BGR2Lab: {lab_difference:.2f}")
+    return 0
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description="Perceptual (delta-E) difference of two images")
+    parser.add_argument("images", nargs="*", help="Two images to compare (default for --benchmark: synthetic pair)")
+    parser.add_argument("--method", choices=METHODS, default="ciede2000")
+    parser.add_argument("--threshold", type=float, default=1.0, help="Threshold in JND units (default: 1.0)")
+    parser.add_argument("--floor", type=int, default=0, metavar="LEVELS",
+                        help="Fast path: report pixels whose channels all differ by at most LEVELS as 0 instead of "
+                             "measuring them; approximate, a floor of 1 can hide up to "
+                             f"{FLOOR_MAX_DELTA_E[1]['ciede2000']:.1f} CIEDE2000 (default: 0, exact)")
+    parser.add_argument("--benchmark", action="store_true", help="Time against absdiff and check the formula")
+    parser.add_argument("--repeats", type=int, default=5, help="Benchmark repetitions (default: 5)")
+    args = parser.parse_args()
+    
+    if args.images and len(args.images) != 2:
+        parser.error("expected exactly two images")
+    if args.benchmark:
+        return run_benchmark(args.images, args.repeats)
+    if not args.images:
+        parser.error("give two images or --benchmark")
+    
+    image1, image2 = _benchmark_images(args.images)
+    stats = summarize(delta_e_map(image1, image2, args.method, args.floor), args.method, args.threshold)
+    print(f"🎨 {args.method}: mean {stats['mean']:.2f}, p95 {stats['p95']:.2f}, max {stats['max']:.2f}")
+    print(f"   {stats['pixels_over_threshold']:,} pixels over {args.threshold:g} JND "
+          f"({stats['noticeable_pixels']:,} over 1 JND = {stats['jnd']} delta-E)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
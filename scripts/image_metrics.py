@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Image Similarity Metrics
+========================
+
+Vectorized SSIM and multi-scale SSIM on NumPy/OpenCV primitives, so structural
+similarity does not depend on scikit-image, plus 64-bit perceptual hashes
+(aHash, dHash, pHash) for cheap "has anything changed" checks. Local statistics come from
+separable box or Gaussian filters (cv2.boxFilter is a running-sum filter, the
+same cost as an integral image), and large images can be split into bands
+that are filtered in parallel threads.
+
+The defaults reproduce ``skimage.metrics.structural_similarity`` (7x7 uniform
+window, sample covariance, K1=0.01, K2=0.03, reflected borders).
+
+Requirements:
+- opencv-python
+- numpy
+
+Usage:
+    from image_metrics import structural_similarity, ms_ssim
+    
+    score, ssim_map = structural_similarity(gray1, gray2)
+    
+    python3 image_metrics.py --benchmark [image1.png image2.png]
+"""
+
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+
+K1, K2 = 0.01, 0.03
+GAUSSIAN_SIGMA = 1.5
+GAUSSIAN_WIN_SIZE = 11  # 2 * int(3.5 * sigma + 0.5) + 1, as in scikit-image
+MS_SSIM_WEIGHTS = (0.0448, 0.2856, 0.3001, 0.2363, 0.1333)
+# Largest uniform window for the integer path: n * (sum_xx + sum_yy) <= 2 * 255^2 * n^2 must fit int32
+INT_SSIM_MAX_WIN_SIZE = 11
+
+
+def _local_filter(win_size, gaussian):
+    """Return a function computing local means with reflected borders."""
+    if gaussian:
+        kernel = cv2.getGaussianKernel(win_size, GAUSSIAN_SIGMA, cv2.CV_64F)
+        return lambda image: cv2.sepFilter2D(image, cv2.CV_64F, kernel, kernel, borderType=cv2.BORDER_REFLECT)
+    return lambda image: cv2.boxFilter(image, cv2.CV_64F, (win_size, win_size), normalize=True,
+                                       borderType=cv2.BORDER_REFLECT)
+
+
+def _ssim_terms(x, y, win_size, gaussian, data_range):
+    """Luminance and contrast-structure maps for float64 images."""
+    local_mean = _local_filter(win_size, gaussian)
+    # Unbiased (sample) covariance for the uniform window, as scikit-image does
+    cov_norm = 1.0 if gaussian else win_size ** 2 / (win_size ** 2 - 1)
+    
+    mu_x, mu_y = local_mean(x), local_mean(y)
+    var_x = cov_norm * (local_mean(x * x) - mu_x * mu_x)
+    var_y = cov_norm * (local_mean(y * y) - mu_y * mu_y)
+    cov_xy = cov_norm * (local_mean(x * y) - mu_x * mu_y)
+    
+    c1 = (K1 * data_range) ** 2
+    c2 = (K2 * data_range) ** 2
+    luminance = (2 * mu_x * mu_y + c1) / (mu_x * mu_x + mu_y * mu_y + c1)
+    contrast_structure = (2 * cov_xy + c2) / (var_x + var_y + c2)
+    return luminance, contrast_structure
+
+
+def _ssim_terms_uint8(x, y, win_size, data_range):
+    """Exact-integer variant of ``_ssim_terms`` for uint8 images and a uniform window.
+    
+    Window sums of x, x^2 and x*y are exact in int32 (x^2 fits uint16), and the
+    SSIM terms are rewritten over those sums so the only float work is the
+    final division. About twice as fast as the float path. The products of
+    the sums only fit int32 up to ``INT_SSIM_MAX_WIN_SIZE``.
+    """
+    n = win_size * win_size
+    
+    def window_sum(image):
+        return cv2.boxFilter(image, cv2.CV_32S, (win_size, win_size), normalize=False,
+                             borderType=cv2.BORDER_REFLECT)
+    
+    sum_x, sum_y = window_sum(x), window_sum(y)
+    sum_xx = window_sum(cv2.multiply(x, x, dtype=cv2.CV_16U))
+    sum_yy = window_sum(cv2.multiply(y, y, dtype=cv2.CV_16U))
+    sum_xy = window_sum(cv2.multiply(x, y, dtype=cv2.CV_16U))
+    
+    # Luminance and contrast-structure scaled by n^2 and n(n-1) respectively
+    c1 = (K1 * data_range) ** 2 * n * n
+    c2 = (K2 * data_range) ** 2 * n * (n - 1)
+    product, square_x, square_y = sum_x * sum_y, sum_x * sum_x, sum_y * sum_y
+    luminance = (2 * product + c1) / (square_x + square_y + c1)
+    contrast_structure = (2 * (n * sum_xy - product) + c2) / (n * (sum_xx + sum_yy) - square_x - square_y + c2)
+    return luminance, contrast_structure
+
+
+def _banded(function, x, y, halo, workers):
+    """Apply ``function(x, y)`` to overlapping horizontal bands in parallel threads.
+    
+    Bands carry ``halo`` extra rows on each side so filtered values match the
+    whole-image result; the halo is cropped before the bands are joined.
+    """
+    height = x.shape[0]
+    if workers <= 1 or height < 4 * halo * workers:
+        return function(x, y)
+    
+    bounds = np.linspace(0, height, workers + 1).astype(int)
+    
+    def run(index):
+        top, bottom = bounds[index], bounds[index + 1]
+        start, stop = max(0, top - halo), min(height, bottom + halo)
+        results = function(x[start:stop], y[start:stop])
+        return tuple(r[top - start:bottom - start] for r in results)
+    
+    # OpenCV filters release the GIL, so threads scale without copying bands to processes
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(run, range(workers)))
+    return tuple(np.vstack(maps) for maps in zip(*parts))
+
+
+def _prepare(image1, image2, data_range):
+    if image1.shape != image2.shape:
+        raise ValueError(f"Input images must have the same shape: {image1.shape} vs {image2.shape}")
+    if data_range is None:
+        if image1.dtype != np.uint8:
+            raise ValueError("data_range is required for non-uint8 images")
+        data_range = 255
+    return image1.astype(np.float64), image2.astype(np.float64), data_range
+
+
+def structural_similarity(image1, image2, win_size=7, gaussian=False, data_range=None, workers=1):
+    """Mean SSIM and the full SSIM map of two grayscale images.
+    
+    The mean excludes a border of ``win_size // 2`` pixels, where the window
+    reaches outside the image, matching scikit-image.
+    """
+    if gaussian:
+        win_size = GAUSSIAN_WIN_SIZE
+    if win_size < 3 or win_size % 2 == 0:
+        raise ValueError(f"win_size must be odd and at least 3, got {win_size}")
+    if win_size > min(image1.shape[:2]):
+        raise ValueError(f"win_size {win_size} exceeds the image size {image1.shape[1]}x{image1.shape[0]}")
+    if (not gaussian and win_size <= INT_SSIM_MAX_WIN_SIZE
+            and image1.dtype == np.uint8 and image2.dtype == np.uint8):
+        if image1.shape != image2.shape:
+            raise ValueError(f"Input images must have the same shape: {image1.shape} vs {image2.shape}")
+        data_range = data_range or 255
+        terms = lambda a, b: _ssim_terms_uint8(a, b, win_size, data_range)
+        x, y = image1, image2
+    else:
+        x, y, data_range = _prepare(image1, image2, data_range)
+        terms = lambda a, b: _ssim_terms(a, b, win_size, gaussian, data_range)
+    
+    luminance, contrast_structure = _banded(terms, x, y, win_size, workers)
+    ssim_map = luminance * contrast_structure
+    pad = (win_size - 1) // 2
+    return float(ssim_map[pad:-pad, pad:-pad].mean()), ssim_map
+
+
+def ms_ssim(image1, image2, weights=MS_SSIM_WEIGHTS, gaussian=True, data_range=None, workers=1):
+    """Multi-scale SSIM (Wang et al. 2003) with 2x2 average downsampling between scales.
+    
+    Scales whose image would be smaller than the window are dropped and the
+    remaining weights renormalized. Returns the score and per-scale values.
+    """
+    win_size = GAUSSIAN_WIN_SIZE if gaussian else 7
+    x, y, data_range = _prepare(image1, image2, data_range)
+    
+    levels = 1
+    while levels < len(weights) and min(x.shape[:2]) >> levels >= win_size:
+        levels += 1
+    weights = np.asarray(weights[:levels], dtype=np.float64)
+    weights /= weights.sum()
+    
+    pad = (win_size - 1) // 2
+    scales = []
+    for level in range(levels):
+        luminance, contrast_structure = _banded(
+            lambda a, b: _ssim_terms(a, b, win_size, gaussian, data_range), x, y, win_size, workers
+        )
+        crop = (slice(pad, -pad), slice(pad, -pad))
+        if level == levels - 1:
+            scales.append(float((luminance * contrast_structure)[crop].mean()))
+        else:
+            scales.append(float(contrast_structure[crop].mean()))
+            x = cv2.resize(x, (x.shape[1] // 2, x.shape[0] // 2), interpolation=cv2.INTER_AREA)
+            y = cv2.resize(y, (y.shape[1] // 2, y.shape[0] // 2), interpolation=cv2.INTER_AREA)
+    
+    # Negative contrast-structure terms would make fractional powers undefined
+    values = np.maximum(np.asarray(scales), 0.0)
+    return float(np.prod(values ** weights)), scales
+
+
+def _bits_to_int(bits):
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+def average_hash(gray, size=8):
+    """aHash: which cells of a size x size thumbnail are brighter than the mean."""
+    small = cv2.resize(gray, (size, size), interpolation=cv2.INTER_AREA).astype(np.float32)
+    return _bits_to_int(small > small.mean())
+
+
+def difference_hash(gray, size=8):
+    """dHash: horizontal brightness gradients of a (size + 1) x size thumbnail."""
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA).astype(np.float32)
+    return _bits_to_int(small[:, 1:] > small[:, :-1])
+
+
+def perceptual_hash(gray, size=8, factor=4):
+    """pHash: low-frequency DCT coefficients above their median (DC excluded)."""
+    side = size * factor
+    small = cv2.resize(gray, (side, side), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:size, :size]
+    return _bits_to_int(low > np.median(low.ravel()[1:]))
+
+
+def image_hashes(gray):
+    """All three 64-bit perceptual hashes of a grayscale image."""
+    return {'ahash': average_hash(gray), 'dhash': difference_hash(gray), 'phash': perceptual_hash(gray)}
+
+
+def hash_distance(hash1, hash2):
+    """Hamming distance between two integer hashes."""
+    return bin(hash1 ^ hash2).count("1")
+
+
+def _benchmark_images(paths):
+    """Grayscale 1080p pair: the given images, or a synthetic UI-like pair."""
+    if paths:
+        images = [cv2.imread(path, cv2.IMREAD_GRAYSCALE) for path in paths]
+        if any(image is None for image in images):
+            raise ValueError(f"Could not load {paths}")
+        height = min(image.shape[0] for image in images)
+        width = min(image.shape[1] for image in images)
+        return images[0][:height, :width], images[1][:height, :width]
+    
+    rng = np.random.default_rng(0)
+    base = cv2.GaussianBlur(rng.integers(0, 256, (1080, 1920), dtype=np.uint8), (0, 0), 4)
+    for i in range(40):
+        x, y = rng.integers(0, 1800), rng.integers(0, 1000)
+        cv2.rectangle(base, (int(x), int(y)), (int(x) + 120, int(y) + 60), int(rng.integers(0, 256)), -1)
+    other = base.copy()
+    cv2.putText(other, "chat widget", (1500, 1000), cv2.FONT_HERSHEY_SIMPLEX, 1.5, 255, 3)
+    noise = rng.normal(0, 3, base.shape)
+    return base, np.clip(other + noise, 0, 255).astype(np.uint8)
+
+
+def _time(function, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_benchmark(paths=None, repeats=5, workers=4):
+    """Time the built-in SSIM against scikit-image and compare their outputs."""
+    image1, image2 = _benchmark_images(paths)
+    print(f"📏 Benchmark images: {image1.shape[1]}x{image1.shape[0]} grayscale, best of {repeats}")
+    
+    rows = []
+    builtin_time, (score, ssim_map) = _time(lambda: structural_similarity(image1, image2), repeats)
+    rows.append(("built-in SSIM", builtin_time, score))
+    banded_time, (banded_score, banded_map) = _time(
+        lambda: structural_similarity(image1, image2, workers=workers), repeats
+    )
+    rows.append((f"built-in SSIM, {workers} bands", banded_time, banded_score))
+    ms_time, (ms_score, _) = _time(lambda: ms_ssim(image1, image2), repeats)
+    rows.append(("built-in MS-SSIM", ms_time, ms_score))
+    
+    try:
+        from skimage.metrics import structural_similarity as skimage_ssim
+    except ImportError:
+        skimage_ssim = None
+    
+    if skimage_ssim is not None:
+        reference_time, (reference_score, reference_map) = _time(
+            lambda: skimage_ssim(image1, image2, full=True), repeats
+        )
+        rows.append(("scikit-image SSIM", reference_time, reference_score))
+    
+    for name, seconds, value in rows:
+        print(f"  {name:<26} {seconds * 1000:8.1f} ms   score {value:.6f}")
+    
+    print(f"  Banded map max |diff| vs single pass: {np.abs(banded_map - ssim_map).max():.2e}")
+    if skimage_ssim is None:
+        print("⚠️  scikit-image not installed; skipping the reference comparison")
+        return 0
+    
+    map_error = float(np.abs(ssim_map - reference_map).max())
+    print(f"  Map max |diff| vs scikit-image: {map_error:.2e}, "
+          f"score |diff|: {abs(score - reference_score):.2e}")
+    print(f"🚀 Speedup over scikit-image: {reference_time / builtin_time:.1f}x "
+          f"({reference_time / banded_time:.1f}x with {workers} bands)")
+    return 0 if map_error < 1e-6 else 1
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description="Built-in SSIM / MS-SSIM")
+    parser.add_argument("images", nargs="*", help="Two images to compare (default: synthetic 1080p pair)")
+    parser.add_argument("--benchmark", action="store_true", help="Time against scikit-image and check agreement")
+    parser.add_argument("--repeats", type=int, default=5, help="Benchmark repetitions (default: 5)")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel bands (default: 4)")
+    args = parser.parse_args()
+    
+    if args.images and len(args.images) != 2:
+        parser.error("expected exactly two images")
+    if args.benchmark:
+        return run_benchmark(args.images, args.repeats, args.workers)
+    if not args.images:
+        parser.error("give two images or --benchmark")
+    
+    image1, image2 = _benchmark_images(args.images)
+    score, _ = structural_similarity(image1, image2, workers=args.workers)
+    ms_score, scales = ms_ssim(image1, image2, workers=args.workers)
+    print(f"SSIM:    {score:.6f}")
+    print(f"MS-SSIM: {ms_score:.6f} (scales: {', '.join(f'{s:.4f}' for s in scales)})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Image Registration
+==================
+
+Aligns the second image of a pair onto the first before diffing, so a widget
+rendered a few pixels (or a few percent in size) apart is compared with its
+counterpart instead of showing up as one large difference.
+
+- Translation: coarse-to-fine phase correlation on a Gaussian pyramid. The
+  coarsest level finds large shifts cheaply and each finer level only refines
+  the residual on one textured tile, so the whole estimate costs a few
+  milliseconds. Shifts are whole pixels, so aligning needs no interpolation.
+- Homography (optional): ORB features, cross-checked Hamming matches and a
+  RANSAC homography, for scale differences; falls back to translation when
+  there are too few reliable matches.
+
+Requirements:
+- opencv-python
+- numpy
+
+Usage:
+    from image_registration import register, warp_image
+    
+    matrix, info = register(gray1, gray2, method="translation")
+    aligned = warp_image(image2, matrix, gray1.shape)
+    
+    python3 image_registration.py storefront.png backoffice.png [--method homography]
+    python3 image_registration.py storefront.png --shift 12 -7
+"""
+
+import sys
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+
+PYRAMID_MIN_SIZE = 64  # Coarsest level keeps at least this many pixels on its short side
+MAX_PYRAMID_LEVELS = 4
+REFINE_TILE = 256  # Window used to refine the shift on the finer levels
+REFINE_ITERATIONS = 3
+MIN_RESPONSE = 0.05  # Phase correlation peak below this is treated as "no reliable shift"
+MAX_SHIFT_FRACTION = 0.25  # Shifts beyond this fraction of the image size are rejected
+MIN_INLIERS = 12
+FEATURE_MAX_SIZE = 640  # ORB runs on the first pyramid level no larger than this
+SCALE_RANGE = (0.5, 2.0)
+
+
+def _pyramid(gray, levels):
+    """Float32 pyramid, finest level first."""
+    pyramid = [gray.astype(np.float32)]
+    for _ in range(levels):
+        pyramid.append(cv2.pyrDown(pyramid[-1]))
+    return pyramid
+
+
+def _pyramid_levels(shape):
+    levels = 0
+    size = min(shape[:2])
+    while levels < MAX_PYRAMID_LEVELS and size // 2 >= PYRAMID_MIN_SIZE:
+        size //= 2
+        levels += 1
+    return levels
+
+
+def _translation_matrix(dx, dy):
+    return np.array([[1, 0, dx], [0, 1, dy]], dtype=np.float64)
+
+
+def _dft_size(n):
+    """Largest even size <= ``n`` that OpenCV's DFT uses without padding.
+    
+    phaseCorrelate pads to the optimal DFT size and is biased by half a pixel
+    when that size is odd.
+    """
+    for size in range(n - n % 2, 1, -2):
+        if cv2.getOptimalDFTSize(size) == size:
+            return size
+    return n
+
+
+def _texture_center(gray, tile):
+    """Center of the ``tile``-sized window with the most edge energy."""
+    energy = cv2.boxFilter(np.abs(cv2.Laplacian(gray, cv2.CV_32F)), -1, (tile, tile))
+    y, x = np.unravel_index(int(np.argmax(energy)), energy.shape)
+    return int(x), int(y)
+
+
+def estimate_translation(gray1, gray2):
+    """Whole-pixel shift ``(dx, dy)`` that maps ``gray2`` onto ``gray1``, with the peak response.
+    
+    Both images must have the same size. The coarsest level is correlated
+    whole; finer levels only refine the residual on a ``REFINE_TILE`` window
+    around the most textured area, so full-size FFTs are never needed.
+    Screenshot content is sharp enough that sub-pixel peaks are biased, and a
+    whole-pixel shift lets the images be aligned without interpolation blur.
+    """
+    levels = _pyramid_levels(gray1.shape)
+    pyramid1, pyramid2 = _pyramid(gray1, levels), _pyramid(gray2, levels)
+    
+    height, width = _dft_size(pyramid1[levels].shape[0]), _dft_size(pyramid1[levels].shape[1])
+    coarse1, coarse2 = pyramid1[levels][:height, :width], pyramid2[levels][:height, :width]
+    window = cv2.createHanningWindow((width, height), cv2.CV_32F)
+    (dx, dy), response = cv2.phaseCorrelate(coarse2, coarse1, window)
+    dx, dy = round(dx), round(dy)
+    
+    scale = 2 ** levels
+    center_x, center_y = _texture_center(coarse1, max(REFINE_TILE // scale, 3))
+    for level in range(levels - 1, -1, -1):
+        level1, level2 = pyramid1[level], pyramid2[level]
+        dx, dy = dx * 2, dy * 2
+        scale //= 2
+        
+        # Undo the current estimate inside the tile and measure what is left
+        # Integer top-left corner; getRectSubPix then samples whole pixels without interpolation
+        tile = (_dft_size(min(REFINE_TILE, level1.shape[1])), _dft_size(min(REFINE_TILE, level1.shape[0])))
+        left = min(max(center_x * 2 ** levels // scale - tile[0] // 2, 0), level1.shape[1] - tile[0])
+        top = min(max(center_y * 2 ** levels // scale - tile[1] // 2, 0), level1.shape[0] - tile[1])
+        center = (left + (tile[0] - 1) / 2, top + (tile[1] - 1) / 2)
+        patch1 = cv2.getRectSubPix(level1, tile, center)
+        window = cv2.createHanningWindow(tile, cv2.CV_32F)
+        for _ in range(REFINE_ITERATIONS):
+            patch2 = cv2.getRectSubPix(level2, tile, (center[0] - dx, center[1] - dy))
+            (residual_x, residual_y), response = cv2.phaseCorrelate(patch2, patch1, window)
+            if round(residual_x) == 0 and round(residual_y) == 0:
+                break
+            dx, dy = dx + round(residual_x), dy + round(residual_y)
+    
+    return dx, dy, response, levels
+
+
+def estimate_homography(gray1, gray2, max_features=1000):
+    """Homography mapping ``gray2`` onto ``gray1`` from ORB matches, or None.
+    
+    Features are detected on the pyramid level that fits ``FEATURE_MAX_SIZE``
+    and the homography is scaled back to full resolution.
+    """
+    factor = 1
+    while max(gray1.shape[:2]) / factor > FEATURE_MAX_SIZE:
+        gray1, gray2 = cv2.pyrDown(gray1), cv2.pyrDown(gray2)
+        factor *= 2
+    
+    orb = cv2.ORB_create(max_features)
+    keypoints1, descriptors1 = orb.detectAndCompute(gray1, None)
+    keypoints2, descriptors2 = orb.detectAndCompute(gray2, None)
+    if descriptors1 is None or descriptors2 is None:
+        return None, 0
+    
+    matches = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True).match(descriptors2, descriptors1)
+    if len(matches) < MIN_INLIERS:
+        return None, 0
+    
+    points2 = np.float32([keypoints2[m.queryIdx].pt for m in matches])
+    points1 = np.float32([keypoints1[m.trainIdx].pt for m in matches])
+    matrix, inlier_mask = cv2.findHomography(points2, points1, cv2.RANSAC, 3.0)
+    inliers = int(inlier_mask.sum()) if inlier_mask is not None else 0
+    if matrix is None or inliers < MIN_INLIERS:
+        return None, inliers
+    
+    scale = np.diag([factor, factor, 1.0])
+    return scale @ matrix @ np.linalg.inv(scale), inliers
+
+
+def warp_image(image, matrix, shape, border_value=0):
+    """Warp ``image`` by a 2x3 affine or 3x3 perspective ``matrix`` onto a canvas of ``shape``."""
+    size = (shape[1], shape[0])
+    if matrix.shape == (2, 3):
+        return cv2.warpAffine(image, matrix, size, flags=cv2.INTER_LINEAR,
+                              borderMode=cv2.BORDER_CONSTANT, borderValue=border_value)
+    return cv2.warpPerspective(image, matrix, size, flags=cv2.INTER_LINEAR,
+                               borderMode=cv2.BORDER_CONSTANT, borderValue=border_value)
+
+
+def coverage_mask(matrix, source_shape, shape):
+    """Boolean mask of the pixels in ``shape`` that the warped image actually covers."""
+    ones = np.full(source_shape[:2], 255, dtype=np.uint8)
+    size = (shape[1], shape[0])
+    if matrix.shape == (2, 3):
+        warped = cv2.warpAffine(ones, matrix, size, flags=cv2.INTER_NEAREST)
+    else:
+        warped = cv2.warpPerspective(ones, matrix, size, flags=cv2.INTER_NEAREST)
+    return warped > 0
+
+
+def register(gray1, gray2, method="translation"):
+    """Estimate the transform aligning ``gray2`` to ``gray1``.
+    
+    Returns ``(matrix, info)``; ``matrix`` is None when no reliable transform
+    was found (or the images are already aligned), and ``info`` describes the
+    estimate for reporting.
+    """
+    start_time = time.perf_counter()
+    height, width = gray1.shape[:2]
+    info = {'method': method, 'applied': False}
+    matrix = None
+    
+    if method == "homography":
+        homography, inliers = estimate_homography(gray1, gray2)
+        info['inliers'] = inliers
+        if homography is not None:
+            scale = float(np.sqrt(abs(np.linalg.det(homography[:2, :2]))))
+            if SCALE_RANGE[0] <= scale <= SCALE_RANGE[1]:
+                matrix = homography
+                info.update({'dx': float(homography[0, 2]), 'dy': float(homography[1, 2]), 'scale': scale})
+        if matrix is None:
+            info['fallback'] = "translation"
+    
+    if matrix is None:
+        dx, dy, response, levels = estimate_translation(gray1, gray2)
+        info.update({'dx': int(dx), 'dy': int(dy), 'scale': 1.0, 'response': float(response),
+                     'pyramid_levels': levels})
+        reliable = response >= MIN_RESPONSE and abs(dx) <= MAX_SHIFT_FRACTION * width \
+            and abs(dy) <= MAX_SHIFT_FRACTION * height
+        if reliable and (dx or dy):
+            matrix = _translation_matrix(dx, dy)
+    
+    info['applied'] = matrix is not None
+    info['matrix'] = matrix.tolist() if matrix is not None else None
+    info['milliseconds'] = (time.perf_counter() - start_time) * 1000
+    return matrix, info
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description="Estimate the transform aligning two screenshots")
+    parser.add_argument("images", nargs="+", help="Reference image, then the image to align (or --shift)")
+    parser.add_argument("--method", choices=["translation", "homography"], default="translation")
+    parser.add_argument("--shift", nargs=2, type=float, metavar=("DX", "DY"),
+                        help="Align the reference image with a copy of itself shifted by DX, DY")
+    args = parser.parse_args()
+    
+    gray1 = cv2.imread(args.images[0], cv2.IMREAD_GRAYSCALE)
+    if gray1 is None:
+        print(f"❌ Could not load image: {args.images[0]}")
+        return 1
+    if args.shift:
+        dx, dy = args.shift
+        gray2 = cv2.warpAffine(gray1, _translation_matrix(dx, dy), gray1.shape[::-1],
+                               borderMode=cv2.BORDER_REPLICATE)
+        print(f"🧪 Synthetic shift: dx={dx:+.2f} dy={dy:+.2f}")
+    elif len(args.images) > 1:
+        gray2 = cv2.imread(args.images[1], cv2.IMREAD_GRAYSCALE)
+        if gray2 is None:
+            print(f"❌ Could not load image: {args.images[1]}")
+            return 1
+        gray2 = cv2.resize(gray2, gray1.shape[::-1])
+    else:
+        parser.error("a second image or --shift is required")
+    
+    matrix, info = register(gray1, gray2, args.method)
+    status = "applied" if info['applied'] else "not applied"
+    print(f"📐 {info['method']}: dx={info['dx']:+.2f} dy={info['dy']:+.2f} scale={info['scale']:.3f} "
+          f"({status}) in {info['milliseconds']:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+Layout Diff
+===========
+
+Component-level comparison of two screenshots. UI elements (chat bubbles,
+buttons, the input field, the header) are extracted as boxes from the contour
+hierarchy and matched between the images by an optimal assignment on
+position, size and appearance, so a diff says which element moved, was
+resized, was restyled, appeared or disappeared.
+
+- Extraction: Canny edges with 1-pixel gaps closed, then the contour tree.
+  Outer contours that fill most of their bounding box and enclose a large
+  hole (an outline, not a run of text) are components; a contour nested just
+  inside another (the two sides of one double border) is dropped, and each
+  component keeps its nearest enclosing component as parent.
+- Candidates: a uniform grid over the component centers, with cells
+  ``max_shift`` wide, so each component is only compared with counterparts in
+  the neighbouring cells. Pairs further apart than ``max_shift`` or more than
+  twice as large or small are never considered.
+- Assignment: the candidate graph falls apart into small clusters of nearby
+  components, and each cluster is solved exactly with the Hungarian
+  (shortest augmenting path) algorithm. A component may stay unmatched at
+  ``max_cost``, which makes it removed (or its counterpart added). The cost
+  then grows with the cluster sizes, not with the square of the component
+  count.
+
+Requirements:
+- opencv-python
+- numpy
+
+Usage:
+    from layout_diff import extract_components, match_components
+    
+    layout = match_components(extract_components(image1), extract_components(image2))
+    
+    python3 layout_diff.py storefront.png backoffice.png [--max-shift 64]
+    python3 layout_diff.py --benchmark [--components 100 300 1000]
+"""
+
+import sys
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+
+CANNY_THRESHOLDS = (10, 30)  # Low: input borders and light bubbles barely differ from the page
+MIN_SIZE = 8  # Minimum component width and height (pixels)
+MIN_AREA = 100
+MAX_FRACTION = 0.9  # Boxes covering more of the image are the page background
+MIN_FILL = 0.75  # Contour area over box area; rounded rectangles and circles stay above this
+MIN_HOLE = 0.25  # Largest hole's box over the box area: outlines enclose one, dilated bold words do not
+NESTED_MARGIN = 4  # A box this close inside its parent on every side is the parent's inner outline
+THUMBNAIL_SIZE = 8
+MAX_SIZE_RATIO = 2.0
+MOVE_TOLERANCE = 2  # Pixels of center or size change still reported as unchanged
+RESTYLE_THRESHOLD = 0.1  # Appearance distance above which a matched component counts as restyled
+
+
+class Components:
+    """Boxes, nesting and appearance descriptors of the components of one image."""
+    
+    def __init__(self, boxes, depths, parents, colors, thumbnails, shape):
+        self.boxes = boxes  # (n, 4) int: x, y, w, h
+        self.depths = depths
+        self.parents = parents  # Index of the nearest enclosing component, -1 at the top level
+        self.colors = colors  # (n, 3) mean BGR
+        self.thumbnails = thumbnails  # (n, 64) zero-mean, unit-norm grayscale thumbnails (0 when flat)
+        self.shape = shape
+    
+    def __len__(self):
+        return len(self.boxes)
+    
+    @property
+    def centers(self):
+        return self.boxes[:, :2] + self.boxes[:, 2:] / 2
+    
+    def describe(self, index):
+        """JSON-ready description of one component."""
+        return {
+            'box': [int(v) for v in self.boxes[index]],
+            'depth': int(self.depths[index]),
+            'parent': int(self.parents[index]),
+            'color': [round(float(c), 1) for c in self.colors[index]],
+        }
+
+
+def extract_components(image, min_size=MIN_SIZE, min_area=MIN_AREA):
+    """UI components of a BGR (or grayscale) screenshot, outermost first."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    edges = cv2.morphologyEx(cv2.Canny(gray, *CANNY_THRESHOLDS), cv2.MORPH_CLOSE, np.ones((3, 3), np.uint8))
+    contours, hierarchy = cv2.findContours(edges, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    height, width = gray.shape[:2]
+    max_area = MAX_FRACTION * height * width
+    
+    boxes, depths, parents = [], [], []
+    kept = {}  # Contour index -> component index
+    if hierarchy is not None:
+        next_of, first_child_of, parent_of = hierarchy[0][:, 0], hierarchy[0][:, 2], hierarchy[0][:, 3]
+        # Contours come out parents first, so every ancestor is decided before its children
+        for index, contour in enumerate(contours):
+            ancestor = parent_of[index]
+            while ancestor >= 0 and ancestor not in kept:
+                ancestor = parent_of[ancestor]
+            parent = kept.get(ancestor, -1)
+            
+            x, y, w, h = cv2.boundingRect(contour)
+            if w < min_size or h < min_size or w * h < min_area or w * h > max_area:
+                continue
+            if cv2.contourArea(contour) < MIN_FILL * w * h:
+                continue
+            hole, child = 0.0, first_child_of[index]
+            while child >= 0 and hole < MIN_HOLE * w * h:
+                _, _, hole_w, hole_h = cv2.boundingRect(contours[child])
+                hole = max(hole, hole_w * hole_h)
+                child = next_of[child]
+            if hole < MIN_HOLE * w * h:
+                continue
+            if parent >= 0:
+                px, py, pw, ph = boxes[parent]
+                if (x - px <= NESTED_MARGIN and y - py <= NESTED_MARGIN
+                        and px + pw - x - w <= NESTED_MARGIN and py + ph - y - h <= NESTED_MARGIN):
+                    continue
+            kept[index] = len(boxes)
+            boxes.append((x, y, w, h))
+            depths.append(depths[parent] + 1 if parent >= 0 else 0)
+            parents.append(parent)
+    
+    boxes = np.array(boxes, dtype=np.int64).reshape(-1, 4)
+    colors = np.empty((len(boxes), 3))
+    thumbnails = np.zeros((len(boxes), THUMBNAIL_SIZE * THUMBNAIL_SIZE))
+    for i, (x, y, w, h) in enumerate(boxes):
+        colors[i] = cv2.mean(image[y:y + h, x:x + w])[:3] if image.ndim == 3 else cv2.mean(gray[y:y + h, x:x + w])[0]
+        thumbnail = cv2.resize(gray[y:y + h, x:x + w], (THUMBNAIL_SIZE, THUMBNAIL_SIZE),
+                               interpolation=cv2.INTER_AREA).ravel().astype(np.float64)
+        thumbnail -= thumbnail.mean()
+        norm = np.linalg.norm(thumbnail)
+        if norm > 1e-6:
+            thumbnails[i] = thumbnail / norm
+    return Components(boxes, np.array(depths, dtype=np.int64), np.array(parents, dtype=np.int64),
+                      colors, thumbnails, gray.shape[:2])
+
+
+def candidate_pairs(components1, components2, max_shift):
+    """Index pairs ``(i, j)`` whose centers lie within ``max_shift`` and sizes within ``MAX_SIZE_RATIO``.
+    
+    The centers of ``components2`` are bucketed into a grid of ``max_shift``
+    cells; each component of ``components1`` only looks at the 3x3 cells
+    around its own.
+    """
+    if not len(components1) or not len(components2):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    cell = max(float(max_shift), 1.0)
+    cells1 = np.floor(components1.centers / cell).astype(np.int64)
+    cells2 = np.floor(components2.centers / cell).astype(np.int64)
+    stride = int(max(cells1[:, 0].max(), cells2[:, 0].max())) + 3
+    keys2 = (cells2[:, 1] + 1) * stride + cells2[:, 0] + 1
+    order = np.argsort(keys2, kind="stable")
+    sorted_keys = keys2[order]
+    
+    firsts, seconds = [], []
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            keys = (cells1[:, 1] + dy + 1) * stride + cells1[:, 0] + dx + 1
+            starts = np.searchsorted(sorted_keys, keys, "left")
+            counts = np.searchsorted(sorted_keys, keys, "right") - starts
+            owners = np.repeat(np.arange(len(components1)), counts)
+            offsets = np.arange(len(owners)) - np.repeat(np.cumsum(counts) - counts, counts)
+            firsts.append(owners)
+            seconds.append(order[starts[owners] + offsets])
+    first, second = np.concatenate(firsts), np.concatenate(seconds)
+    return _gate(components1, components2, first, second, max_shift)
+
+
+def _gate(components1, components2, first, second, max_shift):
+    shift = components2.centers[second] - components1.centers[first]
+    ratio = components2.boxes[second, 2:] / components1.boxes[first, 2:]
+    keep = ((np.hypot(shift[:, 0], shift[:, 1]) <= max_shift)
+            & np.all((ratio <= MAX_SIZE_RATIO) & (ratio >= 1 / MAX_SIZE_RATIO), axis=1))
+    return first[keep], second[keep]
+
+
+def pair_costs(components1, components2, first, second, max_shift, weights=(1.0, 1.0, 1.0)):
+    """Position, size and appearance distance of each candidate pair, each scaled to 0..1."""
+    shift = components2.centers[second] - components1.centers[first]
+    position = np.hypot(shift[:, 0], shift[:, 1]) / max(max_shift, 1)
+    log_ratio = np.abs(np.log(components2.boxes[second, 2:] / components1.boxes[first, 2:]))
+    size = log_ratio.sum(axis=1) / (2 * np.log(MAX_SIZE_RATIO))
+    appearance = appearance_distance(components1, components2, first, second)
+    return weights[0] * position + weights[1] * size + weights[2] * appearance, appearance
+
+
+def appearance_distance(components1, components2, first, second):
+    """Mean of the thumbnail correlation distance and the mean-color distance, 0..1."""
+    correlation = np.einsum("ij,ij->i", components1.thumbnails[first], components2.thumbnails[second])
+    flat1 = ~components1.thumbnails[first].any(axis=1)
+    flat2 = ~components2.thumbnails[second].any(axis=1)
+    # Two flat patches have the same structure; a flat and a textured one are uncorrelated
+    correlation = np.where(flat1 & flat2, 1.0, correlation)
+    color = np.linalg.norm(components2.colors[second] - components1.colors[first], axis=1) / (255 * np.sqrt(3))
+    return 0.5 * (1 - correlation) / 2 + 0.5 * color
+
+
+def hungarian(cost):
+    """Minimum-cost assignment of every row of ``cost`` (rows <= columns) to a distinct column.
+    
+    Shortest augmenting path with row and column potentials, O(rows^2 x
+    columns), vectorized over the columns. Forbidden pairs are ``np.inf``; every
+    row needs at least one finite entry. Returns the column of each row.
+    """
+    rows, columns = cost.shape
+    u = np.zeros(rows + 1)
+    v = np.zeros(columns + 1)
+    owner = np.zeros(columns + 1, dtype=np.int64)  # Row (1-based) assigned to each column, 0 = free
+    way = np.zeros(columns + 1, dtype=np.int64)
+    for row in range(1, rows + 1):
+        owner[0] = row
+        column = 0
+        min_slack = np.full(columns + 1, np.inf)
+        used = np.zeros(columns + 1, dtype=bool)
+        while owner[column]:
+            used[column] = True
+            current = owner[column]
+            slack = cost[current - 1] - u[current] - v[1:]
+            better = ~used[1:] & (slack < min_slack[1:])
+            min_slack[1:][better] = slack[better]
+            way[1:][better] = column
+            free_slack = np.where(used[1:], np.inf, min_slack[1:])
+            next_column = int(np.argmin(free_slack)) + 1
+            delta = free_slack[next_column - 1]
+            u[owner[used]] += delta
+            v[used] -= delta
+            min_slack[~used] -= delta
+            column = next_column
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+    assignment = np.empty(rows, dtype=np.int64)
+    assigned = np.flatnonzero(owner[1:])
+    assignment[owner[1:][assigned] - 1] = assigned
+    return assignment
+
+
+def _clusters(count1, count2, first, second):
+    """Connected-component label of every node (components1 then components2) of the candidate graph."""
+    parent = list(range(count1 + count2))
+    
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+    
+    for a, b in zip(first.tolist(), (second + count1).tolist()):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+    return np.array([find(node) for node in range(count1 + count2)], dtype=np.int64)
+
+
+def assign(count1, count2, first, second, costs, max_cost, split=True):
+    """Optimal matching of the candidate pairs; unmatched components cost ``max_cost`` each.
+    
+    Returns the indices of the chosen pairs and the cluster label of every
+    node. With ``split`` the candidate graph is solved cluster by cluster.
+    """
+    labels = _clusters(count1, count2, first, second) if split else np.zeros(count1 + count2, dtype=np.int64)
+    if not len(first):
+        return np.empty(0, dtype=np.int64), labels
+    matched = []
+    pair_labels = labels[first]
+    order = np.argsort(pair_labels, kind="stable")
+    boundaries = np.flatnonzero(np.r_[True, pair_labels[order][1:] != pair_labels[order][:-1], True])
+    single = np.diff(boundaries) == 1
+    lone = order[boundaries[:-1][single]]
+    matched.append(lone[costs[lone] < max_cost])  # A cluster with one candidate pair needs no assignment
+    for start, end in zip(boundaries[:-1][~single], boundaries[1:][~single]):
+        pairs = order[start:end]
+        rows, row_index = np.unique(first[pairs], return_inverse=True)
+        columns, column_index = np.unique(second[pairs], return_inverse=True)
+        # Each row may also take its own "unmatched" column at max_cost
+        matrix = np.full((len(rows), len(columns) + len(rows)), np.inf)
+        matrix[row_index, column_index] = costs[pairs]
+        matrix[np.arange(len(rows)), len(columns) + np.arange(len(rows))] = max_cost
+        assignment = hungarian(matrix)
+        lookup = {(r, c): p for r, c, p in zip(row_index.tolist(), column_index.tolist(), pairs.tolist())}
+        matched.append(np.array([lookup[(r, c)] for r, c in enumerate(assignment.tolist()) if c < len(columns)],
+                                dtype=np.int64))
+    chosen = np.concatenate(matched) if matched else np.empty(0, dtype=np.int64)
+    return chosen, labels
+
+
+def match_components(components1, components2, max_shift=64, max_cost=1.0, weights=(1.0, 1.0, 1.0),
+                     prune=True):
+    """Match components of two images and classify the differences.
+    
+    Matched pairs are reported as moved, resized and/or restyled (appearance
+    distance over ``RESTYLE_THRESHOLD``); unmatched components of the first
+    image are removed and of the second added. ``prune=False`` compares every
+    pair and solves one assignment over all components (for benchmarking).
+    """
+    start_time = time.perf_counter()
+    if prune:
+        first, second = candidate_pairs(components1, components2, max_shift)
+    else:
+        first, second = np.divmod(np.arange(len(components1) * len(components2)), max(len(components2), 1))
+        first, second = _gate(components1, components2, first, second, max_shift)
+    costs, appearance = pair_costs(components1, components2, first, second, max_shift, weights)
+    chosen, labels = assign(len(components1), len(components2), first, second, costs, max_cost, split=prune)
+    matched1, matched2 = first[chosen], second[chosen]
+    
+    before, after = components1.boxes[matched1], components2.boxes[matched2]
+    shift = components2.centers[matched2] - components1.centers[matched1]
+    # A box resized around an edge or its center keeps that anchor: it moved only if none stayed in place
+    start_shift = after[:, :2] - before[:, :2]
+    end_shift = start_shift + after[:, 2:] - before[:, 2:]
+    anchored_shift = np.minimum(np.minimum(np.abs(start_shift), np.abs(end_shift)), np.abs(shift))
+    flags = {
+        'moved': anchored_shift.max(axis=1, initial=0) > MOVE_TOLERANCE,
+        'resized': np.abs(after[:, 2:] - before[:, 2:]).max(axis=1, initial=0) > MOVE_TOLERANCE,
+        'restyled': appearance[chosen] > RESTYLE_THRESHOLD,
+    }
+    counts = {name: int(flag.sum()) for name, flag in flags.items()}
+    changed = np.flatnonzero(flags['moved'] | flags['resized'] | flags['restyled'])
+    counts['unchanged'] = len(chosen) - len(changed)
+    matches = [{
+        'before': before[k].tolist(),
+        'after': after[k].tolist(),
+        'dx': float(shift[k, 0]), 'dy': float(shift[k, 1]),
+        'dw': int(after[k, 2] - before[k, 2]), 'dh': int(after[k, 3] - before[k, 3]),
+        'appearance': round(float(appearance[chosen[k]]), 4),
+        'cost': round(float(costs[chosen[k]]), 4),
+        'changes': [name for name, flag in flags.items() if flag[k]],
+    } for k in changed.tolist()]
+    
+    removed = np.setdiff1d(np.arange(len(components1)), matched1)
+    added = np.setdiff1d(np.arange(len(components2)), matched2)
+    cluster_sizes = np.bincount(np.unique(labels, return_inverse=True)[1]) if len(labels) else np.zeros(1)
+    matches.sort(key=lambda m: -m['cost'])
+    return {
+        'components': {'image1': len(components1), 'image2': len(components2)},
+        'matched': len(matched1),
+        **counts,
+        'added': len(added),
+        'removed': len(removed),
+        'changes': matches,
+        'added_components': [components2.describe(j) for j in added],
+        'removed_components': [components1.describe(i) for i in removed],
+        'candidate_pairs': len(first),
+        'clusters': int(len(cluster_sizes)),
+        'largest_cluster': int(cluster_sizes.max()),
+        'milliseconds': (time.perf_counter() - start_time) * 1000,
+    }
+
+
+def layout_diff(image1, image2, max_shift=64, max_cost=1.0):
+    """Extract and match the components of two BGR screenshots of the same size."""
+    start_time = time.perf_counter()
+    components1, components2 = extract_components(image1), extract_components(image2)
+    extract_ms = (time.perf_counter() - start_time) * 1000
+    layout = match_components(components1, components2, max_shift, max_cost)
+    layout['extract_milliseconds'] = extract_ms
+    return layout
+
+
+def _synthetic_layout(count, seed=0):
+    """Screenshot-like pair with ``count`` boxes; some moved, resized, recolored, removed or added."""
+    rng = np.random.default_rng(seed)
+    columns = 8
+    cell_w, cell_h = 200, 90
+    rows = -(-count // columns) + 2
+    image1 = np.full((rows * cell_h, columns * cell_w, 3), 245, dtype=np.uint8)
+    image2 = image1.copy()
+    
+    def draw(image, x, y, w, h, color):
+        cv2.rectangle(image, (x, y), (x + w, y + h), color, -1)
+        cv2.rectangle(image, (x, y), (x + w, y + h), (90, 90, 90), 1)
+        cv2.putText(image, "lorem ipsum", (x + 8, y + h // 2 + 5), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (20, 20, 20), 1)
+    
+    cells = rng.permutation(rows * columns)
+    edits = rng.choice(["same", "moved", "resized", "recolored", "removed"], size=count,
+                       p=[0.6, 0.2, 0.08, 0.06, 0.06])
+    for cell, edit in zip(cells[:count], edits):
+        x0, y0 = cell % columns * cell_w, cell // columns * cell_h
+        w, h = int(rng.integers(110, 160)), int(rng.integers(40, 60))
+        x, y = x0 + 12, y0 + 12
+        color = tuple(int(c) for c in rng.integers(150, 256, 3))
+        draw(image1, x, y, w, h, color)
+        if edit == "moved":
+            x, y = x + int(rng.choice([-1, 1]) * rng.integers(4, 11)), y + int(rng.integers(-10, 11))
+        elif edit == "resized":
+            w, h = w + int(rng.integers(8, 25)), h + int(rng.integers(-8, 8))
+        elif edit == "recolored":
+            color = tuple(255 - c for c in color)
+        if edit != "removed":
+            draw(image2, x, y, w, h, color)
+    for cell in cells[count:count + max(1, count // 20)]:
+        x0, y0 = cell % columns * cell_w, cell // columns * cell_h
+        draw(image2, x0 + 12, y0 + 12, 130, 50, (200, 220, 250))
+    expected = {edit: int((edits == edit).sum()) for edit in ("moved", "resized", "recolored", "removed")}
+    expected['added'] = len(cells[count:count + max(1, count // 20)])
+    return image1, image2, expected
+
+
+def run_benchmark(counts=(100, 300, 1000), max_shift=64):
+    """Time extraction and matching on synthetic layouts, pruned vs. all-pairs."""
+    try:
+        from scipy.optimize import linear_sum_assignment
+    except ImportError:
+        linear_sum_assignment = None
+    
+    for count in counts:
+        image1, image2, expected = _synthetic_layout(count)
+        start_time = time.perf_counter()
+        components1, components2 = extract_components(image1), extract_components(image2)
+        extract_ms = (time.perf_counter() - start_time) * 1000
+        pruned = match_components(components1, components2, max_shift)
+        dense = match_components(components1, components2, max_shift, prune=False)
+        print(f"🧩 {count} boxes on {image1.shape[1]}x{image1.shape[0]}: "
+              f"{len(components1)} / {len(components2)} components in {extract_ms:.1f} ms")
+        print(f"  pruned:    {pruned['milliseconds']:8.1f} ms, {pruned['candidate_pairs']} candidate pairs, "
+              f"{pruned['clusters']} clusters (largest {pruned['largest_cluster']})")
+        print(f"  all pairs: {dense['milliseconds']:8.1f} ms, one assignment over every component")
+        found = {key: pruned[key] for key in ('moved', 'resized', 'restyled', 'removed', 'added')}
+        print(f"  found {found}; edited {expected}")
+        if (pruned['matched'], pruned['added'], pruned['removed']) != (dense['matched'], dense['added'],
+                                                                      dense['removed']):
+            print("  ⚠️  Pruned and all-pairs matchings differ")
+        
+        if linear_sum_assignment is not None:
+            first, second = candidate_pairs(components1, components2, max_shift)
+            costs, _ = pair_costs(components1, components2, first, second, max_shift)
+            n1 = len(components1)
+            matrix = np.full((n1, len(components2) + n1), np.inf)
+            matrix[first, second] = costs
+            matrix[np.arange(n1), len(components2) + np.arange(n1)] = 1.0
+            start_time = time.perf_counter()
+            reference_rows, reference_columns = linear_sum_assignment(matrix)
+            reference_ms = (time.perf_counter() - start_time) * 1000
+            chosen, _ = assign(n1, len(components2), first, second, costs, 1.0)
+            total = costs[chosen].sum() + (n1 - len(chosen)) * 1.0
+            reference_total = matrix[reference_rows, reference_columns].sum()
+            print(f"  scipy linear_sum_assignment: {reference_ms:8.1f} ms, "
+                  f"total cost {reference_total:.4f} vs {total:.4f}")
+    if linear_sum_assignment is None:
+        print("⚠️  SciPy not installed; skipping the optimality check")
+    return 0
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description="Component-level layout diff of two screenshots")
+    parser.add_argument("images", nargs="*", help="Two images to compare")
+    parser.add_argument("--max-shift", type=int, default=64,
+                        help="Largest move (pixels) still matched to the same component (default: 64)")
+    parser.add_argument("--benchmark", action="store_true", help="Time on synthetic layouts")
+    parser.add_argument("--components", type=int, nargs="+", default=[100, 300, 1000],
+                        help="Boxes per synthetic benchmark layout (default: 100 300 1000)")
+    args = parser.parse_args()
+    
+    if args.benchmark:
+        return run_benchmark(args.components, args.max_shift)
+    if len(args.images) != 2:
+        parser.error("give two images or --benchmark")
+    
+    image1, image2 = (cv2.imread(path) for path in args.images)
+    if image1 is None or image2 is None:
+        print("❌ Could not load both images")
+        return 1
+    image2 = cv2.resize(image2, image1.shape[1::-1])
+    layout = layout_diff(image1, image2, args.max_shift)
+    print(f"🧩 {layout['components']['image1']} / {layout['components']['image2']} components, "
+          f"{layout['matched']} matched in {layout['extract_milliseconds'] + layout['milliseconds']:.1f} ms")
+    print(f"  moved {layout['moved']}, resized {layout['resized']}, restyled {layout['restyled']}, "
+          f"added {layout['added']}, removed {layout['removed']}")
+    for change in layout['changes'][:10]:
+        print(f"  {', '.join(change['changes']):<24} {change['before']} -> {change['after']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,7 +10,6 @@ Requirements:
 - opencv-python
 - numpy
 - matplotlib
-- scikit-image
 
 Features:
 - Pixel-level difference detection
@@ -21,22 +20,243 @@ Features:
 - Statistical analysis reports
 """
 
+import io
 import os
 import sys
+import time
+import argparse
 import cv2
 import numpy as np
 import matplotlib.pyplot as plt
 import json
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 from typing import Tuple, List, Dict, Optional
 
+from analysis_cache import DEFAULT_MAX_BYTES, AnalysisCache
+from color_difference import (FLOOR_MAX_DELTA_E, JND, METHODS as DELTA_E_METHODS, delta_e_map,
+                              summarize as summarize_delta_e)
+from image_metrics import hash_distance, image_hashes, ms_ssim, structural_similarity
+from image_registration import coverage_mask, register, warp_image
+from layout_diff import layout_diff
+from png_stream import PNGStripReader, RowSource, write_strips
+from screenshot_store import parse_artifact_name
+
 try:
-    from skimage.metrics import structural_similarity as ssim
-    from skimage import feature, measure
-except ImportError:
-    print("Warning: scikit-image not available. Some advanced features will be disabled.")
-    ssim = None
+    import resource
+except ImportError:  # Not available on Windows; peak RSS is then not reported
+    resource = None
+
+IMAGE_FORMATS = {"png": ".png", "webp": ".webp", "jpeg": ".jpg"}  # Artifact format -> file suffix
+REGION_INDEX_CELL = 32  # Minimum cell size of the grid index used to merge nearby regions
+METRICS = ("ssim", "ms_ssim", "features", "regions", "layout")  # Optional metrics; pixel statistics are always computed
+ARTIFACT_MODES = ("all", "changed", "none")
+COLOR_DIFFERENCES = ("rgb",) + DELTA_E_METHODS  # 'rgb' thresholds the grayscale absdiff
+DELTA_E_MAP_RANGE = 10  # The delta-E map saturates at this many JNDs
+
+
+def boundary_pixel_counts(mask: np.ndarray, labels: np.ndarray, count: int) -> np.ndarray:
+    """Per-label count of 4-connected boundary pixels (a perimeter estimate)."""
+    padded = np.pad(mask, 1)
+    interior = padded[:-2, 1:-1] & padded[2:, 1:-1] & padded[1:-1, :-2] & padded[1:-1, 2:]
+    return np.bincount(labels[mask & ~interior], minlength=count).astype(np.float64)
+
+
+def merge_nearby_components(components: np.ndarray, gap: int,
+                            fragments: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge components whose bounding boxes lie within ``gap`` pixels of each other.
+    
+    ``components`` is an (n, 8) array of area, x0, y0, x1, y1 (exclusive),
+    area-weighted x and y sums and perimeter. Candidate pairs come from a
+    uniform grid index over the boxes (each box is registered in the cells its
+    gap-expanded box covers), so only neighbours are compared. Merging repeats
+    until no merged box comes within ``gap`` of another. Returns the merged
+    rows and the number of fragments in each (``fragments`` gives the
+    fragment count of rows that are already merged groups).
+    """
+    if fragments is None:
+        fragments = np.ones(len(components), dtype=np.int64)
+    cell = max(2 * gap, REGION_INDEX_CELL)
+    while gap >= 0 and len(components) > 1:
+        x0, y0, x1, y1 = (components[:, i].astype(np.int64) for i in (1, 2, 3, 4))
+        cx0, cy0 = np.maximum(x0 - gap, 0) // cell, np.maximum(y0 - gap, 0) // cell
+        cx1, cy1 = (x1 + gap) // cell, (y1 + gap) // cell
+        
+        # Expand every box into the grid cells it covers
+        columns, rows = cx1 - cx0 + 1, cy1 - cy0 + 1
+        owners = np.repeat(np.arange(len(components)), columns * rows)
+        offsets = np.arange(len(owners)) - np.repeat(np.cumsum(columns * rows) - columns * rows, columns * rows)
+        cell_x = cx0[owners] + offsets % columns[owners]
+        cell_y = cy0[owners] + offsets // columns[owners]
+        cell_ids = cell_y * (int(cx1.max()) + 1) + cell_x
+        order = np.lexsort((owners, cell_ids))
+        cell_ids, owners = cell_ids[order], owners[order]
+        
+        # Candidate pairs share a cell; keep those within the gap on both axes
+        starts = np.flatnonzero(np.r_[True, cell_ids[1:] != cell_ids[:-1]])
+        sizes = np.diff(np.r_[starts, len(cell_ids)])
+        pairs = [owners[start + np.stack(np.triu_indices(size, 1))]
+                 for start, size in zip(starts[sizes > 1], sizes[sizes > 1])]
+        if not pairs:
+            break
+        a, b = np.hstack(pairs)
+        close = (x0[a] <= x1[b] + gap) & (x0[b] <= x1[a] + gap) & (y0[a] <= y1[b] + gap) & (y0[b] <= y1[a] + gap)
+        a, b = a[close], b[close]
+        if not len(a):
+            break
+        
+        # Connected groups by min-label propagation with pointer jumping
+        group = np.arange(len(components))
+        while True:
+            low = np.minimum(group[a], group[b])
+            previous = group.copy()
+            np.minimum.at(group, a, low)
+            np.minimum.at(group, b, low)
+            group = group[group]
+            if np.array_equal(group, previous):
+                break
+        
+        components, fragments = group_components(components, fragments, group)
+    return components, fragments
+
+
+def group_components(components: np.ndarray, fragments: np.ndarray,
+                     group: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Combine component rows that share a ``group`` label (any integers)."""
+    _, group = np.unique(group, return_inverse=True)
+    count = int(group.max()) + 1
+    merged = np.empty((count, components.shape[1]))
+    for column in (0, 5, 6, 7):
+        merged[:, column] = np.bincount(group, weights=components[:, column], minlength=count)
+    merged[:, 1:3] = np.inf
+    merged[:, 3:5] = -np.inf
+    for column in (1, 2):
+        np.minimum.at(merged[:, column], group, components[:, column])
+    for column in (3, 4):
+        np.maximum.at(merged[:, column], group, components[:, column])
+    return merged, np.bincount(group, weights=fragments, minlength=count).astype(np.int64)
+
+
+def component_regions(components: np.ndarray, fragments: np.ndarray, min_area: float = 0) -> List[Dict]:
+    """Region dicts (largest first) from merged component rows."""
+    regions = []
+    kept = np.flatnonzero(components[:, 0] >= min_area)
+    for index in kept[np.argsort(-components[kept, 0], kind="stable")]:
+        area, x0, y0, x1, y1, sum_x, sum_y, perimeter = components[index]
+        x, y, w, h = int(x0), int(y0), int(x1 - x0), int(y1 - y0)
+        regions.append({
+            'id': len(regions),
+            'area': float(area),
+            'perimeter': float(perimeter),
+            'bounding_box': (x, y, w, h),
+            'aspect_ratio': float(w / h) if h > 0 else 0.0,
+            'center': (x + w // 2, y + h // 2),
+            'centroid': (float(sum_x / area), float(sum_y / area)),
+            'fragments': int(fragments[index])
+        })
+    return regions
+
+
+class StripRegionMerger:
+    """Connected components of a difference mask fed as horizontal strips.
+    
+    Each strip is labeled on its own; components touching across a strip
+    border (8-connectivity) are joined with a union-find, so regions match a
+    whole-image labeling while only the current and previous strip are held.
+    """
+    
+    def __init__(self, width: int):
+        self.width = width
+        self.parent = [0]  # Global label -> parent; 0 is background
+        self.stats = []  # Per strip: (n, 7) area, x0, y0, x1, y1, sum_x, sum_y
+        self.boundary = []  # Per strip: (labels, boundary pixel counts)
+        self._pending = None  # Previous strip, awaiting its lower neighbour row
+        self._above = np.zeros(width, dtype=bool)
+    
+    def _find(self, label: int) -> int:
+        parent = self.parent
+        while parent[label] != label:
+            parent[label] = parent[parent[label]]
+            label = parent[label]
+        return label
+    
+    def _count_boundary(self, below: np.ndarray):
+        """Count 4-connected boundary pixels of the pending strip."""
+        mask, labels = self._pending
+        padded = np.pad(np.vstack([self._above, mask, below]), ((0, 0), (1, 1)))
+        interior = (padded[:-2, 1:-1] & padded[2:, 1:-1] & padded[1:-1, :-2] & padded[1:-1, 2:])
+        edge_labels, counts = np.unique(labels[mask & ~interior], return_counts=True)
+        self.boundary.append((edge_labels, counts))
+        self._above = mask[-1]
+    
+    def add(self, mask: np.ndarray, top: int):
+        """Label one strip of a boolean mask whose first row is image row ``top``."""
+        count, labels, stats, centroids = cv2.connectedComponentsWithStats(
+            mask.astype(np.uint8), connectivity=8, ltype=cv2.CV_32S
+        )
+        base = len(self.parent) - 1
+        self.parent.extend(range(base + 1, base + count))
+        labels = np.where(labels > 0, labels + base, 0)
+        
+        area = stats[1:, cv2.CC_STAT_AREA].astype(np.float64)
+        x0 = stats[1:, cv2.CC_STAT_LEFT]
+        y0 = stats[1:, cv2.CC_STAT_TOP] + top
+        self.stats.append(np.column_stack([
+            area, x0, y0, x0 + stats[1:, cv2.CC_STAT_WIDTH], y0 + stats[1:, cv2.CC_STAT_HEIGHT],
+            centroids[1:, 0] * area, (centroids[1:, 1] + top) * area
+        ]))
+        
+        if self._pending is not None:
+            # Join components that touch across the border, diagonals included
+            previous, current = self._pending[1][-1], labels[0]
+            for shift in (-1, 0, 1):
+                above = np.zeros_like(previous)
+                if shift < 0:
+                    above[1:] = previous[:-1]
+                elif shift > 0:
+                    above[:-1] = previous[1:]
+                else:
+                    above = previous
+                touching = (current > 0) & (above > 0)
+                for a, b in set(zip(current[touching].tolist(), above[touching].tolist())):
+                    root_a, root_b = self._find(a), self._find(b)
+                    if root_a != root_b:
+                        self.parent[max(root_a, root_b)] = min(root_a, root_b)
+            self._count_boundary(mask[0])
+        self._pending = (mask, labels)
+    
+    def regions(self, min_area: float = 0, merge_gap: int = -1) -> List[Dict]:
+        """Merged regions in the same format as ``find_difference_regions``.
+        
+        Regions within ``merge_gap`` pixels of each other are combined
+        (``merge_nearby_components``); a negative gap keeps them separate.
+        """
+        if self._pending is not None:
+            self._count_boundary(np.zeros(self.width, dtype=bool))
+            self._pending = None
+        if len(self.parent) == 1:
+            return []
+        
+        roots = np.array([self._find(label) for label in range(len(self.parent))])
+        stats = np.vstack(self.stats)
+        owner = roots[1:]
+        merged = np.zeros((len(self.parent), 8))
+        merged[:, 1:3] = np.inf
+        np.add.at(merged[:, 0], owner, stats[:, 0])
+        np.minimum.at(merged[:, 1], owner, stats[:, 1])
+        np.minimum.at(merged[:, 2], owner, stats[:, 2])
+        np.maximum.at(merged[:, 3], owner, stats[:, 3])
+        np.maximum.at(merged[:, 4], owner, stats[:, 4])
+        np.add.at(merged[:, 5], owner, stats[:, 5])
+        np.add.at(merged[:, 6], owner, stats[:, 6])
+        for edge_labels, counts in self.boundary:
+            np.add.at(merged[:, 7], roots[edge_labels], counts)
+        
+        components, fragments = merge_nearby_components(merged[np.unique(owner)], merge_gap)
+        return component_regions(components, fragments, min_area)
+
 
 class OpenCVChatAnalyzer:
     """Advanced OpenCV-based chat GUI comparison tool."""
@@ -50,6 +270,48 @@ class OpenCVChatAnalyzer:
         self.resize_height = 600
         self.difference_threshold = 30  # Pixel difference threshold
         self.contour_min_area = 100  # Minimum area for significant differences
+        self.region_merge_gap = 8  # Merge difference regions closer than this (pixels); -1 keeps fragments
+        self.layout_max_shift = 64  # UI components moved further than this (pixels) count as removed and added
+        
+        # Which pixels count as different: 'rgb' thresholds the grayscale absdiff at difference_threshold,
+        # 'cie76' / 'ciede2000' threshold the perceptual delta-E at jnd_threshold just-noticeable differences
+        self.color_difference = "rgb"
+        self.jnd_threshold = 1.0
+        self.delta_e_floor = 0  # Fast path: pixels within this many levels in every channel count as delta-E 0
+        
+        # Align the backoffice image onto the storefront one before diffing: None, 'translation' or 'homography'
+        self.registration = None
+        
+        # Perceptual-hash prefilter: pairs within these tolerances skip the full pipeline
+        self.prefilter = True
+        self.hash_tolerance = 0  # Max differing bits in each 64-bit hash
+        self.unchanged_tolerance = 0.001  # Max fraction of pixels over difference_threshold
+        
+        # Content-keyed result cache: identical inputs and parameters reuse stored artifacts
+        self.use_cache = True
+        self.cache_dir = self.output_dir / "cache"
+        self.cache_max_bytes = DEFAULT_MAX_BYTES
+        
+        # Visual artifacts: 'all' writes the images and HTML report for every pair, 'changed' only
+        # when more than artifact_threshold percent of pixels differ, 'none' only the stats JSON.
+        # Pairs without artifacts compute just the listed metrics.
+        self.artifacts = "all"
+        self.artifact_threshold = 1.0
+        self.metrics = METRICS
+        
+        # Parallel bands for SSIM (OpenCV filters release the GIL)
+        self.ssim_workers = 1
+        
+        # Artifact encoding: 'png', lossless 'webp' or 'jpeg' (for previews), encoded in parallel
+        # threads (cv2.imwrite releases the GIL). None keeps OpenCV's default PNG compression.
+        self.image_format = "png"
+        self.png_compression = None
+        self.jpeg_quality = 90
+        self.encode_workers = min(4, os.cpu_count() or 1)
+        
+        # Strip-streamed grid output (bounded memory for large images)
+        self.tiled_grid = False
+        self.strip_height = 64
         
         # Color schemes for visualization
         self.colors = {
@@ -71,14 +333,11 @@ class OpenCVChatAnalyzer:
         if img is None:
             raise ValueError(f"Could not load image: {image_path}")
         
-        # Convert to RGB for consistent processing
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        
-        # Resize for consistent comparison
-        img_resized = cv2.resize(img_rgb, (self.resize_width, self.resize_height))
+        # Resize for consistent comparison; images stay BGR so artifacts are written without conversion
+        img_resized = cv2.resize(img, (self.resize_width, self.resize_height))
         
         # Create grayscale version for certain analyses
-        img_gray = cv2.cvtColor(img_resized, cv2.COLOR_RGB2GRAY)
+        img_gray = cv2.cvtColor(img_resized, cv2.COLOR_BGR2GRAY)
         
         return img_resized, img_gray
     
@@ -90,20 +349,18 @@ class OpenCVChatAnalyzer:
         diff = cv2.absdiff(img1, img2)
         
         # Convert to grayscale for threshold analysis
-        diff_gray = cv2.cvtColor(diff, cv2.COLOR_RGB2GRAY)
+        diff_gray = cv2.cvtColor(diff, cv2.COLOR_BGR2GRAY)
         
         # Apply threshold to identify significant differences
         _, thresh = cv2.threshold(diff_gray, self.difference_threshold, 255, cv2.THRESH_BINARY)
         
         # Calculate statistics
         total_pixels = img1.shape[0] * img1.shape[1]
-        different_pixels = np.count_nonzero(thresh)
+        different_pixels = cv2.countNonZero(thresh)
         similarity_percentage = ((total_pixels - different_pixels) / total_pixels) * 100
         
-        # Calculate average difference per channel
-        avg_diff_r = np.mean(diff[:, :, 0])
-        avg_diff_g = np.mean(diff[:, :, 1])
-        avg_diff_b = np.mean(diff[:, :, 2])
+        # Average difference of every channel in one pass
+        avg_diff_b, avg_diff_g, avg_diff_r, _ = cv2.mean(diff)
         
         stats = {
             'total_pixels': int(total_pixels),
@@ -113,25 +370,138 @@ class OpenCVChatAnalyzer:
                 'red': float(avg_diff_r),
                 'green': float(avg_diff_g),
                 'blue': float(avg_diff_b),
-                'overall': float(np.mean(diff))
+                'overall': float((avg_diff_r + avg_diff_g + avg_diff_b) / 3)
             }
         }
         
         return diff, thresh, stats
     
+    def calculate_color_difference(self, img1: np.ndarray, img2: np.ndarray, thresh: np.ndarray,
+                                   stats: Dict) -> np.ndarray:
+        """Perceptual delta-E map; rewrites ``thresh`` and the pixel ``stats`` from it.
+        
+        A pixel is different when its delta-E exceeds ``jnd_threshold`` JNDs, so
+        small anti-aliasing shifts drop out and hue changes of a few RGB levels
+        count. The distribution is added to ``stats`` under ``delta_e``.
+        """
+        print(f"🎨 Calculating color difference ({self.color_difference})...")
+        start_time = time.perf_counter()
+        
+        delta_e = delta_e_map(img1, img2, self.color_difference, self.delta_e_floor)
+        limit = self.jnd_threshold * JND[self.color_difference]
+        cv2.compare(delta_e, limit, cv2.CMP_GT, dst=thresh)
+        
+        different_pixels = cv2.countNonZero(thresh)
+        stats['different_pixels'] = int(different_pixels)
+        stats['similarity_percentage'] = float((stats['total_pixels'] - different_pixels) / stats['total_pixels'] * 100)
+        stats['delta_e'] = {**summarize_delta_e(delta_e, self.color_difference, self.jnd_threshold),
+                            'milliseconds': (time.perf_counter() - start_time) * 1000}
+        print(f"  Δ mean {stats['delta_e']['mean']:.2f}, max {stats['delta_e']['max']:.1f}, "
+              f"{different_pixels:,} pixels over {self.jnd_threshold:g} JND "
+              f"in {stats['delta_e']['milliseconds']:.1f} ms")
+        return delta_e
+    
+    def calculate_pixel_difference_tiled(self, image_path1: str, image_path2: str) -> Dict:
+        """Pixel statistics at native resolution, streaming both PNGs strip by strip.
+        
+        Nothing is resized: the threshold mask is labeled strip by strip and
+        regions crossing strip borders are stitched (``StripRegionMerger``), so
+        memory stays bounded by a few strips for full-page and HiDPI captures.
+        Area covered by only one image counts as different.
+        """
+        print("🔍 Calculating native-resolution pixel differences...")
+        
+        with PNGStripReader(image_path1) as reader1, PNGStripReader(image_path2) as reader2:
+            width, height = min(reader1.width, reader2.width), min(reader1.height, reader2.height)
+            total_pixels = max(reader1.width, reader2.width) * max(reader1.height, reader2.height)
+            source1 = RowSource(reader1, self.strip_height)
+            source2 = RowSource(reader2, self.strip_height)
+            
+            different_pixels = 0
+            channel_sums = np.zeros(3, dtype=np.float64)
+            bands = []
+            merger = StripRegionMerger(width)
+            for top in range(0, height, self.strip_height):
+                rows = min(self.strip_height, height - top)
+                diff = cv2.absdiff(source1.read(rows)[:, :width], source2.read(rows)[:, :width])
+                diff_gray = cv2.cvtColor(diff, cv2.COLOR_RGB2GRAY)
+                thresh = diff_gray > self.difference_threshold
+                merger.add(thresh, top)
+                strip_different = int(np.count_nonzero(thresh))
+                channel_sums += diff.sum(axis=(0, 1), dtype=np.float64)
+                different_pixels += strip_different
+                
+                # Merge adjacent differing strips into vertical bands
+                if strip_different:
+                    if bands and bands[-1]['y_end'] == top:
+                        bands[-1]['y_end'] = top + rows
+                        bands[-1]['different_pixels'] += strip_different
+                    else:
+                        bands.append({'y_start': top, 'y_end': top + rows, 'different_pixels': strip_different})
+        
+        # Pixels outside the shared area have no counterpart
+        different_pixels += total_pixels - width * height
+        avg_diff = channel_sums / total_pixels
+        
+        return {
+            'total_pixels': int(total_pixels),
+            'different_pixels': int(different_pixels),
+            'similarity_percentage': float((total_pixels - different_pixels) / total_pixels * 100),
+            'avg_difference': {
+                'red': float(avg_diff[0]),
+                'green': float(avg_diff[1]),
+                'blue': float(avg_diff[2]),
+                'overall': float(avg_diff.mean())
+            },
+            'dimensions': {
+                'image1': [reader1.width, reader1.height],
+                'image2': [reader2.width, reader2.height]
+            },
+            'difference_bands': bands,
+            'regions': merger.regions(self.contour_min_area, self.region_merge_gap)
+        }
+    
+    def register_images(self, img1: np.ndarray, img1_gray: np.ndarray, img2: np.ndarray,
+                        img2_gray: np.ndarray) -> Tuple[np.ndarray, np.ndarray, Dict]:
+        """Align ``img2`` onto ``img1``; pixels the shifted image no longer covers are taken from ``img1``."""
+        print(f"📐 Registering images ({self.registration})...")
+        
+        matrix, info = register(img1_gray, img2_gray, self.registration)
+        if matrix is None:
+            info['coverage'] = 1.0
+            return img2, img2_gray, info
+        
+        covered = coverage_mask(matrix, img2.shape, img1.shape)
+        aligned = warp_image(img2, matrix, img1.shape)
+        aligned[~covered] = img1[~covered]
+        info['coverage'] = float(covered.mean())
+        print(f"  ↔️  dx={info['dx']:+.1f} dy={info['dy']:+.1f} scale={info['scale']:.3f} "
+              f"in {info['milliseconds']:.1f} ms")
+        return aligned, cv2.cvtColor(aligned, cv2.COLOR_BGR2GRAY), info
+    
+    def prefilter_pair(self, img1_gray: np.ndarray, img2_gray: np.ndarray, pixel_stats: Dict) -> Dict:
+        """Decide from perceptual hashes and pixel statistics whether a pair is unchanged."""
+        hashes1, hashes2 = image_hashes(img1_gray), image_hashes(img2_gray)
+        distances = {name: hash_distance(hashes1[name], hashes2[name]) for name in hashes1}
+        different_fraction = pixel_stats['different_pixels'] / pixel_stats['total_pixels']
+        
+        return {
+            'hashes': {name: [f"{hashes1[name]:016x}", f"{hashes2[name]:016x}"] for name in hashes1},
+            'hash_distances': distances,
+            'different_fraction': different_fraction,
+            'unchanged': max(distances.values()) <= self.hash_tolerance
+                         and different_fraction <= self.unchanged_tolerance
+        }
+    
     def calculate_structural_similarity(self, img1_gray: np.ndarray, img2_gray: np.ndarray) -> Tuple[float, np.ndarray]:
         """Calculate structural similarity index (SSIM)."""
-        if ssim is None:
-            print("⚠️  SSIM analysis unavailable (scikit-image not installed)")
-            return 0.0, np.zeros_like(img1_gray)
-        
         print("📊 Calculating structural similarity...")
         
-        # Calculate SSIM
-        similarity_index, similarity_map = ssim(img1_gray, img2_gray, full=True)
+        # Calculate SSIM (built-in, numerically equivalent to scikit-image's)
+        similarity_index, similarity_map = structural_similarity(img1_gray, img2_gray, workers=self.ssim_workers)
         
         # Convert similarity map to 0-255 range
-        similarity_map = (similarity_map * 255).astype(np.uint8)
+        similarity_map = (np.clip(similarity_map, 0, 1) * 255).astype(np.uint8)
         
         return similarity_index, similarity_map
     
@@ -175,57 +545,80 @@ class OpenCVChatAnalyzer:
             'stats': feature_stats
         }
     
+    def compare_layout(self, img1: np.ndarray, img2: np.ndarray) -> Dict:
+        """Match UI components (bubbles, buttons, inputs, header) between the images.
+        
+        See ``layout_diff``: components come from the contour hierarchy and are
+        paired by an optimal assignment on position, size and appearance.
+        """
+        print("🧩 Comparing component layout...")
+        
+        layout = layout_diff(img1, img2, self.layout_max_shift)
+        print(f"  {layout['components']['image1']} / {layout['components']['image2']} components: "
+              f"{layout['moved']} moved, {layout['resized']} resized, {layout['restyled']} restyled, "
+              f"{layout['added']} added, {layout['removed']} removed "
+              f"in {layout['extract_milliseconds'] + layout['milliseconds']:.1f} ms")
+        return layout
+    
     def find_difference_regions(self, thresh: np.ndarray) -> List[Dict]:
-        """Find and analyze regions of significant differences."""
-        print("📍 Identifying difference regions...")
-        
-        # Find contours of difference regions
-        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        regions = []
-        for i, contour in enumerate(contours):
-            area = cv2.contourArea(contour)
-            
-            # Filter out small noise
-            if area < self.contour_min_area:
-                continue
-            
-            # Get bounding rectangle
-            x, y, w, h = cv2.boundingRect(contour)
-            
-            # Calculate region properties
-            perimeter = cv2.arcLength(contour, True)
-            aspect_ratio = w / h if h > 0 else 0
-            
-            regions.append({
-                'id': int(i),
-                'area': float(area),
-                'perimeter': float(perimeter),
-                'bounding_box': (int(x), int(y), int(w), int(h)),
-                'aspect_ratio': float(aspect_ratio),
-                'center': (int(x + w//2), int(y + h//2))
-            })
+        """Find and analyze regions of significant differences.
         
-        # Sort regions by area (largest first)
-        regions.sort(key=lambda r: r['area'], reverse=True)
+        Connected components of the threshold mask are measured in one
+        vectorized pass, then fragments within ``region_merge_gap`` pixels are
+        merged so noisy diffs yield a few meaningful regions.
+        """
+        print("📍 Identifying difference regions...")
         
-        return regions
+        mask = thresh > 0
+        count, labels, cc_stats, centroids = cv2.connectedComponentsWithStats(
+            mask.view(np.uint8), connectivity=8, ltype=cv2.CV_32S
+        )
+        if count == 1:
+            return []
+        
+        area = cc_stats[1:, cv2.CC_STAT_AREA].astype(np.float64)
+        x0, y0 = cc_stats[1:, cv2.CC_STAT_LEFT], cc_stats[1:, cv2.CC_STAT_TOP]
+        components = np.column_stack([
+            area, x0, y0, x0 + cc_stats[1:, cv2.CC_STAT_WIDTH], y0 + cc_stats[1:, cv2.CC_STAT_HEIGHT],
+            centroids[1:, 0] * area, centroids[1:, 1] * area,
+            boundary_pixel_counts(mask, labels, count)[1:]
+        ])
+        
+        fragments = np.ones(count - 1, dtype=np.int64)
+        gap = self.region_merge_gap
+        if gap >= 0 and count > 2:
+            # Fragments whose pixels are within the gap share a component of the dilated
+            # mask; grouping them first leaves only box-level merges for the spatial index
+            dilated = cv2.dilate(mask.view(np.uint8), np.ones((gap + 1, gap + 1), np.uint8))
+            _, groups = cv2.connectedComponents(dilated, connectivity=8, ltype=cv2.CV_32S)
+            group = np.zeros(count, dtype=np.int32)
+            group[labels[mask]] = groups[mask]
+            components, fragments = group_components(components, fragments, group[1:])
+        
+        components, fragments = merge_nearby_components(components, gap, fragments)
+        return component_regions(components, fragments, self.contour_min_area)
     
     def create_heatmap_visualization(self, diff: np.ndarray) -> np.ndarray:
         """Create a heatmap visualization of differences."""
         print("🌡️ Creating difference heatmap...")
         
-        # Convert difference to intensity
-        diff_intensity = np.mean(diff, axis=2)
+        # Convert difference to intensity (the channel sum normalizes the same as the mean)
+        diff_intensity = np.add(diff[:, :, 0], diff[:, :, 1], dtype=np.uint16)
+        np.add(diff_intensity, diff[:, :, 2], out=diff_intensity)
         
         # Normalize to 0-255 range
-        diff_normalized = cv2.normalize(diff_intensity, None, 0, 255, cv2.NORM_MINMAX)
+        diff_normalized = cv2.normalize(diff_intensity, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_32F)
         
         # Apply colormap for heatmap
-        heatmap = cv2.applyColorMap(diff_normalized.astype(np.uint8), cv2.COLORMAP_JET)
-        heatmap_rgb = cv2.cvtColor(heatmap, cv2.COLOR_BGR2RGB)
+        return cv2.applyColorMap(diff_normalized.astype(np.uint8), cv2.COLORMAP_JET)
+    
+    def create_delta_e_visualization(self, delta_e: np.ndarray) -> np.ndarray:
+        """Color-mapped delta-E, saturating at ``DELTA_E_MAP_RANGE`` JNDs."""
+        print("🌈 Creating delta-E map...")
         
-        return heatmap_rgb
+        alpha = 255 / (DELTA_E_MAP_RANGE * JND[self.color_difference])
+        levels = cv2.convertScaleAbs(delta_e, alpha=alpha)
+        return cv2.applyColorMap(levels, cv2.COLORMAP_INFERNO)
     
     def create_overlay_visualization(self, img1: np.ndarray, img2: np.ndarray, 
                                    diff_regions: List[Dict]) -> np.ndarray:
@@ -256,6 +649,27 @@ class OpenCVChatAnalyzer:
         
         return overlay
     
+    def create_layout_visualization(self, img2: np.ndarray, layout: Dict) -> np.ndarray:
+        """Backoffice image with removed (red), added (green) and changed (yellow) components."""
+        print("🧩 Creating layout visualization...")
+        
+        canvas = img2.copy()
+        for component, color in ([(c, self.colors['removed']) for c in layout['removed_components']]
+                                 + [(c, self.colors['added']) for c in layout['added_components']]):
+            x, y, w, h = component['box']
+            cv2.rectangle(canvas, (x, y), (x + w, y + h), color, 2)
+        for change in layout['changes']:
+            x, y, w, h = change['after']
+            bx, by, bw, bh = change['before']
+            cv2.rectangle(canvas, (bx, by), (bx + bw, by + bh), self.colors['identical'], 1)
+            cv2.rectangle(canvas, (x, y), (x + w, y + h), self.colors['changed'], 2)
+            if 'moved' in change['changes']:
+                cv2.arrowedLine(canvas, (bx + bw // 2, by + bh // 2), (x + w // 2, y + h // 2),
+                                self.colors['changed'], 1, tipLength=0.2)
+            cv2.putText(canvas, "/".join(change['changes']), (x, max(y - 4, 10)), cv2.FONT_HERSHEY_SIMPLEX,
+                        0.4, self.colors['changed'], 1)
+        return canvas
+    
     def generate_comparison_grid(self, img1: np.ndarray, img2: np.ndarray, 
                                diff: np.ndarray, heatmap: np.ndarray, 
                                overlay: np.ndarray) -> np.ndarray:
@@ -275,9 +689,8 @@ class OpenCVChatAnalyzer:
         grid[h:2*h, 0:w] = heatmap
         grid[h:2*h, w:2*w] = overlay
         
-        # Create combined analysis view
-        combined = cv2.addWeighted(img1, 0.3, heatmap, 0.7, 0)
-        grid[h:2*h, 2*w:3*w] = combined
+        # Create combined analysis view directly in its grid cell
+        cv2.addWeighted(img1, 0.3, heatmap, 0.7, 0, dst=grid[h:2*h, 2*w:3*w])
         
         # Add labels
         labels = [
@@ -296,41 +709,138 @@ class OpenCVChatAnalyzer:
         
         return grid
     
-    def save_analysis_results(self, results: Dict, timestamp: str):
-        """Save all analysis results to files."""
-        print("💾 Saving analysis results...")
-        
-        # Save images
-        cv2.imwrite(str(self.output_dir / f"pixel_difference_{timestamp}.png"), 
-                   cv2.cvtColor(results['pixel_diff'], cv2.COLOR_RGB2BGR))
-        
-        cv2.imwrite(str(self.output_dir / f"heatmap_{timestamp}.png"), 
-                   cv2.cvtColor(results['heatmap'], cv2.COLOR_RGB2BGR))
-        
-        cv2.imwrite(str(self.output_dir / f"overlay_{timestamp}.png"), 
-                   cv2.cvtColor(results['overlay'], cv2.COLOR_RGB2BGR))
+    def iter_comparison_grid_strips(self, img1: np.ndarray, img2: np.ndarray,
+                                    diff: np.ndarray, heatmap: np.ndarray,
+                                    overlay: np.ndarray, strip_height: int = 64):
+        """Yield the comparison grid as horizontal strips without allocating the full grid."""
+        h, w = img1.shape[:2]
+        labels = [
+            "Storefront", "Backoffice", "Pixel Difference",
+            "Difference Heatmap", "Region Overlay", "Combined Analysis"
+        ]
+        positions = [
+            (10, 30), (w + 10, 30), (2*w + 10, 30),
+            (10, h + 30), (w + 10, h + 30), (2*w + 10, h + 30)
+        ]
         
-        cv2.imwrite(str(self.output_dir / f"comparison_grid_{timestamp}.png"), 
-                   cv2.cvtColor(results['grid'], cv2.COLOR_RGB2BGR))
+        for top in range(0, 2 * h, strip_height):
+            bottom = min(top + strip_height, 2 * h)
+            strip = np.empty((bottom - top, 3 * w, 3), dtype=np.uint8)
+            
+            # A strip may straddle the boundary between the two grid rows
+            for row_start, row_end in ((top, min(bottom, h)), (max(top, h), bottom)):
+                if row_start >= row_end:
+                    continue
+                dst = strip[row_start - top:row_end - top]
+                if row_start < h:
+                    a, b = row_start, row_end
+                    dst[:, 0:w] = img1[a:b]
+                    dst[:, w:2*w] = img2[a:b]
+                    dst[:, 2*w:3*w] = diff[a:b]
+                else:
+                    a, b = row_start - h, row_end - h
+                    dst[:, 0:w] = heatmap[a:b]
+                    dst[:, w:2*w] = overlay[a:b]
+                    dst[:, 2*w:3*w] = cv2.addWeighted(img1[a:b], 0.3, heatmap[a:b], 0.7, 0)
+            
+            # Text is clipped to the strip; the next strip draws the remainder
+            for label, (x, y) in zip(labels, positions):
+                cv2.putText(strip, label, (x, y - top), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+                cv2.putText(strip, label, (x, y - top), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 1)
+            
+            yield strip
+    
+    def write_comparison_grid(self, path: Path, img1: np.ndarray, img2: np.ndarray,
+                              diff: np.ndarray, heatmap: np.ndarray, overlay: np.ndarray,
+                              scale: int = 1, compress_level: int = 6):
+        """Stream the comparison grid to a PNG, optionally as a 1/scale thumbnail."""
+        h, w = img1.shape[:2]
+        strip_height = scale * max(1, self.strip_height // scale)
+        strips = self.iter_comparison_grid_strips(img1, img2, diff, heatmap, overlay, strip_height)
+        # The strip writer takes RGB; reversing each strip's view costs no full-size copy
+        return write_strips(path, 3 * w, 2 * h, (strip[:, :, ::-1] for strip in strips),
+                            scale=scale, compress_level=compress_level)
+    
+    def encode_parameters(self) -> List[int]:
+        """``cv2.imwrite`` parameters for the configured artifact format."""
+        if self.image_format == "webp":
+            return [cv2.IMWRITE_WEBP_QUALITY, 101]  # Quality above 100 selects lossless WebP
+        if self.image_format == "jpeg":
+            return [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+        if self.png_compression is not None:
+            return [cv2.IMWRITE_PNG_COMPRESSION, self.png_compression]
+        return []
+    
+    def _encode_artifact(self, path: Path, image: Optional[np.ndarray], write_grid=None) -> Dict:
+        """Write one artifact (``image``, or the streamed grid via ``write_grid``) and time it."""
+        start_time = time.perf_counter()
+        if image is None:
+            write_grid(path)
+        elif not cv2.imwrite(str(path), image, self.encode_parameters()):
+            raise OSError(f"Could not write {path}")
+        return {
+            'file': path.name,
+            'bytes': path.stat().st_size,
+            'milliseconds': (time.perf_counter() - start_time) * 1000
+        }
+    
+    def save_analysis_results(self, results: Dict, timestamp: str):
+        """Save all analysis results to files.
         
-        # Save edge analysis
-        cv2.imwrite(str(self.output_dir / f"edge_difference_{timestamp}.png"), 
-                   results['features']['edge_diff'])
+        Images are already BGR, so they are encoded as they are, concurrently
+        on ``encode_workers`` threads. Encode times and sizes are added to the
+        stats under ``encoding``.
+        """
+        print("💾 Saving analysis results...")
         
-        # Save statistical analysis as JSON
-        stats_file = self.output_dir / f"analysis_stats_{timestamp}.json"
-        with open(stats_file, 'w') as f:
-            json.dump(results['stats'], f, indent=2)
+        suffix = IMAGE_FORMATS[self.image_format]
+        grid_writer = None
+        grid_name = f"comparison_grid_{timestamp}{suffix}"
+        if results['grid'] is None:
+            # The streamed grid always goes through the PNG strip writer
+            grid_name = f"comparison_grid_{timestamp}.png"
+            compress_level = 6 if self.png_compression is None else self.png_compression
+            
+            def stream_grid(path):
+                self.write_comparison_grid(path, *results['grid_sources'], compress_level=compress_level)
+            
+            grid_writer = stream_grid
+        
+        # Largest first, so the grid does not start last
+        artifacts = {
+            'grid': (grid_name, results['grid']),
+            'pixel_diff': (f"pixel_difference_{timestamp}{suffix}", results['pixel_diff']),
+            'heatmap': (f"heatmap_{timestamp}{suffix}", results['heatmap']),
+            'overlay': (f"overlay_{timestamp}{suffix}", results['overlay']),
+            'edge_diff': (f"edge_difference_{timestamp}{suffix}", results['features']['edge_diff']),
+            'layout': (f"layout_{timestamp}{suffix}", results['layout']),
+        }
+        if results.get('delta_e_map') is not None:
+            artifacts['delta_e'] = (f"delta_e_{timestamp}{suffix}", results['delta_e_map'])
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, self.encode_workers)) as pool:
+            futures = {name: pool.submit(self._encode_artifact, self.output_dir / filename, image, grid_writer)
+                       for name, (filename, image) in artifacts.items()}
+            encoding = {name: future.result() for name, future in futures.items()}
+        
+        for name, info in encoding.items():
+            print(f"  🖼️  {info['file']}: {info['bytes'] / 1024:.0f} KB in {info['milliseconds']:.1f} ms")
+        print(f"  ⏱️  Encoded {len(encoding)} images in {(time.perf_counter() - start_time) * 1000:.1f} ms "
+              f"on {max(1, self.encode_workers)} thread(s)")
+        results['stats']['encoding'] = encoding
         
         return {
-            'pixel_diff': f"pixel_difference_{timestamp}.png",
-            'heatmap': f"heatmap_{timestamp}.png",
-            'overlay': f"overlay_{timestamp}.png",
-            'grid': f"comparison_grid_{timestamp}.png",
-            'edge_diff': f"edge_difference_{timestamp}.png",
-            'stats': f"analysis_stats_{timestamp}.json"
+            **{name: info['file'] for name, info in encoding.items()},
+            'stats': self.save_stats(results['stats'], timestamp)
         }
     
+    def save_stats(self, stats: Dict, timestamp: str) -> str:
+        """Write the statistics JSON and return its file name."""
+        stats_file = f"analysis_stats_{timestamp}.json"
+        with open(self.output_dir / stats_file, 'w') as f:
+            json.dump(stats, f, indent=2)
+        return stats_file
+    
     def generate_html_report(self, results: Dict, saved_files: Dict, timestamp: str):
         """Generate comprehensive HTML report."""
         print("📝 Generating HTML report...")
@@ -481,6 +991,8 @@ class OpenCVChatAnalyzer:
             </div>
             <p><strong>Different Pixels:</strong> {stats['pixel']['different_pixels']:,} out of {stats['pixel']['total_pixels']:,} total pixels</p>
             {f"<p><strong>Structural Similarity (SSIM):</strong> {stats['ssim']['similarity_index']:.4f}</p>" if 'ssim' in stats else ""}
+            {f"<p><strong>Multi-Scale SSIM:</strong> {stats['ssim']['ms_ssim']:.4f}</p>" if 'ms_ssim' in stats.get('ssim', {}) else ""}
+            {self._registration_summary(stats.get('registration'))}
         </div>
         
         <div class="section">
@@ -521,6 +1033,7 @@ class OpenCVChatAnalyzer:
                 <p>Red/Yellow areas indicate significant visual differences between the chat widgets.</p>
             </div>
         </div>
+        {self._delta_e_section(stats['pixel'].get('delta_e'), saved_files.get('delta_e'))}
         
         <div class="section">
             <h2>📍 Region Analysis</h2>
@@ -538,6 +1051,7 @@ class OpenCVChatAnalyzer:
                         <th>Position (x, y)</th>
                         <th>Size (w × h)</th>
                         <th>Aspect Ratio</th>
+                        <th>Fragments</th>
                     </tr>
                 </thead>
                 <tbody>
@@ -553,6 +1067,7 @@ class OpenCVChatAnalyzer:
                         <td>({x}, {y})</td>
                         <td>{w} × {h}</td>
                         <td>{region['aspect_ratio']:.2f}</td>
+                        <td>{region.get('fragments', 1)}</td>
                     </tr>
 """
         
@@ -560,7 +1075,7 @@ class OpenCVChatAnalyzer:
                 </tbody>
             </table>
         </div>
-        
+        {self._layout_section(stats['layout'], saved_files['layout'])}
         <div class="section">
             <h2>🎯 Edge Detection Analysis</h2>
             <div class="image-container">
@@ -661,6 +1176,8 @@ class OpenCVChatAnalyzer:
                 <li><strong>Region Overlay:</strong> {saved_files['overlay']}</li>
                 <li><strong>Comparison Grid:</strong> {saved_files['grid']}</li>
                 <li><strong>Edge Analysis:</strong> {saved_files['edge_diff']}</li>
+                <li><strong>Layout Changes:</strong> {saved_files['layout']}</li>
+                {f"<li><strong>Delta-E Map:</strong> {saved_files['delta_e']}</li>" if 'delta_e' in saved_files else ""}
                 <li><strong>Statistical Data:</strong> {saved_files['stats']}</li>
             </ul>
         </div>
@@ -675,11 +1192,232 @@ class OpenCVChatAnalyzer:
         
         return report_file
     
+    @staticmethod
+    def _layout_section(layout: Dict, layout_file: str) -> str:
+        """Report section listing the UI components that moved, changed size or style, appeared or vanished."""
+        rows = "".join(f"""
+                    <tr>
+                        <td>{', '.join(change['changes'])}</td>
+                        <td>{tuple(change['before'])}</td>
+                        <td>{tuple(change['after'])}</td>
+                        <td>{change['dx']:+.0f}, {change['dy']:+.0f}</td>
+                        <td>{change['dw']:+d} × {change['dh']:+d}</td>
+                    </tr>""" for change in layout['changes'][:15])
+        rows += "".join(f"""
+                    <tr>
+                        <td>{kind}</td>
+                        <td>{tuple(component['box']) if kind == 'removed' else ''}</td>
+                        <td>{tuple(component['box']) if kind == 'added' else ''}</td>
+                        <td></td>
+                        <td></td>
+                    </tr>""" for kind in ('removed', 'added') for component in layout[f'{kind}_components'][:15])
+        return f"""
+        <div class="section">
+            <h2>🧩 Layout Changes</h2>
+            <div class="image-container">
+                <div class="image-title">Component Changes on the Backoffice Image</div>
+                <img src="{layout_file}" alt="Layout Changes">
+                <p>Yellow: moved, resized or restyled (gray: previous box); green: added; red: removed.</p>
+            </div>
+            <div class="stats-grid">
+                <div class="stat-card">
+                    <div class="stat-value">{layout['components']['image1']} / {layout['components']['image2']}</div>
+                    <div class="stat-label">Components</div>
+                </div>
+                <div class="stat-card">
+                    <div class="stat-value">{layout['moved']} / {layout['resized']} / {layout['restyled']}</div>
+                    <div class="stat-label">Moved / Resized / Restyled</div>
+                </div>
+                <div class="stat-card">
+                    <div class="stat-value">{layout['added']} / {layout['removed']}</div>
+                    <div class="stat-label">Added / Removed</div>
+                </div>
+            </div>
+            <table class="regions-table">
+                <thead>
+                    <tr>
+                        <th>Change</th>
+                        <th>Storefront box (x, y, w, h)</th>
+                        <th>Backoffice box (x, y, w, h)</th>
+                        <th>Shift (dx, dy)</th>
+                        <th>Size change</th>
+                    </tr>
+                </thead>
+                <tbody>{rows}
+                </tbody>
+            </table>
+        </div>
+"""
+    
+    @staticmethod
+    def _delta_e_section(delta_e: Optional[Dict], delta_e_file: Optional[str]) -> str:
+        """Report section with the perceptual color difference, when it was computed."""
+        if not delta_e:
+            return ""
+        method = "CIEDE2000" if delta_e['method'] == "ciede2000" else "CIE76"
+        return f"""
+        <div class="section">
+            <h2>🌈 Perceptual Color Difference ({method})</h2>
+            <div class="image-container">
+                <div class="image-title">Delta-E Map</div>
+                <img src="{delta_e_file}" alt="Delta-E Map">
+                <p>Brightness shows delta-E up to {DELTA_E_MAP_RANGE} just-noticeable differences
+                   (1 JND = {delta_e['jnd']} delta-E); pixels over {delta_e['threshold_jnd']:g} JND count as different.</p>
+            </div>
+            <div class="stats-grid">
+                <div class="stat-card">
+                    <div class="stat-value">{delta_e['mean']:.2f}</div>
+                    <div class="stat-label">Mean Delta-E</div>
+                </div>
+                <div class="stat-card">
+                    <div class="stat-value">{delta_e['p95']:.2f}</div>
+                    <div class="stat-label">95th Percentile</div>
+                </div>
+                <div class="stat-card">
+                    <div class="stat-value">{delta_e['max']:.1f}</div>
+                    <div class="stat-label">Max Delta-E</div>
+                </div>
+                <div class="stat-card">
+                    <div class="stat-value">{delta_e['noticeable_pixels']:,}</div>
+                    <div class="stat-label">Noticeable Pixels (&gt; 1 JND)</div>
+                </div>
+            </div>
+        </div>
+"""
+    
+    @staticmethod
+    def _registration_summary(registration: Optional[Dict]) -> str:
+        """One report line describing the alignment applied before diffing."""
+        if not registration:
+            return ""
+        if not registration['applied']:
+            return f"<p><strong>Registration ({registration['method']}):</strong> no shift detected</p>"
+        return (f"<p><strong>Registration ({registration['method']}):</strong> "
+                f"backoffice shifted by dx={registration['dx']:+.1f}, dy={registration['dy']:+.1f} px, "
+                f"scale {registration['scale']:.3f}, {registration['coverage'] * 100:.1f}% overlap</p>")
+    
+    def _unchanged_result(self, storefront_image: str, backoffice_image: str, pixel_stats: Dict,
+                          prefilter: Dict, registration: Optional[Dict], timestamp: str) -> Dict:
+        """Lightweight result for a pair the prefilter found unchanged: stats JSON and a short report.
+        
+        The report is only written when ``artifacts`` is 'all'.
+        """
+        print("⏩ Images are effectively identical, skipping the full analysis")
+        
+        stats = {
+            'pixel': pixel_stats,
+            'ssim': {'similarity_index': None, 'available': False},
+            'regions': [],
+            'layout': None,
+            'prefilter': prefilter,
+            'registration': registration,
+            'unchanged': True,
+            'artifacts': False,
+            'analysis_timestamp': timestamp
+        }
+        stats_file = self.save_stats(stats, timestamp)
+        if self.artifacts != "all":
+            return {'stats': stats, 'files': {'stats': stats_file}}
+        
+        distances = ", ".join(f"{name} {distance}" for name, distance in prefilter['hash_distances'].items())
+        report_file = f"opencv_analysis_report_{timestamp}.html"
+        with open(self.output_dir / report_file, 'w', encoding='utf-8') as f:
+            f.write(f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>OpenCV Chat Widget Analysis - Unchanged</title>
+    <style>body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; margin: 20px; }}</style>
+</head>
+<body>
+    <h1>⏩ No Visual Change</h1>
+    <p><strong>{Path(storefront_image).name}</strong> and <strong>{Path(backoffice_image).name}</strong>
+       are within the prefilter tolerance, so the full analysis was skipped.</p>
+    <ul>
+        <li>Visual similarity: {pixel_stats['similarity_percentage']:.3f}%
+            ({pixel_stats['different_pixels']:,} of {pixel_stats['total_pixels']:,} pixels over threshold)</li>
+        <li>Perceptual hash distances (bits): {distances}</li>
+    </ul>
+    {self._registration_summary(registration)}
+    <p>Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+</body>
+</html>
+""")
+        
+        print(f"📄 Report: {self.output_dir / report_file}")
+        return {'stats': stats, 'files': {'stats': stats_file, 'report': report_file}}
+    
+    def cache_parameters(self) -> Dict:
+        """Settings that change the analysis output, part of the cache key."""
+        return {
+            'resize': [self.resize_width, self.resize_height],
+            'registration': self.registration,
+            'difference_threshold': self.difference_threshold,
+            'color_difference': self.color_difference,
+            'jnd_threshold': self.jnd_threshold,
+            'delta_e_floor': self.delta_e_floor,
+            'contour_min_area': self.contour_min_area,
+            'region_merge_gap': self.region_merge_gap,
+            'layout_max_shift': self.layout_max_shift,
+            'prefilter': self.prefilter,
+            'hash_tolerance': self.hash_tolerance,
+            'unchanged_tolerance': self.unchanged_tolerance,
+            'artifacts': self.artifacts,
+            'artifact_threshold': self.artifact_threshold,
+            'metrics': sorted(self.metrics),
+            'image_format': self.image_format,
+            'png_compression': self.png_compression,
+            'jpeg_quality': self.jpeg_quality,
+        }
+    
+    def wants_artifacts(self, pixel_stats: Dict) -> bool:
+        """Whether a changed pair with these pixel statistics gets images and an HTML report."""
+        if self.artifacts == "changed":
+            return 100 - pixel_stats['similarity_percentage'] > self.artifact_threshold
+        return self.artifacts == "all"
+    
     def analyze_chat_widgets(self, storefront_image: str, backoffice_image: str) -> Dict:
-        """Main analysis function - comprehensive OpenCV-based comparison."""
+        """Main analysis function - comprehensive OpenCV-based comparison.
+        
+        Results are memoized by input content and analyzer parameters; a cache
+        hit returns the stored stats with ``files`` relative to ``output_dir``.
+        """
         print("🚀 Starting OpenCV Chat Widget Analysis")
         print("=" * 50)
         
+        if not self.use_cache:
+            return self._run_analysis(storefront_image, backoffice_image)
+        
+        for image_path in (storefront_image, backoffice_image):
+            if not Path(image_path).exists():
+                raise FileNotFoundError(f"Image not found: {image_path}")
+        
+        cache = AnalysisCache(self.cache_dir, self.cache_max_bytes)
+        key = cache.make_key([storefront_image, backoffice_image], self.cache_parameters())
+        entry = cache.get(key)
+        if entry is None:
+            results = self._run_analysis(storefront_image, backoffice_image)
+            entry = cache.put(key, self.output_dir, results['files'], results['stats'], {
+                'inputs': {'storefront': str(storefront_image), 'backoffice': str(backoffice_image)},
+                'parameters': self.cache_parameters(),
+            })
+            results['cached'] = False
+        else:
+            print(f"♻️  Cache hit ({key[:12]}): reusing the analysis from "
+                  f"{entry['stats']['analysis_timestamp']}")
+            results = {'stats': entry['stats'], 'cached': True}
+        
+        results['cache_key'] = key
+        results['files'] = {
+            name: os.path.relpath(entry['entry_dir'] / filename, self.output_dir)
+            for name, filename in entry['files'].items()
+        }
+        if results['cached'] and 'report' in results['files']:
+            print(f"📄 Report: {self.output_dir / results['files']['report']}")
+        return results
+    
+    def _run_analysis(self, storefront_image: str, backoffice_image: str) -> Dict:
+        """Run every analysis stage and write the artifacts to ``output_dir``."""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
         # Load and preprocess images
@@ -688,43 +1426,85 @@ class OpenCVChatAnalyzer:
         
         print(f"📏 Image dimensions: {img1.shape}")
         
+        # Absorb layout shifts before any pixel comparison
+        registration = None
+        if self.registration:
+            img2, img2_gray, registration = self.register_images(img1, img1_gray, img2, img2_gray)
+        
         # Pixel-level difference analysis
         pixel_diff, thresh, pixel_stats = self.calculate_pixel_difference(img1, img2)
-        
-        # Structural similarity analysis (if available)
-        ssim_score = 0.0
-        ssim_map = np.zeros_like(img1_gray)
-        if ssim is not None:
+        delta_e = None
+        if self.color_difference != "rgb":
+            delta_e = self.calculate_color_difference(img1, img2, thresh, pixel_stats)
+        
+        # Effectively identical pairs skip SSIM, features, visualizations and image writes
+        prefilter = self.prefilter_pair(img1_gray, img2_gray, pixel_stats) if self.prefilter else None
+        if prefilter and prefilter['unchanged']:
+            return self._unchanged_result(storefront_image, backoffice_image, pixel_stats, prefilter,
+                                          registration, timestamp)
+        
+        # The full report needs every metric; stats-only pairs compute just the requested ones
+        artifacts = self.wants_artifacts(pixel_stats)
+        metrics = set(METRICS) if artifacts else set(self.metrics)
+        
+        # Structural similarity analysis
+        ssim_stats = {'similarity_index': None, 'available': False}
+        if 'ssim' in metrics:
             ssim_score, ssim_map = self.calculate_structural_similarity(img1_gray, img2_gray)
+            ssim_stats = {'similarity_index': ssim_score, 'available': True}
+        if 'ms_ssim' in metrics:
+            ms_ssim_score, ms_ssim_scales = ms_ssim(img1_gray, img2_gray, workers=self.ssim_workers)
+            ssim_stats.update({'ms_ssim': ms_ssim_score, 'ms_ssim_scales': ms_ssim_scales})
         
         # Feature detection and analysis
-        features = self.detect_feature_differences(img1_gray, img2_gray)
+        features = self.detect_feature_differences(img1_gray, img2_gray) if 'features' in metrics else None
         
         # Find difference regions
-        diff_regions = self.find_difference_regions(thresh)
+        diff_regions = self.find_difference_regions(thresh) if 'regions' in metrics else None
+        
+        # Component-level layout changes
+        layout = self.compare_layout(img1, img2) if 'layout' in metrics else None
+        
+        stats = {
+            'pixel': pixel_stats,
+            'ssim': ssim_stats,
+            'features': features['stats'] if features else None,
+            'regions': diff_regions,
+            'layout': layout,
+            'prefilter': prefilter,
+            'registration': registration,
+            'unchanged': False,
+            'artifacts': artifacts,
+            'analysis_timestamp': timestamp
+        }
+        if not artifacts:
+            print(f"⏭️  Skipping visual artifacts ({self.artifacts}), computed: {', '.join(sorted(metrics)) or 'pixel only'}")
+            stats_file = self.save_stats(stats, timestamp)
+            print(f"📊 Stats: {self.output_dir / stats_file}")
+            return {'stats': stats, 'files': {'stats': stats_file}}
         
         # Create visualizations
         heatmap = self.create_heatmap_visualization(pixel_diff)
         overlay = self.create_overlay_visualization(img1, img2, diff_regions)
-        comparison_grid = self.generate_comparison_grid(img1, img2, pixel_diff, heatmap, overlay)
+        delta_e_visualization = self.create_delta_e_visualization(delta_e) if delta_e is not None else None
+        layout_visualization = self.create_layout_visualization(img2, layout)
+        if self.tiled_grid:
+            # The grid is streamed to disk in save_analysis_results
+            comparison_grid = None
+        else:
+            comparison_grid = self.generate_comparison_grid(img1, img2, pixel_diff, heatmap, overlay)
         
         # Compile comprehensive results
         results = {
             'pixel_diff': pixel_diff,
             'heatmap': heatmap,
             'overlay': overlay,
+            'delta_e_map': delta_e_visualization,
+            'layout': layout_visualization,
             'grid': comparison_grid,
+            'grid_sources': (img1, img2, pixel_diff, heatmap, overlay),
             'features': features,
-            'stats': {
-                'pixel': pixel_stats,
-                'ssim': {
-                    'similarity_index': ssim_score,
-                    'available': ssim is not None
-                },
-                'features': features['stats'],
-                'regions': diff_regions,
-                'analysis_timestamp': timestamp
-            }
+            'stats': stats
         }
         
         # Save all results
@@ -732,6 +1512,7 @@ class OpenCVChatAnalyzer:
         
         # Generate comprehensive report
         report_file = self.generate_html_report(results, saved_files, timestamp)
+        results['files'] = {**saved_files, 'report': report_file.name}
         
         print("✅ Analysis completed successfully!")
         print(f"📁 Results saved to: {self.output_dir}")
@@ -740,11 +1521,458 @@ class OpenCVChatAnalyzer:
         return results
 
 
+def find_comparable_pairs(directories, max_gap_seconds=3600):
+    """Pair storefront and backoffice captures of the same state in each directory.
+    
+    Captures are matched greedily by closest timestamp (each capture is used
+    once), and only when they were taken within ``max_gap_seconds``.
+    """
+    pairs = []
+    for directory in sorted(map(Path, directories)):
+        captures = {}
+        for path in sorted(directory.glob("*.png")):
+            fields = parse_artifact_name(path)
+            if fields['timestamp'] is None or fields['app'] not in ('storefront', 'backoffice'):
+                continue  # Thumbnails, variance masks and composed images
+            taken = datetime.strptime(fields['timestamp'], "%Y%m%d_%H%M%S")
+            captures.setdefault(fields['state'], {}).setdefault(fields['app'], []).append((taken, path, fields))
+        
+        for state, apps in sorted(captures.items()):
+            candidates = sorted(
+                (abs((sf[0] - bo[0]).total_seconds()), sf, bo)
+                for sf in apps.get('storefront', []) for bo in apps.get('backoffice', [])
+            )
+            used = set()
+            for gap, (_, storefront, fields), (_, backoffice, _) in candidates:
+                if gap > max_gap_seconds or storefront in used or backoffice in used:
+                    continue
+                used.update((storefront, backoffice))
+                pairs.append({
+                    'key': f"{directory.name}/{state}_{fields['timestamp']}",
+                    'directory': str(directory),
+                    'version': fields['version'],
+                    'state': state,
+                    'storefront': str(storefront),
+                    'backoffice': str(backoffice),
+                })
+    return sorted(pairs, key=lambda p: p['key'])
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def _analyze_pair(job):
+    """Process-pool worker: analyze one pair, never raising."""
+    cv2.setNumThreads(1)  # Parallelism comes from the pool, not from OpenCV threads
+    start_time = time.perf_counter()
+    summary = {k: job[k] for k in ('key', 'directory', 'version', 'state', 'storefront', 'backoffice')}
+    log = io.StringIO()
+    
+    try:
+        output_dir = Path(job['output_dir'])
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with redirect_stdout(log):
+            analyzer = OpenCVChatAnalyzer(output_dir)
+            analyzer.tiled_grid = job['tiled_grid']
+            analyzer.prefilter = job['prefilter']
+            analyzer.registration = job['registration']
+            analyzer.region_merge_gap = job['merge_gap']
+            analyzer.layout_max_shift = job['layout_max_shift']
+            analyzer.color_difference = job['color_difference']
+            analyzer.jnd_threshold = job['jnd_threshold']
+            analyzer.delta_e_floor = job['delta_e_floor']
+            analyzer.artifacts = job['artifacts']
+            analyzer.artifact_threshold = job['artifact_threshold']
+            analyzer.metrics = job['metrics']
+            analyzer.image_format = job['image_format']
+            analyzer.png_compression = job['png_compression']
+            analyzer.jpeg_quality = job['jpeg_quality']
+            analyzer.encode_workers = 1
+            analyzer.use_cache = job['cache_dir'] is not None
+            if analyzer.use_cache:
+                analyzer.cache_dir = Path(job['cache_dir'])
+                analyzer.cache_max_bytes = job['cache_max_bytes']
+            results = analyzer.analyze_chat_widgets(job['storefront'], job['backoffice'])
+        
+        stats = results['stats']
+        summary.update({
+            'status': 'ok',
+            'similarity_percentage': stats['pixel']['similarity_percentage'],
+            'ssim': stats['ssim']['similarity_index'] if stats['ssim']['available'] else None,
+            'regions': len(stats['regions']) if stats['regions'] is not None else None,
+            'largest_region': stats['regions'][0]['area'] if stats['regions'] else 0,
+            'unchanged': stats['unchanged'],
+            'layout_changes': (len(stats['layout']['changes']) + stats['layout']['added'] + stats['layout']['removed']
+                               if stats.get('layout') else None),
+            'cache_hit': results.get('cached', False),
+            'report': os.path.normpath(Path(job['key']) / results['files'].get('report', results['files']['stats'])),
+            'grid': os.path.normpath(Path(job['key']) / results['files']['grid']) if 'grid' in results['files'] else None,
+        })
+    except Exception as e:
+        summary.update({'status': 'error', 'error': f"{type(e).__name__}: {e}",
+                        'log': log.getvalue().splitlines()[-5:]})
+    
+    summary['seconds'] = time.perf_counter() - start_time
+    summary['peak_rss_mb'] = peak_rss_mb()
+    return summary
+
+
+def run_batch_analysis(directories, output_dir="opencv_analysis", workers=None, tiled_grid=False, force=False,
+                       prefilter=True, cache_dir=None, cache_max_bytes=DEFAULT_MAX_BYTES, registration=None,
+                       merge_gap=8, artifacts="all", artifact_threshold=1.0, metrics=METRICS,
+                       image_format="png", png_compression=None, jpeg_quality=90, color_difference="rgb",
+                       jnd_threshold=1.0, delta_e_floor=0, layout_max_shift=64):
+    """Analyze every comparable pair under ``directories`` across a process pool.
+    
+    Pairs whose inputs are unchanged since the last batch are reused unless
+    ``force`` is set. All workers share the content-keyed result cache in
+    ``cache_dir`` (None disables it), so identical pairs in overlapping
+    directories are analyzed once. Pairs that get no visual artifacts (see
+    ``artifacts``) link their stats JSON from the index instead of a report.
+    Writes ``batch/batch_index_<timestamp>.{json,html}``.
+    """
+    batch_dir = Path(output_dir) / "batch"
+    batch_dir.mkdir(parents=True, exist_ok=True)
+    pairs = find_comparable_pairs(directories)
+    workers = workers or os.cpu_count() or 1
+    print(f"🗂️  {len(pairs)} comparable pairs in {len(directories)} directories, {workers} workers")
+    
+    start_time = time.perf_counter()
+    summaries, jobs = [], []
+    for pair in pairs:
+        pair_dir = batch_dir / pair['key']
+        inputs = {p: os.stat(pair[p]).st_mtime for p in ('storefront', 'backoffice')}
+        try:
+            with open(pair_dir / "pair_summary.json", encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            cached = None
+        if not force and cached and cached.get('status') == 'ok' and cached.get('inputs') == inputs:
+            summaries.append({**cached, 'cached': True})
+        else:
+            jobs.append({**pair, 'output_dir': str(pair_dir), 'tiled_grid': tiled_grid, 'prefilter': prefilter,
+                         'registration': registration, 'merge_gap': merge_gap,
+                         'artifacts': artifacts, 'artifact_threshold': artifact_threshold, 'metrics': metrics,
+                         'image_format': image_format, 'png_compression': png_compression,
+                         'jpeg_quality': jpeg_quality, 'color_difference': color_difference,
+                         'jnd_threshold': jnd_threshold, 'delta_e_floor': delta_e_floor,
+                         'layout_max_shift': layout_max_shift,
+                         'cache_dir': str(cache_dir) if cache_dir else None, 'cache_max_bytes': cache_max_bytes,
+                         'inputs': inputs})
+    if summaries:
+        print(f"♻️  Reusing {len(summaries)} unchanged pairs (use --force to redo them)")
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_analyze_pair, job): job for job in jobs}
+        for done, future in enumerate(as_completed(futures), 1):
+            job = futures[future]
+            summary = {**future.result(), 'inputs': job['inputs'], 'cached': False}
+            if summary['status'] == 'ok':
+                with open(Path(job['output_dir']) / "pair_summary.json", 'w', encoding='utf-8') as f:
+                    json.dump(summary, f, indent=2)
+                print(f"  ✅ [{done}/{len(jobs)}] {summary['key']}: "
+                      f"{summary['similarity_percentage']:.2f}% in {summary['seconds']:.1f}s"
+                      f"{' (cache hit)' if summary['cache_hit'] else ''}")
+            else:
+                print(f"  ❌ [{done}/{len(jobs)}] {summary['key']}: {summary['error']}")
+            summaries.append(summary)
+    
+    summaries.sort(key=lambda s: s['key'])
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    index = {
+        'timestamp': timestamp,
+        'directories': [str(d) for d in directories],
+        'workers': workers,
+        'wall_seconds': time.perf_counter() - start_time,
+        'cpu_seconds': sum(s['seconds'] for s in summaries if not s['cached']),
+        'analyzed': sum(s['status'] == 'ok' and not s['cached'] for s in summaries),
+        'reused': sum(s['cached'] for s in summaries),
+        'failed': sum(s['status'] != 'ok' for s in summaries),
+        'unchanged': sum(bool(s.get('unchanged')) for s in summaries),
+        'cache_hits': sum(bool(s.get('cache_hit')) and not s['cached'] for s in summaries),
+        'peak_rss_mb': max((s['peak_rss_mb'] for s in summaries if not s['cached'] and s.get('peak_rss_mb')),
+                           default=None),
+        'pairs': summaries,
+    }
+    with open(batch_dir / f"batch_index_{timestamp}.json", 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+    index['report'] = write_batch_index(batch_dir / f"batch_index_{timestamp}.html", index)
+    
+    print(f"\n✅ Batch finished in {index['wall_seconds']:.1f}s: {index['analyzed']} analyzed "
+          f"({index['unchanged']} unchanged, {index['cache_hits']} from cache), {index['reused']} reused, "
+          f"{index['failed']} failed")
+    if index['peak_rss_mb']:
+        print(f"🧠 Peak worker RSS: {index['peak_rss_mb']:.0f} MB")
+    print(f"📄 Batch index: {index['report']}")
+    return index
+
+
+def write_batch_index(path, index):
+    """Write the combined HTML summary of a batch run."""
+    rows = ""
+    for summary in index['pairs']:
+        if summary['status'] == 'ok':
+            similarity = summary['similarity_percentage']
+            status = "success" if similarity >= 95 else "warning" if similarity >= 80 else "error"
+            rows += f"""
+                <tr>
+                    <td>{summary['version']}</td>
+                    <td>{summary['state']}</td>
+                    <td><a href="{summary['report']}">{summary['key']}</a>{' ♻️' if summary['cached'] or summary.get('cache_hit') else ''}</td>
+                    <td><span class="status {status}">{similarity:.2f}%</span></td>
+                    <td>{'n/a' if summary['ssim'] is None else f"{summary['ssim']:.3f}"}</td>
+                    <td>{'n/a' if summary['regions'] is None else summary['regions']}</td>
+                    <td>{summary['largest_region']}</td>
+                    <td>{summary['seconds']:.1f}s</td>
+                    <td>{f'<a href="{summary["grid"]}"><img src="{summary["grid"]}" alt="grid"></a>' if summary['grid'] else '⏩ unchanged' if summary['unchanged'] else '📊 stats only'}</td>
+                </tr>
+"""
+        else:
+            rows += f"""
+                <tr class="failed">
+                    <td>{summary['version']}</td>
+                    <td>{summary['state']}</td>
+                    <td>{summary['key']}</td>
+                    <td colspan="6">{summary['error']}</td>
+                </tr>
+"""
+    
+    html_content = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>OpenCV Batch Analysis - {index['timestamp']}</title>
+    <style>
+        body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; margin: 20px; }}
+        table {{ border-collapse: collapse; width: 100%; }}
+        th, td {{ padding: 8px 12px; border-bottom: 1px solid #ddd; text-align: left; }}
+        th {{ background-color: #f8f9fa; }}
+        td img {{ max-width: 240px; }}
+        tr.failed {{ background-color: #fdecea; }}
+        .status.success {{ color: #28a745; }}
+        .status.warning {{ color: #ffc107; }}
+        .status.error {{ color: #dc3545; }}
+    </style>
+</head>
+<body>
+    <h1>🔬 OpenCV Batch Analysis</h1>
+    <p>Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} &middot;
+       {index['analyzed']} analyzed, {index['reused']} reused, {index['failed']} failed &middot;
+       {index['wall_seconds']:.1f}s wall clock for {index['cpu_seconds']:.1f}s of analysis on {index['workers']} workers</p>
+    <table>
+        <thead>
+            <tr><th>Version</th><th>State</th><th>Pair</th><th>Similarity</th><th>SSIM</th><th>Regions</th>
+                <th>Largest</th><th>Time</th><th>Grid</th></tr>
+        </thead>
+        <tbody>{rows}
+        </tbody>
+    </table>
+</body>
+</html>
+"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html_content)
+    return path
+
+
 def main():
     """Main execution function."""
+    parser = argparse.ArgumentParser(description="OpenCV visual difference analysis of chat widgets")
+    parser.add_argument(
+        "--output-dir",
+        default="opencv_analysis",
+        help="Directory for analysis artifacts (default: opencv_analysis)"
+    )
+    parser.add_argument(
+        "--tiled-grid",
+        action="store_true",
+        help="Stream the comparison grid to disk strip by strip instead of building it in memory"
+    )
+    parser.add_argument(
+        "--native-tiles",
+        action="store_true",
+        help="Also compute pixel statistics and difference regions at native resolution, streaming "
+             "the images strip by strip (for HiDPI and stitched --full-page captures)"
+    )
+    parser.add_argument(
+        "--batch",
+        nargs="*",
+        metavar="DIR",
+        help="Analyze every storefront/backoffice pair in these directories "
+             "(default: all screenshots* directories) in parallel"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes for --batch (default: one per CPU core)"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-analyze pairs in --batch even when their inputs are unchanged"
+    )
+    parser.add_argument(
+        "--no-prefilter",
+        action="store_true",
+        help="Always run the full pipeline, even for pairs the perceptual-hash prefilter finds unchanged"
+    )
+    parser.add_argument(
+        "--merge-gap",
+        type=int,
+        default=8,
+        help="Merge difference regions whose boxes are within this many pixels (default: 8, -1 to keep "
+             "every connected component separate)"
+    )
+    parser.add_argument(
+        "--layout-max-shift",
+        type=int,
+        default=64,
+        help="Largest move (pixels) for which a UI component is matched to its counterpart rather than "
+             "reported as removed and added (default: 64)"
+    )
+    parser.add_argument(
+        "--color-difference",
+        choices=COLOR_DIFFERENCES,
+        default="rgb",
+        help="How differing pixels are found: grayscale absdiff threshold (rgb, default) or perceptual "
+             "delta-E in Lab (cie76, ciede2000), which also writes a delta-E map. At 1920x941 delta-E costs "
+             "about 5x / 8x the rgb threshold (cie76 / ciede2000) when few pixels changed and 25x / 60x when "
+             "most did, roughly 50 / 110 ms against 2 ms"
+    )
+    parser.add_argument(
+        "--jnd-threshold",
+        type=float,
+        default=1.0,
+        metavar="JND",
+        help="Delta-E above which a pixel counts as different, in just-noticeable differences "
+             "(1 JND = 2.3 CIE76 or 1.0 CIEDE2000; default: 1.0)"
+    )
+    parser.add_argument(
+        "--delta-e-floor",
+        type=int,
+        default=0,
+        metavar="LEVELS",
+        help="Delta-E fast path: pixels whose channels all differ by at most LEVELS are counted as unchanged "
+             "without converting them to Lab. Approximate: a floor of 1 can hide up to "
+             f"{FLOOR_MAX_DELTA_E[1]['ciede2000']:.1f} CIEDE2000 in dark colors (default: 0, exact)"
+    )
+    parser.add_argument(
+        "--stats-only",
+        action="store_true",
+        help="Write only the stats JSON, computing just the --metrics (same as --artifacts none)"
+    )
+    parser.add_argument(
+        "--artifacts",
+        choices=ARTIFACT_MODES,
+        default="all",
+        help="Write images and the HTML report for every pair (all, default), only for pairs with more "
+             "than --artifact-threshold percent differing pixels (changed), or never (none)"
+    )
+    parser.add_argument(
+        "--artifact-threshold",
+        type=float,
+        default=1.0,
+        metavar="PCT",
+        help="Differing-pixel percentage above which --artifacts changed renders a pair (default: 1.0)"
+    )
+    parser.add_argument(
+        "--metrics",
+        nargs="+",
+        choices=METRICS,
+        default=list(METRICS),
+        help="Metrics computed for pairs without artifacts (default: all); pixel statistics are always "
+             "included, and pairs with artifacts always compute every metric for the report"
+    )
+    parser.add_argument(
+        "--image-format",
+        choices=list(IMAGE_FORMATS),
+        default="png",
+        help="Artifact image format: png (default), lossless webp, or jpeg for small previews"
+    )
+    parser.add_argument(
+        "--png-compression",
+        type=int,
+        choices=range(10),
+        metavar="0-9",
+        help="PNG zlib level for artifacts (default: OpenCV's fast setting)"
+    )
+    parser.add_argument(
+        "--jpeg-quality",
+        type=int,
+        default=90,
+        help="JPEG quality for --image-format jpeg (default: 90)"
+    )
+    parser.add_argument(
+        "--encode-workers",
+        type=int,
+        default=min(4, os.cpu_count() or 1),
+        help="Threads encoding the artifact images of a single analysis (default: up to 4; batch "
+             "workers encode on one thread)"
+    )
+    parser.add_argument(
+        "--register",
+        nargs="?",
+        const="translation",
+        choices=["translation", "homography"],
+        help="Align the backoffice image onto the storefront image before diffing: phase-correlation "
+             "translation (default) or an ORB feature homography that also absorbs scale"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Recompute even when the same inputs were analyzed with the same parameters before"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Analysis result cache directory (default: <output-dir>/cache)"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=float,
+        default=DEFAULT_MAX_BYTES / 1024 / 1024,
+        help="Cache size limit in MB; least recently used entries are evicted beyond it (default: 512)"
+    )
+    parser.add_argument(
+        "--store",
+        help="Also add the artifacts to a content-addressed store directory (see screenshot_store.py)"
+    )
+    parser.add_argument(
+        "--store-move",
+        action="store_true",
+        help="Delete the artifacts from --output-dir once they are in the --store "
+             "(the analysis cache keeps its copy)"
+    )
+    args = parser.parse_args()
+    
     print("🔬 OpenCV Chat Widget Visual Analysis Tool")
     print("=" * 45)
     
+    cache_dir = Path(args.cache_dir) if args.cache_dir else Path(args.output_dir) / "cache"
+    cache_max_bytes = int(args.cache_size * 1024 * 1024)
+    artifacts = "none" if args.stats_only else args.artifacts
+    
+    if args.batch is not None:
+        directories = args.batch or sorted(p for p in Path(".").glob("screenshots*") if p.is_dir())
+        if not directories:
+            print("❌ No screenshots directories found.")
+            return 1
+        index = run_batch_analysis(directories, args.output_dir, args.workers, args.tiled_grid, args.force,
+                                   prefilter=not args.no_prefilter,
+                                   cache_dir=None if args.no_cache else cache_dir,
+                                   cache_max_bytes=cache_max_bytes, registration=args.register,
+                                   merge_gap=args.merge_gap,
+                                   artifacts=artifacts, artifact_threshold=args.artifact_threshold,
+                                   metrics=tuple(args.metrics), image_format=args.image_format,
+                                   png_compression=args.png_compression, jpeg_quality=args.jpeg_quality,
+                                   color_difference=args.color_difference, jnd_threshold=args.jnd_threshold,
+                                   delta_e_floor=args.delta_e_floor, layout_max_shift=args.layout_max_shift)
+        return 1 if index['failed'] else 0
+    
     # Check for required images
     screenshots_dir = Path("screenshots_v2.1.0")
     if not screenshots_dir.exists():
@@ -785,17 +2013,64 @@ def main():
     print()
     
     # Create analyzer and run analysis
-    analyzer = OpenCVChatAnalyzer()
+    analyzer = OpenCVChatAnalyzer(args.output_dir)
+    analyzer.tiled_grid = args.tiled_grid
+    analyzer.prefilter = not args.no_prefilter
+    analyzer.registration = args.register
+    analyzer.region_merge_gap = args.merge_gap
+    analyzer.layout_max_shift = args.layout_max_shift
+    analyzer.color_difference = args.color_difference
+    analyzer.jnd_threshold = args.jnd_threshold
+    analyzer.delta_e_floor = args.delta_e_floor
+    analyzer.artifacts = artifacts
+    analyzer.artifact_threshold = args.artifact_threshold
+    analyzer.metrics = tuple(args.metrics)
+    analyzer.image_format = args.image_format
+    analyzer.png_compression = args.png_compression
+    analyzer.jpeg_quality = args.jpeg_quality
+    analyzer.encode_workers = args.encode_workers
+    analyzer.use_cache = not args.no_cache
+    analyzer.cache_dir = cache_dir
+    analyzer.cache_max_bytes = cache_max_bytes
     
     try:
         results = analyzer.analyze_chat_widgets(str(storefront_img), str(backoffice_img))
         
+        if args.native_tiles:
+            native_stats = analyzer.calculate_pixel_difference_tiled(str(storefront_img), str(backoffice_img))
+            native_file = analyzer.output_dir / f"native_stats_{results['stats']['analysis_timestamp']}.json"
+            with open(native_file, 'w', encoding='utf-8') as f:
+                json.dump(native_stats, f, indent=2)
+            results['files']['native_stats'] = native_file.name
+            print(f"🧩 Native resolution: {native_stats['similarity_percentage']:.2f}% similar, "
+                  f"{len(native_stats['regions'])} regions in "
+                  f"{len(native_stats['difference_bands'])} differing bands")
+        
+        if args.store:
+            from screenshot_store import ScreenshotStore
+            store = ScreenshotStore(args.store)
+            # With the cache on, results list the files inside the cache entry. Ingest the copies
+            # written to the output directory instead, so --store-move never empties a cache entry;
+            # a cache hit writes no copies, and its cache files are ingested but kept
+            copies, cache_only = [], []
+            for name in results['files'].values():
+                copy = analyzer.output_dir / Path(name).name
+                if copy.is_file():
+                    copies.append(copy)
+                else:
+                    cache_only.append(analyzer.output_dir / name)
+            if copies:
+                store.ingest(copies, remove_originals=args.store_move)
+            if cache_only:
+                store.ingest(cache_only)
+        
         # Print summary
         stats = results['stats']
         print("\n📊 Analysis Summary:")
         print(f"  Similarity: {stats['pixel']['similarity_percentage']:.2f}%")
-        print(f"  Different regions: {len(stats['regions'])}")
-        print(f"  Largest difference: {stats['regions'][0]['area'] if stats['regions'] else 0} pixels")
+        if stats['regions'] is not None:
+            print(f"  Different regions: {len(stats['regions'])}")
+            print(f"  Largest difference: {stats['regions'][0]['area'] if stats['regions'] else 0} pixels")
         
         return 0
         
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Streaming PNG Strips
+====================
+
+Reads and writes 8-bit PNG images a horizontal strip at a time so that
+composition and analysis of large (full-page or HiDPI) screenshots never hold
+a whole image in memory. Peak memory is bounded by one strip per open image.
+
+Requirements:
+- numpy
+- pillow (PIL), used to unfilter strips at C speed
+
+Usage:
+    from png_stream import PNGStripReader, PNGStripWriter, compose_strips
+    
+    with PNGStripReader("storefront_initial.png") as reader:
+        for y, strip in reader.iter_strips(64):
+            ...
+"""
+
+import struct
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+COLOR_TYPES = {0: ("L", 1), 2: ("RGB", 3), 3: ("P", 1), 4: ("LA", 2), 6: ("RGBA", 4)}
+DEFAULT_STRIP_HEIGHT = 64
+
+
+class PNGStripReader:
+    """Sequential strip-by-strip decoder for non-interlaced 8-bit PNGs."""
+    
+    def __init__(self, path):
+        if Image is None:
+            raise ImportError("pillow is required for streaming PNG decoding")
+        
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        if self._file.read(8) != PNG_SIGNATURE:
+            self._file.close()
+            raise ValueError(f"Not a PNG file: {self.path}")
+        
+        self.palette = None
+        self._first_idat = None
+        while self._first_idat is None:
+            chunk_type, data = self._read_chunk()
+            if chunk_type == b"IHDR":
+                self.width, self.height, bit_depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", data)
+                if bit_depth != 8 or interlace or color_type not in COLOR_TYPES:
+                    self._file.close()
+                    raise ValueError(f"Unsupported PNG layout for streaming: {self.path}")
+                self.mode, self.channels = COLOR_TYPES[color_type]
+            elif chunk_type == b"PLTE":
+                self.palette = data
+            elif chunk_type == b"IDAT":
+                self._first_idat = data
+            elif chunk_type == b"IEND":
+                self._file.close()
+                raise ValueError(f"PNG has no image data: {self.path}")
+        
+        self.stride = 1 + self.width * self.channels
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def close(self):
+        self._file.close()
+    
+    @property
+    def shape(self):
+        return (self.height, self.width, 3)
+    
+    def _read_chunk(self):
+        header = self._file.read(8)
+        if len(header) < 8:
+            raise ValueError(f"Truncated PNG: {self.path}")
+        length, chunk_type = struct.unpack(">I4s", header)
+        data = self._file.read(length)
+        self._file.read(4)  # CRC
+        return chunk_type, data
+    
+    def _idat_data(self):
+        yield self._first_idat
+        while True:
+            chunk_type, data = self._read_chunk()
+            if chunk_type == b"IDAT":
+                yield data
+            elif chunk_type == b"IEND":
+                return
+    
+    def _decode(self, filtered, rows, previous_row):
+        """Unfilter ``rows`` scanlines, seeding filters with the previous row."""
+        if previous_row is not None:
+            # An unfiltered copy of the previous row lets Up/Average/Paeth resolve
+            filtered = b"\x00" + previous_row + filtered
+            rows += 1
+        
+        img = Image.frombytes(self.mode, (self.width, rows), zlib.compress(filtered, 0), "zip", self.mode)
+        raw = img.tobytes()
+        if self.palette is not None:
+            img.putpalette(self.palette)
+        rgb = np.asarray(img.convert("RGB"))
+        
+        last_row = raw[-(self.stride - 1):]
+        return (rgb[1:] if previous_row is not None else rgb), last_row
+    
+    def iter_strips(self, strip_height=DEFAULT_STRIP_HEIGHT):
+        """Yield ``(y, strip)`` pairs of RGB uint8 arrays from top to bottom."""
+        decompressor = zlib.decompressobj()
+        strip_bytes = strip_height * self.stride
+        buffer = bytearray()
+        previous_row = None
+        y = 0
+        
+        for data in self._idat_data():
+            pending = data
+            while pending:
+                buffer += decompressor.decompress(pending, strip_bytes)
+                pending = decompressor.unconsumed_tail
+                while len(buffer) >= strip_bytes:
+                    strip, previous_row = self._decode(bytes(buffer[:strip_bytes]), strip_height, previous_row)
+                    del buffer[:strip_bytes]
+                    yield y, strip
+                    y += strip_height
+        
+        buffer += decompressor.flush()
+        rows = min(len(buffer) // self.stride, self.height - y)
+        if rows > 0:
+            strip, _ = self._decode(bytes(buffer[:rows * self.stride]), rows, previous_row)
+            yield y, strip
+
+
+class PNGStripWriter:
+    """Incremental RGB PNG encoder fed with horizontal strips."""
+    
+    def __init__(self, path, width, height, compress_level=6):
+        self.path = Path(path)
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self._previous_row = np.zeros((width, 3), dtype=np.uint8)
+        self._compressor = zlib.compressobj(compress_level)
+        self._file = open(self.path, 'wb')
+        self._file.write(PNG_SIGNATURE)
+        self._write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+    
+    def _write_chunk(self, chunk_type, data):
+        self._file.write(struct.pack(">I", len(data)))
+        self._file.write(chunk_type + data)
+        self._file.write(struct.pack(">I", zlib.crc32(chunk_type + data) & 0xFFFFFFFF))
+    
+    def write(self, strip):
+        """Append rows; ``strip`` is an (rows, width, 3) uint8 array."""
+        rows = strip.shape[0]
+        if strip.shape[1:] != (self.width, 3):
+            raise ValueError(f"Strip shape {strip.shape} does not match {self.width}x3")
+        if self.rows_written + rows > self.height:
+            raise ValueError("More rows written than the declared image height")
+        
+        # Per-row adaptive choice between None, Sub and Up filters
+        strip = np.ascontiguousarray(strip, dtype=np.uint8)
+        above = np.concatenate([self._previous_row[None], strip[:-1]])
+        left = np.zeros_like(strip)
+        left[:, 1:] = strip[:, :-1]
+        candidates = np.stack([strip, strip - left, strip - above]).reshape(3, rows, -1)
+        scores = np.abs(candidates.view(np.int8)).view(np.uint8).sum(axis=2, dtype=np.int64)
+        choice = scores.argmin(axis=0)
+        
+        scanlines = np.empty((rows, 1 + self.width * 3), dtype=np.uint8)
+        scanlines[:, 0] = choice
+        scanlines[:, 1:] = candidates[choice, np.arange(rows)]
+        
+        data = self._compressor.compress(scanlines.tobytes())
+        if data:
+            self._write_chunk(b"IDAT", data)
+        self._previous_row = strip[-1].copy()
+        self.rows_written += rows
+    
+    def close(self):
+        if self._file.closed:
+            return
+        if self.rows_written != self.height:
+            self._file.close()
+            raise ValueError(f"Wrote {self.rows_written} of {self.height} rows to {self.path}")
+        self._write_chunk(b"IDAT", self._compressor.flush())
+        self._write_chunk(b"IEND", b"")
+        self._file.close()
+
+
+class RowSource:
+    """Sequential row access over a strip iterator, buffering at most one strip."""
+    
+    def __init__(self, reader, strip_height=DEFAULT_STRIP_HEIGHT):
+        self.width = reader.width
+        self.height = reader.height
+        self._strips = reader.iter_strips(strip_height)
+        self._buffer = np.empty((0, self.width, 3), dtype=np.uint8)
+    
+    def read(self, rows):
+        """Return the next ``rows`` rows (fewer at the end of the image)."""
+        while self._buffer.shape[0] < rows:
+            try:
+                _, strip = next(self._strips)
+            except StopIteration:
+                break
+            self._buffer = np.concatenate([self._buffer, strip]) if self._buffer.size else strip
+        taken, self._buffer = self._buffer[:rows], self._buffer[rows:]
+        return taken
+
+
+def downscale(strip, factor):
+    """Area-average downscale by an integer factor, padding edges as needed."""
+    if factor == 1:
+        return strip
+    rows, cols = strip.shape[:2]
+    pad_rows, pad_cols = -rows % factor, -cols % factor
+    if pad_rows or pad_cols:
+        strip = np.pad(strip, ((0, pad_rows), (0, pad_cols), (0, 0)), mode="edge")
+    shape = (strip.shape[0] // factor, factor, strip.shape[1] // factor, factor, 3)
+    return strip.reshape(shape).mean(axis=(1, 3)).astype(np.uint8)
+
+
+def write_strips(path, width, height, strips, scale=1, compress_level=6):
+    """Encode an iterator of full-width strips, optionally downscaled by ``scale``.
+    
+    Strip heights must be multiples of ``scale`` except for the last one.
+    """
+    out_height = -(-height // scale)
+    out_width = -(-width // scale)
+    with PNGStripWriter(path, out_width, out_height, compress_level) as writer:
+        for strip in strips:
+            writer.write(downscale(strip, scale))
+    return out_width, out_height
+
+
+def compose_strips(width, height, layers, background=255, strip_height=DEFAULT_STRIP_HEIGHT):
+    """Yield canvas strips with ``layers`` painted on top of a solid background.
+    
+    Each layer is ``(x, y, source)`` where ``source`` is a ``RowSource`` (read
+    sequentially as the canvas advances) or an in-memory (h, w, 3) array.
+    Later layers are painted over earlier ones.
+    """
+    for top in range(0, height, strip_height):
+        rows = min(strip_height, height - top)
+        canvas = np.full((rows, width, 3), background, dtype=np.uint8)
+        
+        for x, y, source in layers:
+            start, end = max(top, y), min(top + rows, y + source.height if isinstance(source, RowSource)
+                                          else y + source.shape[0])
+            if start >= end or x >= width:
+                continue
+            if isinstance(source, RowSource):
+                block = source.read(end - start)
+            else:
+                block = source[start - y:end - y]
+            visible = min(block.shape[1], width - x)
+            canvas[start - top:start - top + block.shape[0], x:x + visible] = block[:, :visible]
+        
+        yield canvas
@@ -8,66 +8,78 @@ This version uses curl to check if sites are accessible and generates a simple c
 """
 
 import os
-import subprocess
 import sys
+import json
+import time
+import shutil
+import signal
+import argparse
+import tempfile
+import subprocess
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
-def check_url_accessibility(url):
-    """Check if URL is accessible."""
-    try:
-        result = subprocess.run(
-            ['curl', '-s', '-o', '/dev/null', '-w', '%{http_code}', url],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        return result.returncode == 0 and result.stdout.strip() == '200'
-    except:
-        return False
+CACHE_DIR = Path(os.environ.get("CHAT_SCREENSHOT_CACHE", Path.home() / ".cache" / "chat-screenshots"))
+TOOL_CACHE_FILE = CACHE_DIR / "capture_tools.json"
+TOOL_CACHE_TTL = 7 * 24 * 3600  # Re-detect weekly even if PATH is unchanged
+CHECK_TIMEOUT = 10
+CAPTURE_TIMEOUT = 30
 
-def capture_with_wkhtmltopdf(url, output_file):
-    """Capture screenshot using wkhtmltopdf if available."""
-    try:
-        cmd = [
-            'wkhtmltoimage',
-            '--width', '1920',
-            '--height', '1080',
-            '--javascript-delay', '3000',
-            '--load-error-handling', 'ignore',
-            '--crop-w', '1920',
-            '--crop-h', '1080',
-            url,
-            output_file
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, timeout=30)
-        return result.returncode == 0
-    except:
-        return False
+def check_url_accessibility(url, timeout=CHECK_TIMEOUT):
+    """Check if URL is accessible (HTTP 200), trying HEAD before GET."""
+    for method in ('HEAD', 'GET'):
+        request = urllib.request.Request(url, method=method, headers={'User-Agent': 'quick-screenshot'})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return response.status == 200
+        except urllib.error.HTTPError as e:
+            if method == 'HEAD' and e.code in (403, 405, 501):
+                continue  # Some servers refuse HEAD; retry with GET
+            return False
+        except (urllib.error.URLError, OSError, ValueError):
+            return False
+    return False
 
-def capture_with_cutycapt(url, output_file):
-    """Capture screenshot using CutyCapt if available."""
-    try:
-        cmd = [
-            'cutycapt',
-            '--url=' + url,
-            '--out=' + output_file,
-            '--min-width=1920',
-            '--min-height=1080',
-            '--delay=3000'
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, timeout=30)
-        return result.returncode == 0
-    except:
-        return False
+def check_urls(urls, timeout=CHECK_TIMEOUT):
+    """Check all URLs concurrently; returns {name: accessible}."""
+    with ThreadPoolExecutor(max_workers=max(1, len(urls))) as pool:
+        futures = {name: pool.submit(check_url_accessibility, url, timeout) for name, url in urls.items()}
+        return {name: future.result() for name, future in futures.items()}
 
-def capture_with_firefox_headless(url, output_file):
-    """Capture screenshot using Firefox headless mode."""
-    try:
-        # Create a simple HTML file that loads the URL in an iframe
-        html_content = f"""
+def wkhtmltoimage_command(url, output_file, binary='wkhtmltoimage'):
+    """Command line for wkhtmltoimage and the temp files it needs."""
+    cmd = [
+        binary,
+        '--width', '1920',
+        '--height', '1080',
+        '--javascript-delay', '3000',
+        '--load-error-handling', 'ignore',
+        '--crop-w', '1920',
+        '--crop-h', '1080',
+        url,
+        output_file
+    ]
+    return cmd, []
+
+def cutycapt_command(url, output_file, binary='cutycapt'):
+    """Command line for CutyCapt and the temp files it needs."""
+    cmd = [
+        binary,
+        '--url=' + url,
+        '--out=' + output_file,
+        '--min-width=1920',
+        '--min-height=1080',
+        '--delay=3000'
+    ]
+    return cmd, []
+
+def firefox_command(url, output_file, binary='firefox'):
+    """Command line for Firefox headless, loading the URL in an iframe page."""
+    # Create a simple HTML file that loads the URL in an iframe
+    html_content = f"""
 <!DOCTYPE html>
 <html>
 <head>
@@ -81,32 +93,161 @@ def capture_with_firefox_headless(url, output_file):
 </body>
 </html>
 """
-        
-        temp_html = f"/tmp/capture_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
-        with open(temp_html, 'w') as f:
-            f.write(html_content)
-        
-        cmd = [
-            'firefox',
-            '--headless',
-            '--window-size=1920,1080',
-            '--screenshot=' + output_file,
-            'file://' + temp_html
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, timeout=30)
-        
-        # Clean up temp file
+    
+    # Unique per call so concurrent captures never share a page
+    fd, temp_html = tempfile.mkstemp(prefix='capture_', suffix='.html')
+    with os.fdopen(fd, 'w') as f:
+        f.write(html_content)
+    
+    # A private profile per call, otherwise a second instance hands its URL to the first and exits
+    profile_dir = tempfile.mkdtemp(prefix='capture_profile_')
+    
+    cmd = [
+        binary,
+        '--headless',
+        '--no-remote',
+        '-profile', profile_dir,
+        '--window-size=1920,1080',
+        '--screenshot=' + output_file,
+        'file://' + temp_html
+    ]
+    return cmd, [temp_html, profile_dir]
+
+# (display name, executable, command builder), in sequential preference order
+CAPTURE_TOOLS = [
+    ('wkhtmltoimage', 'wkhtmltoimage', wkhtmltoimage_command),
+    ('cutycapt', 'cutycapt', cutycapt_command),
+    ('firefox --headless', 'firefox', firefox_command)
+]
+
+def _remove_files(paths):
+    for path in paths:
         try:
-            os.unlink(temp_html)
-        except:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.unlink(path)
+        except OSError:
             pass
-            
+
+def run_capture(cmd, temp_files, timeout=CAPTURE_TIMEOUT):
+    """Run one capture command to completion, cleaning up its temp files."""
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=timeout)
         return result.returncode == 0
-    except:
+    except (OSError, subprocess.TimeoutExpired):
         return False
+    finally:
+        _remove_files(temp_files)
+
+def capture_with_wkhtmltopdf(url, output_file):
+    """Capture screenshot using wkhtmltopdf if available."""
+    return run_capture(*wkhtmltoimage_command(url, output_file))
+
+def capture_with_cutycapt(url, output_file):
+    """Capture screenshot using CutyCapt if available."""
+    return run_capture(*cutycapt_command(url, output_file))
+
+def capture_with_firefox_headless(url, output_file):
+    """Capture screenshot using Firefox headless mode."""
+    return run_capture(*firefox_command(url, output_file))
+
+def detect_capture_tools(refresh=False):
+    """Map each capture tool to its executable path (or None), cached on disk.
+    
+    The cache is reused while PATH is unchanged, every cached executable still
+    exists and the entry is younger than TOOL_CACHE_TTL.
+    """
+    search_path = os.environ.get('PATH', '')
+    if not refresh:
+        try:
+            with open(TOOL_CACHE_FILE, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            tools = cache['tools']
+            if (cache.get('path') == search_path
+                    and time.time() - cache.get('detected_at', 0) < TOOL_CACHE_TTL
+                    and set(tools) == {name for name, _, _ in CAPTURE_TOOLS}
+                    and all(p is None or os.access(p, os.X_OK) for p in tools.values())):
+                return tools
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+    
+    tools = {name: shutil.which(binary) for name, binary, _ in CAPTURE_TOOLS}
+    try:
+        TOOL_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = TOOL_CACHE_FILE.with_suffix('.json.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'path': search_path, 'detected_at': time.time(), 'tools': tools}, f, indent=2)
+        os.replace(tmp_file, TOOL_CACHE_FILE)
+    except OSError:
+        pass  # A read-only cache only costs a re-detection next time
+    return tools
+
+def _cancel(process):
+    """Terminate a capture and everything it spawned (e.g. Firefox content processes)."""
+    if process.poll() is not None:
+        return
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=2)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+    except ProcessLookupError:
+        pass
+
+def race_capture(url, output_dir, name, timestamp, tools, timeout=CAPTURE_TIMEOUT):
+    """Start every available backend for ``url`` at once and keep the first good image.
+    
+    Returns ``(tool_name, output_file)`` for the winner, or ``(None, None)``.
+    """
+    attempts = []
+    for tool_name, _, build_command in CAPTURE_TOOLS:
+        binary = tools.get(tool_name)
+        if not binary:
+            continue
+        slug = tool_name.replace(' ', '_')
+        partial_file = str(output_dir / f".{name}_{slug}_{timestamp}.part.png")
+        cmd, temp_files = build_command(url, partial_file, binary)
+        try:
+            process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                       start_new_session=True)
+        except OSError:
+            _remove_files(temp_files)
+            continue
+        attempts.append((tool_name, process, partial_file, temp_files))
+    
+    winner = None
+    deadline = time.monotonic() + timeout
+    pending = list(attempts)
+    try:
+        while pending and winner is None and time.monotonic() < deadline:
+            for attempt in list(pending):
+                tool_name, process, partial_file, _ = attempt
+                returncode = process.poll()
+                if returncode is None:
+                    continue
+                pending.remove(attempt)
+                if returncode == 0 and os.path.exists(partial_file) and os.path.getsize(partial_file) > 0:
+                    winner = attempt
+                    break
+            else:
+                time.sleep(0.1)
+    finally:
+        for tool_name, process, partial_file, temp_files in attempts:
+            _cancel(process)
+            _remove_files(temp_files)
+            if winner is None or partial_file != winner[2]:
+                _remove_files([partial_file])
+    
+    if winner is None:
+        return None, None
+    tool_name, _, partial_file, _ = winner
+    output_file = str(output_dir / f"{name}_{tool_name.replace(' ', '_')}_{timestamp}.png")
+    os.replace(partial_file, output_file)
+    return tool_name, output_file
 
-def generate_comparison_report():
+def generate_comparison_report(race=False, refresh_tools=False, timeout=CAPTURE_TIMEOUT):
     """Generate a simple comparison report."""
     
     output_dir = Path("screenshots")
@@ -124,52 +265,64 @@ def generate_comparison_report():
     print("🔍 Quick Chat Widget Screenshot Comparison")
     print("==========================================")
     
-    # Check URL accessibility
+    # Check URL accessibility (all URLs at once)
     for name, url in urls.items():
         print(f"🌐 Checking {name}: {url}")
-        if check_url_accessibility(url):
+    for name, accessible in check_urls(urls).items():
+        if accessible:
             print(f"  ✅ {name} is accessible")
-            results[name] = {'url': url, 'accessible': True}
         else:
             print(f"  ❌ {name} is not accessible")
-            results[name] = {'url': url, 'accessible': False}
+        results[name] = {'url': urls[name], 'accessible': accessible}
     
-    # Try different screenshot methods
-    screenshot_tools = [
-        ('wkhtmltoimage', capture_with_wkhtmltopdf),
-        ('cutycapt', capture_with_cutycapt),
-        ('firefox --headless', capture_with_firefox_headless)
-    ]
+    # Only consider tools that are actually installed
+    tools = detect_capture_tools(refresh=refresh_tools)
+    installed = [name for name, path in tools.items() if path]
+    print(f"\n🧰 Capture tools: {', '.join(installed) if installed else 'none installed'}")
     
     successful_captures = {}
+    accessible = {name: info for name, info in results.items() if info['accessible']}
     
-    for tool_name, capture_func in screenshot_tools:
-        print(f"\n📸 Trying to capture screenshots with {tool_name}...")
-        
-        if not any(results[name]['accessible'] for name in results):
-            print("  ⏭️  Skipping - no accessible URLs")
-            continue
-        
-        tool_success = False
-        
-        for name, info in results.items():
-            if not info['accessible']:
+    if not accessible:
+        print("  ⏭️  Skipping - no accessible URLs")
+    elif race and installed:
+        print(f"\n🏁 Racing {len(installed)} backends for {len(accessible)} URLs...")
+        with ThreadPoolExecutor(max_workers=len(accessible)) as pool:
+            futures = {
+                name: pool.submit(race_capture, info['url'], output_dir, name, timestamp, tools, timeout)
+                for name, info in accessible.items()
+            }
+            for name, future in futures.items():
+                tool_name, output_file = future.result()
+                if output_file:
+                    print(f"  ✅ {name}: {tool_name} won -> {output_file}")
+                    successful_captures[name] = output_file
+                else:
+                    print(f"  ❌ {name}: every backend failed")
+    else:
+        # Try different screenshot methods, one tool at a time
+        for tool_name, _, build_command in CAPTURE_TOOLS:
+            if not tools.get(tool_name):
                 continue
-                
-            output_file = str(output_dir / f"{name}_{tool_name.replace(' ', '_')}_{timestamp}.png")
+            print(f"\n📸 Trying to capture screenshots with {tool_name}...")
             
-            print(f"  📱 Capturing {name}...")
+            tool_success = False
             
-            if capture_func(info['url'], output_file):
-                print(f"    ✅ Success: {output_file}")
-                successful_captures[name] = output_file
-                tool_success = True
-            else:
-                print(f"    ❌ Failed")
-        
-        if tool_success:
-            print(f"  🎉 Successfully captured with {tool_name}")
-            break
+            for name, info in accessible.items():
+                output_file = str(output_dir / f"{name}_{tool_name.replace(' ', '_')}_{timestamp}.png")
+                
+                print(f"  📱 Capturing {name}...")
+                
+                if run_capture(*build_command(info['url'], output_file, tools[tool_name]), timeout=timeout):
+                    print(f"    ✅ Success: {output_file}")
+                    successful_captures[name] = output_file
+                    tool_success = True
+                else:
+                    print("    ❌ Failed")
+            
+            if tool_success:
+                print(f"  🎉 Successfully captured with {tool_name}")
+                break
     
     # Generate HTML report
     if successful_captures:
@@ -180,6 +333,8 @@ def generate_comparison_report():
         print("   sudo apt-get install wkhtmltopdf")
         print("   sudo apt-get install cutycapt")
         print("   sudo apt-get install firefox")
+        if installed:
+            print("   (re-run with --refresh-tools after installing)")
     
     return successful_captures
 
@@ -261,9 +416,30 @@ def generate_html_report(captures, results, timestamp, output_dir):
     print(f"\n✅ Report generated: {report_file}")
     print(f"📁 Screenshots saved in: {output_dir}")
 
-if __name__ == "__main__":
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description="Quick chat widget screenshots with system capture tools")
+    parser.add_argument(
+        "--race",
+        action="store_true",
+        help="Start every installed capture tool in parallel per URL and keep the first success"
+    )
+    parser.add_argument(
+        "--refresh-tools",
+        action="store_true",
+        help=f"Re-detect installed capture tools instead of using the cache in {TOOL_CACHE_FILE}"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=CAPTURE_TIMEOUT,
+        help=f"Seconds allowed per capture (default: {CAPTURE_TIMEOUT})"
+    )
+    args = parser.parse_args()
+    
     try:
-        captures = generate_comparison_report()
+        captures = generate_comparison_report(race=args.race, refresh_tools=args.refresh_tools,
+                                              timeout=args.timeout)
         if captures:
             print(f"\n🎉 Successfully captured {len(captures)} screenshots")
         else:
@@ -271,4 +447,7 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         print("\n⏹️  Cancelled by user")
     except Exception as e:
-        print(f"\n❌ Error: {e}")
\ No newline at end of file
+        print(f"\n❌ Error: {e}")
+
+if __name__ == "__main__":
+    main()
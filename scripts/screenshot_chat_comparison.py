@@ -14,13 +14,26 @@ Requirements:
 
 Usage:
     python3 screenshot_chat_comparison.py [--output-dir screenshots]
+    python3 screenshot_chat_comparison.py --daemon start   # keep a warm browser
+    python3 screenshot_chat_comparison.py --use-daemon --offline
 """
 
+import io
 import os
+import re
 import sys
 import time
+import json
+import shutil
+import queue
+import signal
 import argparse
-from datetime import datetime
+import threading
+import subprocess
+import urllib.request
+from urllib.parse import urljoin, urlparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
 
 try:
@@ -30,14 +43,626 @@ try:
     from selenium.webdriver.support import expected_conditions as EC
     from selenium.webdriver.chrome.options import Options
     from selenium.webdriver.common.action_chains import ActionChains
-    from webdriver_manager.chrome import ChromeDriverManager
+    from selenium.webdriver.common.keys import Keys
+    from selenium.common.exceptions import TimeoutException
     from selenium.webdriver.chrome.service import Service
     from PIL import Image, ImageDraw, ImageFont
+    import numpy as np
+    from png_stream import PNGStripReader, RowSource, compose_strips, write_strips
 except ImportError as e:
     print(f"Missing required package: {e}")
-    print("Install with: pip install selenium pillow webdriver-manager")
+    print("Install with: pip install selenium pillow numpy webdriver-manager")
     sys.exit(1)
 
+try:
+    from webdriver_manager.chrome import ChromeDriverManager
+except ImportError:
+    # Air-gapped runners only need a pre-populated driver cache
+    ChromeDriverManager = None
+
+
+# Local driver cache and warm-browser daemon state
+CACHE_DIR = Path(os.environ.get("CHAT_SCREENSHOT_CACHE", Path.home() / ".cache" / "chat-screenshots"))
+DRIVER_CACHE_DIR = CACHE_DIR / "chromedriver"
+DRIVER_INDEX_FILE = DRIVER_CACHE_DIR / "index.json"
+DAEMON_STATE_FILE = CACHE_DIR / "browser_daemon.json"
+CHROME_BINARIES = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser"]
+
+# Buffered observers for metrics that are only reported as events
+PERF_OBSERVER_SCRIPT = """
+(() => {
+    if (window.__chatPerf) return;
+    const perf = window.__chatPerf = {lcp: null, cls: 0, longTasks: []};
+    const observe = (type, callback) => {
+        try {
+            new PerformanceObserver(list => list.getEntries().forEach(callback))
+                .observe({type: type, buffered: true});
+        } catch (e) { /* entry type unsupported */ }
+    };
+    observe('largest-contentful-paint', e => { perf.lcp = e.startTime; });
+    observe('layout-shift', e => { if (!e.hadRecentInput) perf.cls += e.value; });
+    observe('longtask', e => { perf.longTasks.push({start: e.startTime, duration: e.duration}); });
+})();
+"""
+
+PERF_COLLECT_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0];
+const paint = {};
+performance.getEntriesByType('paint').forEach(p => { paint[p.name] = p.startTime; });
+const resources = performance.getEntriesByType('resource');
+const perf = window.__chatPerf || {lcp: null, cls: null, longTasks: []};
+const sum = (items, key) => items.reduce((total, item) => total + (item[key] || 0), 0);
+const longTaskTotal = sum(perf.longTasks, 'duration');
+return {
+    navigation: nav ? {
+        dns_ms: nav.domainLookupEnd - nav.domainLookupStart,
+        connect_ms: nav.connectEnd - nav.connectStart,
+        ttfb_ms: nav.responseStart - nav.startTime,
+        response_ms: nav.responseEnd - nav.responseStart,
+        dom_interactive_ms: nav.domInteractive,
+        dom_content_loaded_ms: nav.domContentLoadedEventEnd,
+        load_ms: nav.loadEventEnd
+    } : null,
+    paint: {
+        first_paint_ms: paint['first-paint'] ?? null,
+        first_contentful_paint_ms: paint['first-contentful-paint'] ?? null,
+        largest_contentful_paint_ms: perf.lcp
+    },
+    cumulative_layout_shift: perf.cls,
+    long_tasks: {
+        count: perf.longTasks.length,
+        total_ms: longTaskTotal,
+        max_ms: perf.longTasks.reduce((m, t) => Math.max(m, t.duration), 0)
+    },
+    js_heap: performance.memory ? {
+        used_bytes: performance.memory.usedJSHeapSize,
+        total_bytes: performance.memory.totalJSHeapSize,
+        limit_bytes: performance.memory.jsHeapSizeLimit
+    } : null,
+    transfer: {
+        resource_count: resources.length,
+        transferred_bytes: sum(resources, 'transferSize') + (nav ? nav.transferSize : 0),
+        encoded_bytes: sum(resources, 'encodedBodySize') + (nav ? nav.encodedBodySize : 0),
+        decoded_bytes: sum(resources, 'decodedBodySize') + (nav ? nav.decodedBodySize : 0)
+    }
+};
+"""
+
+
+# Scripted conversation for --benchmark, cycled to the requested length
+BENCHMARK_MESSAGES = [
+    "halo",
+    "tampilkan menu",
+    "pesanan hari ini",
+    "show menu",
+    "bagaimana status inventori saat ini?",
+    "terima kasih",
+]
+
+# Timestamps sends and assistant replies with the page's own clock
+BENCHMARK_TRACKER_SCRIPT = """
+const [replySelector] = arguments;
+// sendButton is set to the control the benchmark is about to click, whichever selector found it
+const bench = window.__chatBench = {sends: [], replies: [], sendButton: null};
+const known = new Set(document.querySelectorAll(replySelector));
+const elements = [];
+document.addEventListener('click', e => {
+    if (bench.sendButton && bench.sendButton.contains(e.target)) bench.sends.push(performance.now());
+}, true);
+document.addEventListener('keydown', e => {
+    if (e.key === 'Enter' && e.target.matches('input, textarea')) bench.sends.push(performance.now());
+}, true);
+new MutationObserver(mutations => {
+    const now = performance.now();
+    document.querySelectorAll(replySelector).forEach(el => {
+        if (known.has(el)) return;
+        known.add(el);
+        elements.push(el);
+        bench.replies.push({rendered: now, settled: now});
+    });
+    const last = elements[elements.length - 1];
+    if (last && mutations.some(m => last.contains(m.target))) {
+        bench.replies[bench.replies.length - 1].settled = now;
+    }
+}).observe(document.body, {childList: true, subtree: true, characterData: true});
+"""
+
+
+# Records every animation frame and when the watched element last changed
+FRAME_RECORDER_SCRIPT = """
+const [watchSelector] = arguments;
+const rec = window.__frameRec = {frames: [], changes: [], running: true, start: performance.now()};
+let lastSignature = null;
+const signature = () => {
+    const el = document.querySelector(watchSelector);
+    if (!el) return 'absent';
+    const rect = el.getBoundingClientRect();
+    const style = getComputedStyle(el);
+    return [rect.x, rect.y, rect.width, rect.height, style.opacity, style.transform,
+            el.textContent.length].join('|');
+};
+const tick = now => {
+    if (!rec.running) return;
+    rec.frames.push(now);
+    const current = signature();
+    if (current !== lastSignature) {
+        rec.changes.push(now);
+        lastSignature = current;
+    }
+    requestAnimationFrame(tick);
+};
+requestAnimationFrame(tick);
+"""
+
+
+# Chat toggle selectors, most specific first
+CHAT_BUTTON_SELECTORS = [
+    "[data-testid='chat-button']",  # Primary selector with test ID
+    "button[aria-label*='chat']",
+    "button.chat-toggle-button",
+    "button[class*='chat']",
+    ".chat-widget button",
+    "button:has(.h-6.w-6)",  # Icon button
+    "button[class*='MessageCircle']",
+    "button[class*='bg-blue-600']",  # Blue button styling
+    "button[class*='rounded-full']",  # Round button styling
+]
+
+# Chat send button selectors, most specific first
+CHAT_SEND_SELECTORS = [
+    "[data-testid='chat-send-button']",  # Primary selector with test ID
+    "button[type='submit']",
+    "button:has(.Send)",
+    "button[aria-label*='send']",
+    ".chat-input button",
+    "button[class*='send']",
+    "button[class*='bg-blue-600']:not([data-testid='chat-button'])",
+]
+
+# Seed routes for --crawl; discovered same-origin links are added to these
+DEFAULT_CRAWL_ROUTES = {
+    "storefront": ["/"],
+    "backoffice": ["/", "/dashboard", "/customers", "/menu", "/login"],
+}
+CRAWL_SKIP_PATTERN = re.compile(r"log-?out|sign-?out|\.(?:pdf|zip|csv|xlsx?|png|jpe?g|gif|svg|webp)$", re.I)
+LINK_DISCOVERY_SCRIPT = "return Array.from(document.querySelectorAll('a[href]'), a => a.href);"
+
+# Position of the first visible chat toggle, without the per-selector waits of _find_chat_button
+CHAT_WIDGET_PROBE_SCRIPT = """
+for (const selector of arguments[0]) {
+    let el;
+    try { el = document.querySelector(selector); } catch (e) { continue; }
+    if (!el) continue;
+    const rect = el.getBoundingClientRect();
+    if (rect.width && rect.height) {
+        return {selector, x: Math.round(rect.x), y: Math.round(rect.y),
+                width: Math.round(rect.width), height: Math.round(rect.height)};
+    }
+}
+return null;
+"""
+
+# Devices for --matrix: viewport in CSS pixels, device pixel ratio and user agent
+# (None keeps the browser's own user agent)
+DEVICE_MATRIX = [
+    {"name": "desktop-1080", "width": 1920, "height": 1080, "dpr": 1, "mobile": False, "user_agent": None},
+    {"name": "laptop-768", "width": 1366, "height": 768, "dpr": 1, "mobile": False, "user_agent": None},
+    {"name": "ipad-air", "width": 820, "height": 1180, "dpr": 2, "mobile": True,
+     "user_agent": "Mozilla/5.0 (iPad; CPU OS 17_0 like Mac OS X) AppleWebKit/605.1.15 "
+                   "(KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1"},
+    {"name": "iphone-14", "width": 390, "height": 844, "dpr": 3, "mobile": True,
+     "user_agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 "
+                   "(KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1"},
+    {"name": "pixel-7", "width": 412, "height": 915, "dpr": 2.625, "mobile": True,
+     "user_agent": "Mozilla/5.0 (Linux; Android 14; Pixel 7) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36"},
+]
+
+
+def summarize_frames(frames, changes, start, refresh_ms=1000 / 60):
+    """Frame-time statistics for one recorded animation phase."""
+    frames = [t for t in frames if t >= start]
+    changes = [t for t in changes if t >= start]
+    settle_ms = (changes[-1] - start) if changes else 0.0
+    
+    # Only the frames up to the settle point describe the animation
+    active = [t for t in frames if t <= start + settle_ms] or frames[:2]
+    intervals = [b - a for a, b in zip(active, active[1:])]
+    dropped = sum(max(0, round(interval / refresh_ms) - 1) for interval in intervals)
+    duration = (active[-1] - active[0]) if len(active) > 1 else 0.0
+    
+    return {
+        'settle_ms': settle_ms,
+        'frames': len(active),
+        'dropped_frames': int(dropped),
+        'fps': (len(intervals) * 1000 / duration) if duration else None,
+        'frame_time_ms': {
+            'p50': percentile(intervals, 50),
+            'p90': percentile(intervals, 90),
+            'p99': percentile(intervals, 99),
+            'max': max(intervals) if intervals else None,
+        },
+    }
+
+
+# Default network budgets per app; override with --budgets budgets.json
+DEFAULT_NETWORK_BUDGETS = {
+    "saleor-storefront": {
+        "js_bytes": 1500 * 1024,
+        "total_bytes": 3000 * 1024,
+        "request_count": 120,
+        "third_party_bytes": 300 * 1024,
+    },
+    "saleor-backoffice": {
+        "js_bytes": 2000 * 1024,
+        "total_bytes": 4000 * 1024,
+        "request_count": 150,
+        "third_party_bytes": 300 * 1024,
+    },
+}
+
+
+# Request classes that capture profiles can block (CDP Network.setBlockedURLs patterns)
+RESOURCE_CLASSES = {
+    "analytics": [
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+        "*analytics.google.com*", "*segment.io*", "*cdn.segment.com*", "*hotjar.com*",
+        "*clarity.ms*", "*connect.facebook.net*", "*plausible.io*", "*mixpanel.com*",
+    ],
+    "third-party-scripts": [
+        "*cdn.jsdelivr.net/*.js*", "*unpkg.com/*.js*", "*cdnjs.cloudflare.com/*.js*",
+        "*widget.intercom.io*", "*js.intercomcdn.com*", "*static.zdassets.com*",
+        "*js.stripe.com*", "*maps.googleapis.com*", "*recaptcha*",
+    ],
+    "fonts": [
+        "*fonts.googleapis.com*", "*fonts.gstatic.com*", "*use.typekit.net*",
+        "*.woff2*", "*.woff*", "*.ttf*", "*.otf*",
+    ],
+    "images": [
+        "*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.avif*", "*/_next/image*",
+    ],
+}
+
+# Keeps pages that call analytics globals from throwing once the scripts are blocked
+ANALYTICS_STUB_SCRIPT = """
+window.dataLayer = window.dataLayer || [];
+window.gtag = window.gtag || function () {};
+window.ga = window.ga || function () {};
+window.fbq = window.fbq || function () {};
+window.analytics = window.analytics || {track() {}, page() {}, identify() {}};
+"""
+
+# Named capture profiles; "full" keeps visual fidelity for the comparison
+CAPTURE_PROFILES = {
+    "full": [],
+    "no-analytics": ["analytics"],
+    "no-third-party": ["analytics", "third-party-scripts"],
+    "text-only": ["analytics", "third-party-scripts", "fonts"],
+    "lean": ["analytics", "third-party-scripts", "fonts", "images"],
+}
+
+# Requests the chat widget needs; a profile must never block these
+CHAT_REQUEST_MARKERS = ["chat", "socket.io", "/api/", "graphql", "_next/static"]
+
+
+def _site_of(hostname):
+    """Registrable-domain approximation used to tell first from third party."""
+    labels = (hostname or "").split(".")
+    return ".".join(labels[-2:])
+
+
+def build_har(events, page_url, page_title, started_at=None):
+    """Build a HAR 1.2 log from Chrome DevTools ``Network.*`` events.
+    
+    ``started_at`` is the page's navigation or capture start (a datetime); it
+    dates the page, and any request without a wall time, when given. Times
+    are written in UTC with their offset, as HAR 1.2 requires. ``page_url``
+    titles the page when the document has no title.
+    """
+    requests = {}
+    for event in events:
+        method, params = event['method'], event['params']
+        request_id = params.get('requestId')
+        if method == 'Network.requestWillBeSent':
+            entry = requests.setdefault(request_id, {})
+            entry.update({
+                'url': params['request']['url'],
+                'method': params['request']['method'],
+                'request_headers': params['request'].get('headers', {}),
+                'type': params.get('type', 'Other'),
+                'wall_time': params.get('wallTime'),
+                'start': params['timestamp'],
+            })
+        elif method == 'Network.responseReceived' and request_id in requests:
+            response = params['response']
+            requests[request_id].update({
+                'status': response.get('status', 0),
+                'status_text': response.get('statusText', ''),
+                'mime_type': response.get('mimeType', ''),
+                'response_headers': response.get('headers', {}),
+                'protocol': response.get('protocol', ''),
+            })
+        elif method == 'Network.loadingFinished' and request_id in requests:
+            requests[request_id].update({
+                'end': params['timestamp'],
+                'transfer_size': int(params.get('encodedDataLength', 0)),
+            })
+        elif method == 'Network.loadingFailed' and request_id in requests:
+            requests[request_id].update({
+                'end': params['timestamp'],
+                'failed': params.get('errorText', 'failed'),
+                'blocked_reason': params.get('blockedReason'),
+            })
+    
+    entries = []
+    # A naive started_at is local time, as datetime.now() returns it
+    started_at = started_at.astimezone(timezone.utc) if started_at is not None else None
+    fallback_start = (started_at or datetime.now(timezone.utc)).isoformat()
+    for entry in requests.values():
+        if 'url' not in entry or entry['url'].startswith('data:'):
+            continue
+        elapsed = max(0.0, (entry.get('end', entry['start']) - entry['start']) * 1000)
+        started = (datetime.fromtimestamp(entry['wall_time'], timezone.utc).isoformat()
+                   if entry.get('wall_time') else fallback_start)
+        entries.append({
+            'pageref': 'page_1',
+            'startedDateTime': started,
+            'time': elapsed,
+            'request': {
+                'method': entry['method'],
+                'url': entry['url'],
+                'httpVersion': entry.get('protocol', ''),
+                'headers': [{'name': k, 'value': str(v)} for k, v in entry['request_headers'].items()],
+                'queryString': [],
+                'cookies': [],
+                'headersSize': -1,
+                'bodySize': -1,
+            },
+            'response': {
+                'status': entry.get('status', 0),
+                'statusText': entry.get('status_text', entry.get('failed', '')),
+                'httpVersion': entry.get('protocol', ''),
+                'headers': [{'name': k, 'value': str(v)} for k, v in entry.get('response_headers', {}).items()],
+                'cookies': [],
+                'content': {'size': entry.get('transfer_size', 0), 'mimeType': entry.get('mime_type', '')},
+                'redirectURL': '',
+                'headersSize': -1,
+                'bodySize': entry.get('transfer_size', 0),
+                '_transferSize': entry.get('transfer_size', 0),
+            },
+            'cache': {},
+            'timings': {'send': 0, 'wait': elapsed, 'receive': 0},
+            '_resourceType': entry['type'],
+            '_failed': entry.get('failed'),
+            '_blockedReason': entry.get('blocked_reason'),
+        })
+    
+    if started_at is not None:
+        page_started = started_at.isoformat()
+    else:
+        page_started = min((e['startedDateTime'] for e in entries), default=fallback_start)
+    return {'log': {
+        'version': '1.2',
+        'creator': {'name': 'screenshot_chat_comparison', 'version': '1.0'},
+        'pages': [{'id': 'page_1', 'title': page_title or page_url, 'startedDateTime': page_started,
+                   'pageTimings': {}}],
+        'entries': entries,
+    }}
+
+
+def summarize_har(har, page_url):
+    """Aggregate byte and request totals from a HAR log."""
+    page_site = _site_of(urlparse(page_url).hostname)
+    totals = {'request_count': 0, 'total_bytes': 0, 'js_bytes': 0, 'css_bytes': 0,
+              'image_bytes': 0, 'font_bytes': 0, 'third_party_bytes': 0, 'third_party_requests': 0,
+              'failed_requests': 0}
+    type_keys = {'Script': 'js_bytes', 'Stylesheet': 'css_bytes', 'Image': 'image_bytes', 'Font': 'font_bytes'}
+    
+    for entry in har['log']['entries']:
+        size = entry['response']['_transferSize']
+        totals['request_count'] += 1
+        totals['total_bytes'] += size
+        if entry['_resourceType'] in type_keys:
+            totals[type_keys[entry['_resourceType']]] += size
+        if _site_of(urlparse(entry['request']['url']).hostname) != page_site:
+            totals['third_party_bytes'] += size
+            totals['third_party_requests'] += 1
+        if entry['_failed']:
+            totals['failed_requests'] += 1
+    return totals
+
+
+def merge_budgets(defaults, overrides):
+    """Budgets with ``overrides`` applied per app and per metric; a null limit removes it."""
+    merged = {}
+    for app in {**defaults, **overrides}:
+        limits = {**defaults.get(app, {}), **overrides.get(app, {})}
+        merged[app] = {metric: limit for metric, limit in limits.items() if limit is not None}
+    return merged
+
+
+def check_budgets(totals, budgets):
+    """Return the budget violations for one page's network totals."""
+    return [
+        {'metric': metric, 'actual': totals.get(metric, 0), 'budget': limit}
+        for metric, limit in budgets.items()
+        if totals.get(metric, 0) > limit
+    ]
+
+
+# Keeps fixed/sticky elements from repeating down a stitched full-page capture: fixed ones are
+# hidden, sticky ones go back into the flow (relative, no offsets) so each is drawn once, in place
+HIDE_FIXED_SCRIPT = """
+const changed = [];
+document.querySelectorAll('body *').forEach(el => {
+    const position = getComputedStyle(el).position;
+    if (position !== 'fixed' && position !== 'sticky') return;
+    changed.push([el, el.getAttribute('style')]);
+    if (position === 'fixed') {
+        el.style.visibility = 'hidden';
+    } else {
+        el.style.position = 'relative';
+        el.style.inset = 'auto';
+    }
+});
+window.__hiddenFixed = changed;
+return changed.length;
+"""
+
+RESTORE_FIXED_SCRIPT = """
+(window.__hiddenFixed || []).forEach(([el, style]) => {
+    if (style === null) el.removeAttribute('style'); else el.setAttribute('style', style);
+});
+window.__hiddenFixed = [];
+"""
+
+# Resolves after two animation frames so a scroll has been painted
+WAIT_FOR_PAINT_SCRIPT = """
+const done = arguments[arguments.length - 1];
+requestAnimationFrame(() => requestAnimationFrame(done));
+"""
+
+# Freezes run-to-run noise on every new document: CSS animations and
+# transitions jump to their end state, the caret is transparent and Date starts
+# from a pinned instant (then advances in real time so elapsed-time code works)
+STABILIZE_SCRIPT = """
+(() => {
+    if (window.__chatStable) return;
+    window.__chatStable = true;
+    
+    const RealDate = Date;
+    const pinned = __PINNED_TIME_MS__;
+    const origin = performance.now();
+    const now = () => Math.floor(pinned + (performance.now() - origin));
+    function PinnedDate(...args) {
+        if (!new.target) return new RealDate(now()).toString();
+        return args.length ? new RealDate(...args) : new RealDate(now());
+    }
+    PinnedDate.prototype = RealDate.prototype;
+    PinnedDate.now = now;
+    PinnedDate.parse = RealDate.parse;
+    PinnedDate.UTC = RealDate.UTC;
+    window.Date = PinnedDate;
+    
+    const style = document.createElement('style');
+    style.textContent = `*, *::before, *::after {
+        animation-duration: 0s !important; animation-delay: 0s !important;
+        transition-duration: 0s !important; transition-delay: 0s !important;
+        caret-color: transparent !important; scroll-behavior: auto !important;
+    }`;
+    const inject = () => { if (!style.isConnected) (document.head || document.documentElement).appendChild(style); };
+    if (document.documentElement) inject();
+    document.addEventListener('DOMContentLoaded', inject);
+})();
+"""
+
+# Settles the page right before a capture: lazy images load eagerly, script-driven
+# animations finish, and images and fonts are decoded (bounded by a timeout)
+SETTLE_SCRIPT = """
+const [timeoutMs, done] = [arguments[0], arguments[arguments.length - 1]];
+document.querySelectorAll('img[loading="lazy"]').forEach(img => { img.loading = 'eager'; });
+document.getAnimations().forEach(animation => {
+    try { animation.finish(); } catch (e) { animation.pause(); }  // Infinite animations cannot finish
+});
+const images = Array.from(document.images).filter(img => img.currentSrc || img.src);
+Promise.race([
+    Promise.all([document.fonts.ready, ...images.map(img => img.decode().catch(() => null))]),
+    new Promise(resolve => setTimeout(resolve, timeoutMs))
+]).then(() => requestAnimationFrame(() => requestAnimationFrame(() => done(images.length))));
+"""
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize_latencies(values):
+    """Distribution summary (ms) for a list of latency samples."""
+    if not values:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'min': min(values),
+        'mean': sum(values) / len(values),
+        'p50': percentile(values, 50),
+        'p90': percentile(values, 90),
+        'p95': percentile(values, 95),
+        'max': max(values),
+    }
+
+
+def measure_residual_variance(samples):
+    """Pixels that still change between repeated captures of the same state.
+    
+    ``samples`` are equally sized (h, w, 3) uint8 arrays taken back to back.
+    Returns the union mask of changed pixels and summary statistics.
+    """
+    changed = np.zeros(samples[0].shape[:2], dtype=bool)
+    max_delta = 0
+    for previous, current in zip(samples, samples[1:]):
+        if previous.shape != current.shape:
+            raise ValueError("Variance samples differ in size")
+        delta = np.abs(previous.astype(np.int16) - current.astype(np.int16)).max(axis=2)
+        changed |= delta > 0
+        max_delta = max(max_delta, int(delta.max()))
+    
+    ys, xs = np.nonzero(changed)
+    changed_pixels = int(ys.size)
+    return changed, {
+        'samples': len(samples),
+        'changed_pixels': changed_pixels,
+        'changed_percentage': changed_pixels / changed.size * 100,
+        'max_delta': max_delta,
+        'bbox': [int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1] if changed_pixels else None,
+    }
+
+def _load_json(path, default):
+    """Read a JSON file, returning ``default`` when missing or corrupt."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _save_json(path, data):
+    """Atomically write a JSON file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _binary_version(binary):
+    """Return the dotted version string reported by ``binary --version``."""
+    try:
+        result = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(r"(\d+(?:\.\d+){1,3})", result.stdout)
+    return match.group(1) if match else None
+
+
+def find_chrome_binary():
+    """Locate an installed Chrome/Chromium executable."""
+    explicit = os.environ.get("CHROME_BINARY")
+    if explicit:
+        return explicit
+    for name in CHROME_BINARIES:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
 
 class ChatScreenshotComparator:
     """Automated screenshot tool for chat widget comparison."""
@@ -56,6 +681,59 @@ class ChatScreenshotComparator:
         self.chat_wait_time = 3
         self.interaction_delay = 1
         
+        # Driver provisioning (see _resolve_driver_path)
+        self.offline = os.environ.get("CHAT_SCREENSHOT_OFFLINE") == "1"
+        self.driver_path = os.environ.get("CHROMEDRIVER_PATH")
+        self.driver_version = os.environ.get("CHROMEDRIVER_VERSION")
+        self.use_daemon = False
+        self.daemon_port = 9222
+        
+        # Per-app performance metrics collected during capture
+        self.page_metrics = {}
+        
+        # Round-trip benchmark settings
+        self.reply_selector = "[data-testid='chat-widget'] .justify-start"
+        self.benchmark_timeout = 30
+        self.reply_settle_ms = 500
+        
+        # Network logging and budgets, keyed by "saleor-<app>"
+        self.network_budgets = DEFAULT_NETWORK_BUDGETS
+        self.network_summaries = {}
+        
+        # Strip-streamed composition and report thumbnails
+        self.tiled_composition = False
+        self.thumbnail_scale = 1
+        self.strip_height = 64
+        
+        # Full-page scrolling capture
+        self.full_page = False
+        self.max_scroll_tiles = 40
+        self.keep_tiles = False
+        
+        # Request-blocking capture profile
+        self.capture_profile = "full"
+        self._profile_script_ids = {}  # (session, window handle) -> analytics stub script id in that target
+        
+        # Multi-route crawl: browser pool size and wall-clock budget
+        self.crawl_workers = 3
+        self.crawl_budget = 600
+        self.crawl_max_routes = 50
+        self.crawl_page_timeout = 30
+        
+        # Render stabilization and residual variance sampling
+        self.stabilize = False
+        self.stabilize_timeout = 10
+        self.pinned_time = "2025-01-01T09:00:00+00:00"
+        self.stability_samples = 3
+        self.stability_interval = 0.5
+        self.stability = {}
+        
+        # Frame-timing settings
+        self.widget_selector = "[data-testid='chat-widget']"
+        self.cpu_throttle_rate = 1
+        self.animation_quiet_ms = 300
+        self.animation_timeout = 5
+        
         # Initialize Chrome options
         self.chrome_options = self._setup_chrome_options()
         
@@ -67,26 +745,203 @@ class ChatScreenshotComparator:
         options.add_argument("--disable-gpu")
         options.add_argument("--disable-extensions")
         options.add_argument("--disable-plugins")
-        options.add_argument("--disable-images")  # Faster loading
+        # Resource blocking is handled per capture profile (see _apply_capture_profile)
         options.add_argument(f"--window-size={self.window_width},{self.window_height}")
         
         # Enable logging for debugging
         options.add_argument("--enable-logging")
         options.add_argument("--v=1")
         
+        # DevTools network events feed the per-page HAR log
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        
         return options
     
+    def _detect_chrome_version(self):
+        """Return the installed Chrome version, cached by binary path and mtime."""
+        binary = find_chrome_binary()
+        if not binary:
+            return None
+        
+        index = _load_json(DRIVER_INDEX_FILE, {})
+        mtime = os.path.getmtime(binary)
+        cached = index.get("chrome", {})
+        if cached.get("path") == binary and cached.get("mtime") == mtime:
+            return cached.get("version")
+        
+        version = _binary_version(binary)
+        if version:
+            index["chrome"] = {"path": binary, "mtime": mtime, "version": version}
+            _save_json(DRIVER_INDEX_FILE, index)
+        return version
+    
+    def _cache_driver(self, pin, source_path):
+        """Copy a chromedriver binary into the version-pinned cache."""
+        target = DRIVER_CACHE_DIR / pin / Path(source_path).name
+        if Path(source_path).resolve() != target.resolve():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(source_path, target)
+            target.chmod(0o755)
+        
+        index = _load_json(DRIVER_INDEX_FILE, {})
+        index.setdefault("drivers", {})[pin] = str(target)
+        _save_json(DRIVER_INDEX_FILE, index)
+        return str(target)
+    
+    def _resolve_driver_path(self):
+        """Resolve a chromedriver binary, preferring the local pinned cache.
+        
+        Resolution order: explicit path, cached driver for the pinned version,
+        a matching chromedriver on PATH, and only then a webdriver-manager
+        download (skipped entirely in offline mode).
+        """
+        if self.driver_path:
+            return self.driver_path
+        
+        chrome_version = self._detect_chrome_version()
+        pin = self.driver_version or (chrome_version.split(".")[0] if chrome_version else "default")
+        
+        # 1. Version-pinned cache, no network and no subprocess needed
+        cached = _load_json(DRIVER_INDEX_FILE, {}).get("drivers", {}).get(pin)
+        if cached and os.access(cached, os.X_OK):
+            return cached
+        
+        # 2. System chromedriver with a matching major version
+        system_driver = shutil.which("chromedriver")
+        if system_driver:
+            system_version = _binary_version(system_driver) or ""
+            if pin == "default" or system_version.split(".")[0] == pin.split(".")[0]:
+                return self._cache_driver(pin, system_driver)
+        
+        if self.offline:
+            raise RuntimeError(
+                f"No cached chromedriver for version {pin} in {DRIVER_CACHE_DIR}. "
+                "Run once with network access, or pass --driver-path."
+            )
+        if ChromeDriverManager is None:
+            raise RuntimeError("webdriver-manager is not installed and no cached chromedriver was found")
+        
+        # 3. Download once, then serve from the cache on every later run
+        full_version = self.driver_version if self.driver_version and "." in self.driver_version else None
+        downloaded = ChromeDriverManager(driver_version=full_version).install()
+        return self._cache_driver(pin, downloaded)
+    
+    def _daemon_address(self):
+        """Return the debugger address of a live browser daemon, if any."""
+        state = _load_json(DAEMON_STATE_FILE, None)
+        if not state:
+            return None
+        
+        try:
+            os.kill(state["pid"], 0)
+            with urllib.request.urlopen(f"http://127.0.0.1:{state['port']}/json/version", timeout=1):
+                pass
+        except (OSError, KeyError):
+            return None
+        return f"127.0.0.1:{state['port']}"
+    
+    def start_browser_daemon(self):
+        """Launch a detached headless Chrome that later runs attach to."""
+        address = self._daemon_address()
+        if address:
+            print(f"✅ Browser daemon already running at {address}")
+            return address
+        
+        binary = find_chrome_binary()
+        if not binary:
+            raise RuntimeError("Chrome/Chromium binary not found (set CHROME_BINARY)")
+        
+        profile_dir = CACHE_DIR / "daemon-profile"
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        args = [
+            binary,
+            "--headless=new",
+            f"--remote-debugging-port={self.daemon_port}",
+            f"--user-data-dir={profile_dir}",
+            "--no-first-run",
+            "--no-default-browser-check",
+        ] + [arg for arg in self.chrome_options.arguments if not arg.startswith(("--enable-logging", "--v="))]
+        
+        process = subprocess.Popen(
+            args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+        )
+        _save_json(DAEMON_STATE_FILE, {
+            "pid": process.pid,
+            "port": self.daemon_port,
+            "binary": binary,
+            "started_at": datetime.now().isoformat(),
+        })
+        
+        deadline = time.time() + 15
+        while time.time() < deadline:
+            address = self._daemon_address()
+            if address:
+                print(f"✅ Browser daemon started at {address} (pid {process.pid})")
+                return address
+            time.sleep(0.1)
+        
+        self.stop_browser_daemon()
+        raise RuntimeError("Browser daemon did not open its debugging port in time")
+    
+    def stop_browser_daemon(self):
+        """Terminate the browser daemon and forget its state."""
+        state = _load_json(DAEMON_STATE_FILE, None)
+        if not state:
+            print("ℹ️  No browser daemon running")
+            return False
+        
+        try:
+            os.kill(state["pid"], signal.SIGTERM)
+            print(f"✅ Stopped browser daemon (pid {state['pid']})")
+        except (OSError, KeyError):
+            print("ℹ️  Browser daemon was not running")
+        DAEMON_STATE_FILE.unlink(missing_ok=True)
+        return True
+    
     def _create_driver(self):
         """Create and configure Chrome WebDriver."""
+        start_time = time.perf_counter()
         try:
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=self.chrome_options)
+            service = Service(self._resolve_driver_path())
+            
+            address = self._daemon_address() if self.use_daemon else None
+            if self.use_daemon and not address:
+                print("⚠️  No browser daemon running, starting a fresh browser")
+            
+            if address:
+                # Attach to the warm browser instead of launching a new one
+                attach_options = Options()
+                attach_options.debugger_address = address
+                attach_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+                driver = webdriver.Chrome(service=service, options=attach_options)
+                driver.switch_to.new_window('tab')
+            else:
+                driver = webdriver.Chrome(service=service, options=self.chrome_options)
+            # Kept on the driver itself: crawl workers create and release drivers concurrently
+            driver.attached_to_daemon = bool(address)
+            
             driver.set_window_size(self.window_width, self.window_height)
+            print(f"⏱️  WebDriver ready in {time.perf_counter() - start_time:.2f}s"
+                  f"{' (warm daemon)' if driver.attached_to_daemon else ''}")
             return driver
         except Exception as e:
             print(f"Failed to create WebDriver: {e}")
             raise
     
+    def _release_driver(self, driver):
+        """Quit the driver, leaving a shared daemon browser running."""
+        for target in [t for t in list(self._profile_script_ids) if t[0] == driver.session_id]:
+            self._profile_script_ids.pop(target, None)
+        if not getattr(driver, 'attached_to_daemon', False):
+            driver.quit()
+            return
+        
+        try:
+            driver.close()  # Close only the tab this run opened
+        except Exception:
+            pass
+        driver.service.stop()
+    
     def _wait_for_page_load(self, driver, timeout=30):
         """Wait for page to fully load."""
         try:
@@ -97,61 +952,249 @@ class ChatScreenshotComparator:
         except Exception as e:
             print(f"Page load timeout: {e}")
     
+    def _install_stabilizer(self, driver):
+        """Freeze animations, the caret and the clock on every document (stabilize mode)."""
+        if not self.stabilize:
+            return
+        pinned_ms = int(datetime.fromisoformat(self.pinned_time).timestamp() * 1000)
+        try:
+            driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+                "source": STABILIZE_SCRIPT.replace("__PINNED_TIME_MS__", str(pinned_ms))
+            })
+            driver.set_script_timeout(self.stabilize_timeout + 5)
+        except Exception as e:
+            print(f"⚠️  Render stabilization unavailable: {e}")
+    
+    def _settle_page(self, driver):
+        """Wait for images, fonts and script animations to settle before a capture."""
+        try:
+            driver.execute_async_script(SETTLE_SCRIPT, self.stabilize_timeout * 1000)
+        except Exception as e:
+            print(f"  ⚠️  Page did not settle: {e}")
+    
+    def _record_variance(self, driver, filename, viewport_only=False):
+        """Re-capture the viewport and record how many pixels still change.
+        
+        ``viewport_only`` marks a stitched full-page ``filename``: the mask then
+        covers only the viewport at the recorded scroll offset, not the whole file.
+        """
+        samples = []
+        for index in range(self.stability_samples):
+            if index:
+                time.sleep(self.stability_interval)
+            png = driver.get_screenshot_as_png()
+            samples.append(np.asarray(Image.open(io.BytesIO(png)).convert("RGB")))
+        
+        mask, stats = measure_residual_variance(samples)
+        stats['file'] = filename
+        stats['viewport_only'] = viewport_only
+        if viewport_only:
+            stats['scroll_y'] = driver.execute_script("return window.scrollY")
+        if stats['changed_pixels']:
+            # White where the page is still moving, for excluding those pixels from diffs
+            stats['mask'] = filename.replace(".png", "_viewport_variance.png" if viewport_only else "_variance.png")
+            Image.fromarray(mask.astype(np.uint8) * 255).save(self.output_dir / stats['mask'])
+        self.stability[filename] = stats
+        
+        icon = "🧊" if not stats['changed_pixels'] else "🌊"
+        print(f"  {icon} Residual variance: {stats['changed_percentage']:.3f}% "
+              f"({stats['changed_pixels']} px, max delta {stats['max_delta']})"
+              f"{' of the viewport only' if viewport_only else ''}")
+        return stats
+    
+    def _install_perf_observers(self, driver):
+        """Register performance observers on every document the driver opens."""
+        try:
+            driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": PERF_OBSERVER_SCRIPT})
+        except Exception as e:
+            print(f"⚠️  Performance observers unavailable: {e}")
+    
+    def _collect_page_metrics(self, driver, app_name, url, timestamp):
+        """Collect page performance metrics and save them next to the screenshots."""
+        try:
+            metrics = driver.execute_script(PERF_COLLECT_SCRIPT)
+        except Exception as e:
+            print(f"  ⚠️  Could not collect performance metrics: {e}")
+            return None
+        
+        metrics.update({'app': app_name, 'url': url, 'timestamp': timestamp})
+        metrics_file = f"{app_name}_perf_{timestamp}.json"
+        with open(self.output_dir / metrics_file, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, indent=2)
+        metrics['file'] = metrics_file
+        
+        paint = metrics['paint']
+        print(f"  ⏱️  FCP {self._format_ms(paint['first_contentful_paint_ms'])}, "
+              f"LCP {self._format_ms(paint['largest_contentful_paint_ms'])}, "
+              f"{metrics['transfer']['transferred_bytes'] / 1024:.1f} KB transferred")
+        return metrics
+    
+    def _apply_capture_profile(self, driver, profile):
+        """Block the profile's resource classes for subsequent navigations."""
+        classes = CAPTURE_PROFILES[profile]
+        patterns = [pattern for name in classes for pattern in RESOURCE_CLASSES[name]]
+        
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        
+        # Script ids are only valid in the target that registered them, so they are kept per tab
+        target = (driver.session_id, driver.current_window_handle)
+        script_id = self._profile_script_ids.pop(target, None)
+        if script_id:
+            driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": script_id})
+        if "analytics" in classes:
+            result = driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument",
+                                            {"source": ANALYTICS_STUB_SCRIPT})
+            self._profile_script_ids[target] = result.get("identifier")
+        
+        self.capture_profile = profile
+        return patterns
+    
+    def _blocked_requests(self, har):
+        """URLs the active profile blocked, flagging any the chat widget needs."""
+        blocked = [
+            entry['request']['url'] for entry in har['log']['entries']
+            if entry['_blockedReason'] == 'inspector'
+        ]
+        for url in blocked:
+            if any(marker in url for marker in CHAT_REQUEST_MARKERS):
+                print(f"  ⚠️  Profile '{self.capture_profile}' blocked a chat request: {url}")
+        return blocked
+    
+    def _drain_network_events(self, driver):
+        """Return (and clear) buffered DevTools network events."""
+        events = []
+        try:
+            for record in driver.get_log("performance"):
+                message = json.loads(record['message'])['message']
+                if message['method'].startswith('Network.'):
+                    events.append(message)
+        except Exception as e:
+            print(f"  ⚠️  Network log unavailable: {e}")
+        return events
+    
+    def _navigation_start(self, driver):
+        """Wall-clock start of the current page's navigation, or None when unavailable."""
+        try:
+            return datetime.fromtimestamp(driver.execute_script("return performance.timeOrigin") / 1000,
+                                          timezone.utc)
+        except Exception:
+            return None
+    
+    def _collect_network_log(self, driver, app_name, url, timestamp, events):
+        """Write the page's HAR log and check it against the app's budgets."""
+        har = build_har(events, url, driver.title, self._navigation_start(driver))
+        har_file = f"{app_name}_network_{timestamp}.har"
+        with open(self.output_dir / har_file, 'w', encoding='utf-8') as f:
+            json.dump(har, f, indent=2)
+        
+        totals = summarize_har(har, url)
+        budget_key = f"saleor-{app_name}"
+        violations = check_budgets(totals, self.network_budgets.get(budget_key, {}))
+        
+        print(f"  🌐 {totals['request_count']} requests, {totals['total_bytes'] / 1024:.1f} KB "
+              f"({totals['js_bytes'] / 1024:.1f} KB JS, {totals['third_party_bytes'] / 1024:.1f} KB third-party)")
+        for violation in violations:
+            print(f"  ❌ Budget exceeded for {budget_key}: {violation['metric']} "
+                  f"{violation['actual']:,} > {violation['budget']:,}")
+        
+        blocked = self._blocked_requests(har)
+        if blocked:
+            print(f"  🚫 Profile '{self.capture_profile}' blocked {len(blocked)} requests")
+        
+        return {'file': har_file, 'budget_key': budget_key, 'totals': totals, 'violations': violations,
+                'profile': self.capture_profile, 'blocked': blocked}
+    
+    @staticmethod
+    def _format_ms(value):
+        """Format a millisecond value for display."""
+        return "n/a" if value is None else f"{value:.0f} ms"
+    
+    def _find_chat_button(self, driver):
+        """Locate the chat toggle button, falling back to bottom-right position."""
+        for selector in CHAT_BUTTON_SELECTORS:
+            try:
+                chat_button = WebDriverWait(driver, 5).until(
+                    EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
+                )
+                print(f"  ✅ Found chat button with selector: {selector}")
+                return chat_button
+            except:
+                continue
+        
+        # Try to find button by position (bottom-right corner)
+        try:
+            buttons = driver.find_elements(By.TAG_NAME, "button")
+            for button in buttons:
+                location = button.location
+                if location['x'] > self.window_width - 200 and location['y'] > self.window_height - 200:
+                    print("  ✅ Found chat button by position")
+                    return button
+        except:
+            pass
+        
+        return None
+    
+    def _find_chat_input(self, driver):
+        """Locate the chat message input field."""
+        input_selectors = [
+            "[data-testid='chat-input']",  # Primary selector with test ID
+            "input[placeholder*='message']",
+            "input[placeholder*='pesan']",
+            "input[aria-label*='message']",
+            "textarea[placeholder*='message']",
+            "input[type='text']",
+            ".chat-input input"
+        ]
+        
+        for selector in input_selectors:
+            try:
+                return driver.find_element(By.CSS_SELECTOR, selector)
+            except:
+                continue
+        return None
+    
+    def _click_send_button(self, driver, tracked=False):
+        """Click the chat send button; returns False when none was found.
+        
+        With ``tracked``, the benchmark tracker is pointed at the button before
+        the click, so sends are timed whichever selector matched.
+        """
+        for selector in CHAT_SEND_SELECTORS:
+            try:
+                send_button = driver.find_element(By.CSS_SELECTOR, selector)
+                if tracked:
+                    driver.execute_script("__chatBench.sendButton = arguments[0]", send_button)
+                send_button.click()
+                return True
+            except:
+                continue
+        return False
+    
     def _capture_chat_widget(self, driver, app_name, url):
         """Capture screenshots of chat widget in different states."""
         print(f"📸 Capturing {app_name} chat widget at {url}")
         
+        screenshots = {}
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        # Discard events from earlier pages so the HAR covers this page only
+        self._drain_network_events(driver)
+        
         try:
             # Navigate to the page
             driver.get(url)
             self._wait_for_page_load(driver)
             
-            screenshots = {}
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
             # 1. Initial state (chat button visible)
             print(f"  📋 Capturing initial state...")
             time.sleep(self.chat_wait_time)
             initial_screenshot = f"{app_name}_initial_{timestamp}.png"
-            driver.save_screenshot(str(self.output_dir / initial_screenshot))
+            self._save_capture(driver, initial_screenshot)
             screenshots['initial'] = initial_screenshot
             
             # 2. Try to find and click chat button with improved selectors
-            chat_selectors = [
-                "[data-testid='chat-button']",  # Primary selector with test ID
-                "button[aria-label*='chat']",
-                "button.chat-toggle-button",
-                "button[class*='chat']",
-                ".chat-widget button",
-                "button:has(.h-6.w-6)",  # Icon button
-                "button[class*='MessageCircle']",
-                "button[class*='bg-blue-600']",  # Blue button styling
-                "button[class*='rounded-full']",  # Round button styling
-            ]
-            
-            chat_button = None
-            for selector in chat_selectors:
-                try:
-                    chat_button = WebDriverWait(driver, 5).until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                    )
-                    print(f"  ✅ Found chat button with selector: {selector}")
-                    break
-                except:
-                    continue
-            
-            if not chat_button:
-                # Try to find button by position (bottom-right corner)
-                try:
-                    buttons = driver.find_elements(By.TAG_NAME, "button")
-                    for button in buttons:
-                        location = button.location
-                        if location['x'] > self.window_width - 200 and location['y'] > self.window_height - 200:
-                            chat_button = button
-                            print(f"  ✅ Found chat button by position")
-                            break
-                except:
-                    pass
+            chat_button = self._find_chat_button(driver)
             
             if chat_button:
                 # 3. Click chat button to open widget
@@ -162,28 +1205,12 @@ class ChatScreenshotComparator:
                 # 4. Capture opened chat widget
                 print(f"  📋 Capturing opened chat widget...")
                 opened_screenshot = f"{app_name}_opened_{timestamp}.png"
-                driver.save_screenshot(str(self.output_dir / opened_screenshot))
+                self._save_capture(driver, opened_screenshot)
                 screenshots['opened'] = opened_screenshot
                 
                 # 5. Try to interact with chat (send a test message)
                 try:
-                    input_selectors = [
-                        "[data-testid='chat-input']",  # Primary selector with test ID
-                        "input[placeholder*='message']",
-                        "input[placeholder*='pesan']",
-                        "input[aria-label*='message']",
-                        "textarea[placeholder*='message']",
-                        "input[type='text']",
-                        ".chat-input input"
-                    ]
-                    
-                    chat_input = None
-                    for selector in input_selectors:
-                        try:
-                            chat_input = driver.find_element(By.CSS_SELECTOR, selector)
-                            break
-                        except:
-                            continue
+                    chat_input = self._find_chat_input(driver)
                     
                     if chat_input:
                         print(f"  ⌨️  Sending test message...")
@@ -193,23 +1220,7 @@ class ChatScreenshotComparator:
                         time.sleep(0.5)
                         
                         # Try to find and click send button
-                        send_selectors = [
-                            "[data-testid='chat-send-button']",  # Primary selector with test ID
-                            "button[type='submit']",
-                            "button:has(.Send)",
-                            "button[aria-label*='send']",
-                            ".chat-input button",
-                            "button[class*='send']",
-                            "button[class*='bg-blue-600']:not([data-testid='chat-button'])"
-                        ]
-                        
-                        for selector in send_selectors:
-                            try:
-                                send_button = driver.find_element(By.CSS_SELECTOR, selector)
-                                send_button.click()
-                                break
-                            except:
-                                continue
+                        self._click_send_button(driver)
                         
                         # Wait for response
                         time.sleep(3)
@@ -217,7 +1228,7 @@ class ChatScreenshotComparator:
                         # 6. Capture chat with interaction
                         print(f"  📋 Capturing chat with interaction...")
                         interaction_screenshot = f"{app_name}_interaction_{timestamp}.png"
-                        driver.save_screenshot(str(self.output_dir / interaction_screenshot))
+                        self._save_capture(driver, interaction_screenshot)
                         screenshots['interaction'] = interaction_screenshot
                 
                 except Exception as e:
@@ -236,8 +1247,178 @@ class ChatScreenshotComparator:
             except:
                 pass
         
+        # Record performance data from the same browser session
+        metrics = self._collect_page_metrics(driver, app_name, url, timestamp)
+        if metrics:
+            self.page_metrics[app_name] = metrics
+        
+        events = self._drain_network_events(driver)
+        if events:
+            self.network_summaries[app_name] = self._collect_network_log(driver, app_name, url, timestamp, events)
+        
         return screenshots
     
+    def _save_capture(self, driver, filename):
+        """Save a viewport screenshot, or a stitched full-page one in full-page mode."""
+        if self.stabilize:
+            self._settle_page(driver)
+        
+        saved = False
+        if self.full_page:
+            try:
+                self._capture_full_page(driver, filename)
+                saved = True
+            except Exception as e:
+                print(f"  ⚠️  Full-page capture failed, saving viewport only: {e}")
+        if not saved:
+            driver.save_screenshot(str(self.output_dir / filename))
+        
+        if self.stabilize and self.stability_samples > 1:
+            try:
+                self._record_variance(driver, filename, viewport_only=saved and self.full_page)
+            except Exception as e:
+                print(f"  ⚠️  Could not measure residual variance: {e}")
+    
+    def _capture_full_page(self, driver, filename):
+        """Scroll through the page, save viewport tiles and stitch them on disk.
+        
+        Fixed elements (such as the chat button) are kept in the first tile
+        only, and sticky ones are unpinned to their place in the page, so
+        neither is repeated down the stitched page.
+        """
+        tile_dir = self.output_dir / f"{Path(filename).stem}_tiles"
+        tile_dir.mkdir(exist_ok=True)
+        original_scroll = driver.execute_script("return window.scrollY")
+        viewport_height = driver.execute_script("return window.innerHeight")
+        
+        tiles = []  # (tile path, scroll offset in CSS pixels)
+        try:
+            scroll_y = 0
+            while len(tiles) < self.max_scroll_tiles:
+                page_height = driver.execute_script(
+                    "return Math.max(document.documentElement.scrollHeight, document.body.scrollHeight)"
+                )
+                driver.execute_script("window.scrollTo(0, arguments[0])", scroll_y)
+                driver.execute_async_script(WAIT_FOR_PAINT_SCRIPT)
+                actual_y = driver.execute_script("return window.scrollY")
+                
+                tile_path = tile_dir / f"tile_{len(tiles):03d}.png"
+                tile_path.write_bytes(driver.get_screenshot_as_png())
+                tiles.append((tile_path, actual_y))
+                
+                if len(tiles) == 1:
+                    driver.execute_script(HIDE_FIXED_SCRIPT)
+                if actual_y + viewport_height >= page_height:
+                    break
+                scroll_y = actual_y + viewport_height
+        finally:
+            driver.execute_script(RESTORE_FIXED_SCRIPT)
+            driver.execute_script("window.scrollTo(0, arguments[0])", original_scroll)
+        
+        self._stitch_tiles(tiles, viewport_height, self.output_dir / filename)
+        if not self.keep_tiles:
+            shutil.rmtree(tile_dir, ignore_errors=True)
+        print(f"  🧩 Stitched {len(tiles)} tiles into {filename}")
+    
+    def _stitch_tiles(self, tiles, viewport_height, output_path):
+        """Stream overlapping viewport tiles into one PNG, one strip at a time."""
+        with PNGStripReader(tiles[0][0]) as first:
+            width = first.width
+            # Screenshots are in device pixels; scroll offsets are CSS pixels
+            scale = first.height / viewport_height
+        
+        last_path, last_y = tiles[-1]
+        with PNGStripReader(last_path) as last:
+            height = round(last_y * scale) + last.height
+        
+        def strips():
+            covered = 0
+            for tile_path, scroll_y in tiles:
+                offset = round(scroll_y * scale)
+                with PNGStripReader(tile_path) as reader:
+                    for y, strip in reader.iter_strips(self.strip_height):
+                        # Drop rows already supplied by the previous tile
+                        page_y = offset + y
+                        skip = max(0, covered - page_y)
+                        if skip >= strip.shape[0]:
+                            continue
+                        strip = strip[skip:, :width]
+                        covered = page_y + skip + strip.shape[0]
+                        yield strip
+        
+        write_strips(output_path, width, height, strips())
+    
+    @staticmethod
+    def _load_fonts():
+        """Title and label fonts for comparison images."""
+        try:
+            # Try to use a nice font
+            title_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 24)
+            label_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 18)
+        except:
+            # Fallback to default font
+            title_font = ImageFont.load_default()
+            label_font = ImageFont.load_default()
+        return title_font, label_font
+    
+    def _compose_comparison_tiled(self, state, storefront_file, backoffice_file, comparison_filename):
+        """Stream a side-by-side comparison to disk one strip at a time.
+        
+        Produces the same layout as the in-memory path, but only the header
+        band and one strip per source image are ever held in memory.
+        """
+        with PNGStripReader(self.output_dir / storefront_file) as storefront_reader, \
+                PNGStripReader(self.output_dir / backoffice_file) as backoffice_reader:
+            max_width = max(storefront_reader.width, backoffice_reader.width)
+            max_height = max(storefront_reader.height, backoffice_reader.height)
+            comparison_width = max_width * 2 + 60
+            comparison_height = max_height + 100
+            
+            # Title and labels live in the top 80px band
+            header = Image.new('RGB', (comparison_width, 80), 'white')
+            draw = ImageDraw.Draw(header)
+            title_font, label_font = self._load_fonts()
+            title = f"Chat Widget Comparison - {state.title()} State"
+            title_bbox = draw.textbbox((0, 0), title, font=title_font)
+            draw.text(((comparison_width - (title_bbox[2] - title_bbox[0])) // 2, 20), title,
+                      fill='black', font=title_font)
+            draw.text((30, 50), "Storefront", fill='blue', font=label_font)
+            draw.text((max_width + 30, 50), "Backoffice", fill='green', font=label_font)
+            
+            divider = np.full((comparison_height - 100 + 1, 2, 3), 128, dtype=np.uint8)
+            layers = [
+                (0, 0, np.asarray(header)),
+                (30, 80, RowSource(storefront_reader, self.strip_height)),
+                (max_width + 30, 80, RowSource(backoffice_reader, self.strip_height)),
+                (max_width + 15, 80, divider),
+            ]
+            write_strips(
+                self.output_dir / comparison_filename, comparison_width, comparison_height,
+                compose_strips(comparison_width, comparison_height, layers, strip_height=self.strip_height)
+            )
+    
+    def _thumbnail(self, filename):
+        """Write a downscaled copy of a PNG for the report, streaming strip by strip."""
+        thumb_filename = filename.replace(".png", "_thumb.png")
+        if not (self.output_dir / thumb_filename).exists():
+            # Strip height must be a multiple of the scale factor
+            strip_height = self.thumbnail_scale * max(1, self.strip_height // self.thumbnail_scale)
+            with PNGStripReader(self.output_dir / filename) as reader:
+                write_strips(
+                    self.output_dir / thumb_filename, reader.width, reader.height,
+                    (strip for _, strip in reader.iter_strips(strip_height)), scale=self.thumbnail_scale
+                )
+        return thumb_filename
+    
+    def _report_image(self, filename, alt):
+        """HTML for a report image, linking a thumbnail to the full image in thumbnail mode."""
+        if self.thumbnail_scale > 1 and filename.endswith(".png"):
+            try:
+                return f'<a href="{filename}"><img src="{self._thumbnail(filename)}" alt="{alt}"></a>'
+            except (OSError, ValueError) as e:
+                print(f"  ⚠️  Could not create thumbnail for {filename}: {e}")
+        return f'<img src="{filename}" alt="{alt}">'
+    
     def _create_comparison_image(self, storefront_screenshots, backoffice_screenshots):
         """Create side-by-side comparison images."""
         print("🎨 Creating comparison images...")
@@ -263,6 +1444,13 @@ class ChatScreenshotComparator:
         
         for state, storefront_file, backoffice_file in comparison_pairs:
             try:
+                if self.tiled_composition:
+                    comparison_filename = f"comparison_{state}_{timestamp}.png"
+                    self._compose_comparison_tiled(state, storefront_file, backoffice_file, comparison_filename)
+                    comparison_files.append(comparison_filename)
+                    print(f"  ✅ Created: {comparison_filename} (tiled)")
+                    continue
+                
                 # Load images
                 storefront_img = Image.open(self.output_dir / storefront_file)
                 backoffice_img = Image.open(self.output_dir / backoffice_file)
@@ -283,15 +1471,7 @@ class ChatScreenshotComparator:
                 
                 # Add labels and title
                 draw = ImageDraw.Draw(comparison_img)
-                
-                try:
-                    # Try to use a nice font
-                    title_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 24)
-                    label_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 18)
-                except:
-                    # Fallback to default font
-                    title_font = ImageFont.load_default()
-                    label_font = ImageFont.load_default()
+                title_font, label_font = self._load_fonts()
                 
                 # Draw title
                 title = f"Chat Widget Comparison - {state.title()} State"
@@ -319,7 +1499,8 @@ class ChatScreenshotComparator:
         
         return comparison_files
     
-    def _generate_report(self, storefront_screenshots, backoffice_screenshots, comparison_files):
+    def _generate_report(self, storefront_screenshots, backoffice_screenshots, comparison_files,
+                         page_metrics=None, network_summaries=None, stability=None):
         """Generate HTML report with all screenshots."""
         print("📝 Generating HTML report...")
         
@@ -427,6 +1608,25 @@ class ChatScreenshotComparator:
         .url-item strong {{
             color: #333;
         }}
+        .metrics-table {{
+            width: 100%;
+            border-collapse: collapse;
+            margin-bottom: 20px;
+        }}
+        .metrics-table th,
+        .metrics-table td {{
+            padding: 8px 12px;
+            text-align: right;
+            border-bottom: 1px solid #ddd;
+        }}
+        .metrics-table th:first-child,
+        .metrics-table td:first-child {{
+            text-align: left;
+        }}
+        .metrics-table th {{
+            background-color: #f8f9fa;
+            color: #444;
+        }}
     </style>
 </head>
 <body>
@@ -448,13 +1648,24 @@ class ChatScreenshotComparator:
         for comparison_file in comparison_files:
             html_content += f"""
             <div>
-                <img src="{comparison_file}" alt="Chat Comparison">
+                {self._report_image(comparison_file, "Chat Comparison")}
             </div>
 """
         
         html_content += """
         </div>
+"""
+        
+        if page_metrics:
+            html_content += self._render_metrics_table(page_metrics)
+        
+        if network_summaries:
+            html_content += self._render_network_table(network_summaries)
         
+        if stability:
+            html_content += self._render_stability_table(stability)
+        
+        html_content += """
         <div class="section">
             <h2>📱 Individual Screenshots</h2>
             <div class="screenshot-grid">
@@ -472,7 +1683,7 @@ class ChatScreenshotComparator:
                 html_content += f"""
                 <div class="screenshot-item">
                     <h3>{app_name} - {state.title()} <span class="status {status_class}">{state}</span></h3>
-                    <img src="{filename}" alt="{app_name} {state}">
+                    {self._report_image(filename, f"{app_name} {state}")}
                 </div>
 """
         
@@ -503,16 +1714,981 @@ class ChatScreenshotComparator:
         print(f"  ✅ Created: {report_filename}")
         return report_filename
     
-    def run_comparison(self):
-        """Execute the complete screenshot comparison process."""
-        print("🚀 Starting Chat Widget Screenshot Comparison")
-        print(f"📁 Output directory: {self.output_dir}")
+    def _render_metrics_table(self, page_metrics):
+        """Render the performance summary table for the HTML report."""
+        rows = ""
+        for app_name, metrics in page_metrics.items():
+            navigation = metrics.get('navigation') or {}
+            paint = metrics['paint']
+            long_tasks = metrics['long_tasks']
+            heap = metrics.get('js_heap')
+            cls = metrics.get('cumulative_layout_shift')
+            rows += f"""
+                    <tr>
+                        <td><a href="{metrics['file']}">{app_name.title()}</a></td>
+                        <td>{self._format_ms(navigation.get('ttfb_ms'))}</td>
+                        <td>{self._format_ms(navigation.get('dom_content_loaded_ms'))}</td>
+                        <td>{self._format_ms(navigation.get('load_ms'))}</td>
+                        <td>{self._format_ms(paint['first_contentful_paint_ms'])}</td>
+                        <td>{self._format_ms(paint['largest_contentful_paint_ms'])}</td>
+                        <td>{'n/a' if cls is None else f'{cls:.3f}'}</td>
+                        <td>{long_tasks['count']} / {long_tasks['total_ms']:.0f} ms</td>
+                        <td>{'n/a' if not heap else f"{heap['used_bytes'] / 1048576:.1f} MB"}</td>
+                        <td>{metrics['transfer']['transferred_bytes'] / 1024:.1f} KB ({metrics['transfer']['resource_count']} req)</td>
+                    </tr>
+"""
         
-        storefront_screenshots = {}
-        backoffice_screenshots = {}
+        return f"""
+        <div class="section">
+            <h2>⏱️ Page Performance</h2>
+            <table class="metrics-table">
+                <thead>
+                    <tr>
+                        <th>App</th>
+                        <th>TTFB</th>
+                        <th>DOMContentLoaded</th>
+                        <th>Load</th>
+                        <th>FCP</th>
+                        <th>LCP</th>
+                        <th>CLS</th>
+                        <th>Long Tasks</th>
+                        <th>JS Heap</th>
+                        <th>Transferred</th>
+                    </tr>
+                </thead>
+                <tbody>{rows}
+                </tbody>
+            </table>
+        </div>
+"""
+    
+    def _render_stability_table(self, stability):
+        """Render residual run-to-run variance per capture for the HTML report."""
+        rows = ""
+        for filename, stats in stability.items():
+            status = "success" if not stats['changed_pixels'] else "warning"
+            bbox = stats['bbox']
+            rows += f"""
+                    <tr>
+                        <td><a href="{filename}">{filename}</a></td>
+                        <td>{stats['samples']}</td>
+                        <td><span class="status {status}">{stats['changed_percentage']:.3f}%</span></td>
+                        <td>{stats['changed_pixels']}</td>
+                        <td>{stats['max_delta']}</td>
+                        <td>{f'<a href="{stats["mask"]}">{bbox[2] - bbox[0]}x{bbox[3] - bbox[1]} @ {bbox[0]},{bbox[1]}</a>' if bbox else '—'}{f' (viewport at scroll {stats["scroll_y"]})' if stats.get('viewport_only') else ''}</td>
+                    </tr>
+"""
         
-        # Create WebDriver
-        driver = self._create_driver()
+        return f"""
+        <div class="section">
+            <h2>🧊 Render Stability</h2>
+            <p>Pixels that still changed between back-to-back viewport captures after stabilization.
+               Differences inside these areas are noise, not regressions.</p>
+            <table class="metrics-table">
+                <thead>
+                    <tr>
+                        <th>Capture</th>
+                        <th>Samples</th>
+                        <th>Changed</th>
+                        <th>Pixels</th>
+                        <th>Max Delta</th>
+                        <th>Varying Region</th>
+                    </tr>
+                </thead>
+                <tbody>{rows}
+                </tbody>
+            </table>
+        </div>
+"""
+    
+    def _render_network_table(self, network_summaries):
+        """Render network totals against their budgets for the HTML report."""
+        rows = ""
+        for app_name, summary in network_summaries.items():
+            budgets = self.network_budgets.get(summary['budget_key'], {})
+            exceeded = {v['metric'] for v in summary['violations']}
+            
+            def cell(metric, kilobytes=True):
+                value = summary['totals'][metric]
+                text = f"{value / 1024:.1f} KB" if kilobytes else f"{value}"
+                if metric in budgets:
+                    limit = budgets[metric]
+                    text += f" / {limit / 1024:.0f} KB" if kilobytes else f" / {limit}"
+                status = "warning" if metric in exceeded else "success"
+                return f'<td><span class="status {status}">{text}</span></td>' if metric in budgets else f"<td>{text}</td>"
+            
+            rows += f"""
+                    <tr>
+                        <td><a href="{summary['file']}">{summary['budget_key']}</a></td>
+                        {cell('request_count', kilobytes=False)}
+                        {cell('total_bytes')}
+                        {cell('js_bytes')}
+                        {cell('css_bytes')}
+                        {cell('image_bytes')}
+                        {cell('third_party_bytes')}
+                    </tr>
+"""
+        
+        return f"""
+        <div class="section">
+            <h2>🌐 Network Budgets</h2>
+            <table class="metrics-table">
+                <thead>
+                    <tr>
+                        <th>App</th>
+                        <th>Requests</th>
+                        <th>Total</th>
+                        <th>JS</th>
+                        <th>CSS</th>
+                        <th>Images</th>
+                        <th>Third-Party</th>
+                    </tr>
+                </thead>
+                <tbody>{rows}
+                </tbody>
+            </table>
+        </div>
+"""
+    
+    def _benchmark_app(self, driver, app_name, url, messages):
+        """Send scripted messages through the widget and time each reply in-page."""
+        print(f"⏱️  Benchmarking {app_name} chat at {url}")
+        
+        driver.get(url)
+        self._wait_for_page_load(driver)
+        
+        chat_button = self._find_chat_button(driver)
+        if not chat_button:
+            print("  ⚠️  Could not find chat button")
+            return {'url': url, 'error': 'chat button not found', 'samples': []}
+        
+        ActionChains(driver).move_to_element(chat_button).click().perform()
+        time.sleep(self.interaction_delay)
+        driver.execute_script(BENCHMARK_TRACKER_SCRIPT, self.reply_selector)
+        
+        samples = []
+        for index, message in enumerate(messages, 1):
+            chat_input = self._find_chat_input(driver)
+            if not chat_input:
+                samples.append({'message': message, 'error': 'chat input not found'})
+                break
+            
+            try:
+                # The input stays disabled until the chat session connects
+                WebDriverWait(driver, self.benchmark_timeout).until(lambda d: chat_input.is_enabled())
+                before = driver.execute_script(
+                    "return {sends: __chatBench.sends.length, replies: __chatBench.replies.length}"
+                )
+                
+                chat_input.clear()
+                chat_input.send_keys(message)
+                if not self._click_send_button(driver, tracked=True):
+                    chat_input.send_keys(Keys.ENTER)
+                
+                WebDriverWait(driver, self.benchmark_timeout, poll_frequency=0.05).until(
+                    lambda d: d.execute_script("return __chatBench.replies.length") > before['replies']
+                )
+                # Streaming replies keep mutating; wait until the last one is quiet
+                WebDriverWait(driver, self.benchmark_timeout, poll_frequency=0.05).until(
+                    lambda d: d.execute_script(
+                        "const r = __chatBench.replies; return performance.now() - r[r.length - 1].settled > arguments[0]",
+                        self.reply_settle_ms
+                    )
+                )
+            except TimeoutException:
+                print(f"  ❌ [{index}/{len(messages)}] No reply to {message!r} within {self.benchmark_timeout}s")
+                samples.append({'message': message, 'error': 'timeout'})
+                # A late reply would be taken for the next message's; let it arrive and settle first
+                if not self._await_late_reply(driver, before['replies']):
+                    print("  ⚠️  Still no reply; stopping so a late reply is not timed as the next one")
+                    break
+                continue
+            
+            timing = driver.execute_script(
+                "return {send: __chatBench.sends[arguments[0]], reply: __chatBench.replies[arguments[1]]}",
+                before['sends'], before['replies']
+            )
+            if timing['send'] is None:
+                samples.append({'message': message, 'error': 'send not observed'})
+                continue
+            if timing['reply']['rendered'] < timing['send']:
+                samples.append({'message': message, 'error': 'reply rendered before send'})
+                continue
+            
+            sample = {
+                'message': message,
+                'first_render_ms': timing['reply']['rendered'] - timing['send'],
+                'settled_ms': timing['reply']['settled'] - timing['send'],
+            }
+            samples.append(sample)
+            print(f"  ✅ [{index}/{len(messages)}] {message!r}: first render {sample['first_render_ms']:.0f} ms, "
+                  f"settled {sample['settled_ms']:.0f} ms")
+        
+        ok_samples = [s for s in samples if 'error' not in s]
+        return {
+            'url': url,
+            'samples': samples,
+            'errors': len(samples) - len(ok_samples),
+            'first_render_ms': summarize_latencies([s['first_render_ms'] for s in ok_samples]),
+            'settled_ms': summarize_latencies([s['settled_ms'] for s in ok_samples]),
+        }
+    
+    def _await_late_reply(self, driver, reply_count):
+        """Wait another timeout for a reply beyond ``reply_count`` to arrive and settle."""
+        try:
+            WebDriverWait(driver, self.benchmark_timeout, poll_frequency=0.05).until(
+                lambda d: d.execute_script(
+                    "const r = __chatBench.replies; "
+                    "return r.length > arguments[0] && performance.now() - r[r.length - 1].settled > arguments[1]",
+                    reply_count, self.reply_settle_ms
+                )
+            )
+            return True
+        except TimeoutException:
+            return False
+    
+    def _record_frames(self, driver, action, done, timeout):
+        """Record animation frames around ``action`` until ``done`` holds."""
+        driver.execute_script(FRAME_RECORDER_SCRIPT, self.widget_selector)
+        start = driver.execute_script("return __frameRec.start")
+        action()
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=0.05).until(done)
+        except TimeoutException:
+            print(f"  ⚠️  Animation did not settle within {timeout}s")
+        
+        recording = driver.execute_script(
+            "__frameRec.running = false; return {frames: __frameRec.frames, changes: __frameRec.changes}"
+        )
+        return summarize_frames(recording['frames'], recording['changes'], start)
+    
+    def _frame_timing_app(self, driver, app_name, url, message):
+        """Measure open-animation and reply-streaming smoothness for one app."""
+        print(f"🎞️  Recording {app_name} chat animation frames at {url}")
+        
+        driver.get(url)
+        self._wait_for_page_load(driver)
+        
+        chat_button = self._find_chat_button(driver)
+        if not chat_button:
+            print("  ⚠️  Could not find chat button")
+            return {'url': url, 'error': 'chat button not found'}
+        
+        quiet_script = (
+            "const c = __frameRec.changes; "
+            "return c.length > 0 && performance.now() - c[c.length - 1] > arguments[0]"
+        )
+        phases = {}
+        
+        # Phase 1: widget open animation
+        phases['open'] = self._record_frames(
+            driver,
+            lambda: ActionChains(driver).move_to_element(chat_button).click().perform(),
+            lambda d: d.execute_script(quiet_script, self.animation_quiet_ms),
+            self.animation_timeout
+        )
+        print(f"  ✅ open: settled in {phases['open']['settle_ms']:.0f} ms, "
+              f"{phases['open']['dropped_frames']} dropped frames")
+        
+        # Phase 2: assistant reply streaming into the message list
+        chat_input = self._find_chat_input(driver)
+        if chat_input:
+            driver.execute_script(BENCHMARK_TRACKER_SCRIPT, self.reply_selector)
+            WebDriverWait(driver, self.benchmark_timeout).until(lambda d: chat_input.is_enabled())
+            chat_input.send_keys(message)
+            
+            def send():
+                if not self._click_send_button(driver, tracked=True):
+                    chat_input.send_keys(Keys.ENTER)
+            
+            phases['stream'] = self._record_frames(
+                driver,
+                send,
+                lambda d: d.execute_script(
+                    "const r = __chatBench.replies; "
+                    "return r.length > 0 && performance.now() - r[r.length - 1].settled > arguments[0]",
+                    self.reply_settle_ms
+                ),
+                self.benchmark_timeout
+            )
+            print(f"  ✅ stream: settled in {phases['stream']['settle_ms']:.0f} ms, "
+                  f"{phases['stream']['dropped_frames']} dropped frames")
+        else:
+            print("  ⚠️  Could not find chat input, skipping stream phase")
+        
+        return {'url': url, 'phases': phases}
+    
+    def run_frame_timing(self, message="halo"):
+        """Record frame timing of the chat widget animations in both apps."""
+        print("🚀 Starting Chat Widget Frame Timing")
+        
+        results = {}
+        driver = self._create_driver()
+        try:
+            if self.cpu_throttle_rate > 1:
+                # Emulate a low-end device by slowing down the renderer's CPU
+                driver.execute_cdp_cmd("Emulation.setCPUThrottlingRate", {"rate": self.cpu_throttle_rate})
+                print(f"🐢 CPU throttled {self.cpu_throttle_rate}x")
+            
+            for app_name, url in [("storefront", self.storefront_url), ("backoffice", self.backoffice_url)]:
+                try:
+                    results[app_name] = self._frame_timing_app(driver, app_name, url, message)
+                except Exception as e:
+                    print(f"  ❌ Error recording {app_name}: {e}")
+                    results[app_name] = {'url': url, 'error': str(e)}
+        finally:
+            self._release_driver(driver)
+        
+        def fmt(value):
+            return "-" if value is None else f"{value:.1f}"
+        
+        print("\n📊 Frame timing          settle  frames  dropped  p50    p90    p99")
+        for app_name, result in results.items():
+            for phase, stats in result.get('phases', {}).items():
+                frame_time = stats['frame_time_ms']
+                print(f"  {app_name:<10} {phase:<7} {stats['settle_ms']:>6.0f} {stats['frames']:>7} "
+                      f"{stats['dropped_frames']:>8}  {fmt(frame_time['p50']):<6} "
+                      f"{fmt(frame_time['p90']):<6} {fmt(frame_time['p99'])}")
+        
+        report_filename = f"chat_frame_timing_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(self.output_dir / report_filename, 'w', encoding='utf-8') as f:
+            json.dump({'cpu_throttle_rate': self.cpu_throttle_rate, 'results': results}, f, indent=2)
+        print(f"📄 Frame timing results: {self.output_dir / report_filename}")
+        
+        return results
+    
+    def run_benchmark(self, message_count, messages=None):
+        """Measure in-browser chat round-trip latency for both apps."""
+        print(f"🚀 Starting Chat Round-Trip Benchmark ({message_count} messages per app)")
+        
+        script = messages or BENCHMARK_MESSAGES
+        messages = [script[i % len(script)] for i in range(message_count)]
+        
+        results = {}
+        driver = self._create_driver()
+        try:
+            for app_name, url in [("storefront", self.storefront_url), ("backoffice", self.backoffice_url)]:
+                try:
+                    results[app_name] = self._benchmark_app(driver, app_name, url, messages)
+                except Exception as e:
+                    print(f"  ❌ Error benchmarking {app_name}: {e}")
+                    results[app_name] = {'url': url, 'error': str(e), 'samples': []}
+        finally:
+            self._release_driver(driver)
+        
+        print("\n📊 Reply latency (ms)        count    p50    p90    p95    max")
+        for app_name, result in results.items():
+            for metric in ('first_render_ms', 'settled_ms'):
+                summary = result.get(metric, {'count': 0})
+                if summary['count']:
+                    print(f"  {app_name:<10} {metric[:-3]:<14} {summary['count']:>5} {summary['p50']:>6.0f} "
+                          f"{summary['p90']:>6.0f} {summary['p95']:>6.0f} {summary['max']:>6.0f}")
+                else:
+                    print(f"  {app_name:<10} {metric[:-3]:<14}     0      -      -      -      -")
+        
+        report_filename = f"chat_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(self.output_dir / report_filename, 'w', encoding='utf-8') as f:
+            json.dump({'messages': messages, 'results': results}, f, indent=2)
+        print(f"📄 Benchmark results: {self.output_dir / report_filename}")
+        
+        return results
+    
+    def run_profile_comparison(self, profiles):
+        """Capture both apps under each profile and report blocked requests and time saved."""
+        print(f"🚀 Comparing capture profiles: {', '.join(profiles)}")
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        results = {profile: {} for profile in profiles}
+        
+        driver = self._create_driver()
+        try:
+            # Every profile must fetch from the network, otherwise later profiles load from a warm cache
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": True})
+            for profile in profiles:
+                driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+                self._apply_capture_profile(driver, profile)
+                print(f"🧰 Profile '{profile}': blocking {', '.join(CAPTURE_PROFILES[profile]) or 'nothing'}")
+                
+                for app_name, url in [("storefront", self.storefront_url), ("backoffice", self.backoffice_url)]:
+                    self._drain_network_events(driver)
+                    started_at = datetime.now(timezone.utc)
+                    start_time = time.perf_counter()
+                    driver.get(url)
+                    WebDriverWait(driver, 30).until(
+                        lambda d: d.execute_script("return document.readyState") == "complete"
+                    )
+                    load_seconds = time.perf_counter() - start_time
+                    
+                    screenshot = f"{app_name}_initial_{profile}_{timestamp}.png"
+                    driver.save_screenshot(str(self.output_dir / screenshot))
+                    
+                    har = build_har(self._drain_network_events(driver), url, driver.title, started_at)
+                    blocked = self._blocked_requests(har)
+                    results[profile][app_name] = {
+                        'load_seconds': load_seconds,
+                        'screenshot': screenshot,
+                        'requests': len(har['log']['entries']) - len(blocked),
+                        'blocked': blocked,
+                    }
+                    print(f"  📸 {app_name}: {load_seconds:.2f}s, {len(blocked)} requests blocked")
+        finally:
+            self._release_driver(driver)
+        
+        # Savings are measured against the "full" profile, or the first one run
+        baseline = "full" if "full" in results else profiles[0]
+        for profile, apps in results.items():
+            for app_name, result in apps.items():
+                result['saved_seconds'] = results[baseline][app_name]['load_seconds'] - result['load_seconds']
+        
+        report_file = self._generate_profile_report(results, baseline, timestamp)
+        with open(self.output_dir / f"capture_profiles_{timestamp}.json", 'w', encoding='utf-8') as f:
+            json.dump({'baseline': baseline, 'results': results}, f, indent=2)
+        print(f"📄 Profile report: {self.output_dir / report_file}")
+        return results
+    
+    def _generate_profile_report(self, results, baseline, timestamp):
+        """Write an HTML summary of what each capture profile blocked."""
+        rows = ""
+        details = ""
+        for profile, apps in results.items():
+            for app_name, result in apps.items():
+                rows += f"""
+                <tr>
+                    <td>{profile}</td>
+                    <td>{app_name.title()}</td>
+                    <td>{result['load_seconds']:.2f}s</td>
+                    <td>{result['saved_seconds']:+.2f}s</td>
+                    <td>{result['requests']}</td>
+                    <td>{len(result['blocked'])}</td>
+                    <td><a href="{result['screenshot']}">screenshot</a></td>
+                </tr>
+"""
+                if result['blocked']:
+                    items = "".join(f"<li>{url}</li>" for url in result['blocked'])
+                    details += f"<h3>{profile} / {app_name}</h3><ul>{items}</ul>"
+        
+        html_content = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Capture Profile Comparison</title>
+    <style>
+        body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; margin: 20px; }}
+        table {{ border-collapse: collapse; width: 100%; }}
+        th, td {{ padding: 8px 12px; border-bottom: 1px solid #ddd; text-align: left; }}
+        th {{ background-color: #f8f9fa; }}
+        li {{ font-family: monospace; font-size: 12px; }}
+    </style>
+</head>
+<body>
+    <h1>🧰 Capture Profile Comparison</h1>
+    <p>Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} &middot; time saved relative to <strong>{baseline}</strong></p>
+    <table>
+        <thead>
+            <tr><th>Profile</th><th>App</th><th>Load</th><th>Saved</th><th>Requests</th><th>Blocked</th><th>Capture</th></tr>
+        </thead>
+        <tbody>{rows}
+        </tbody>
+    </table>
+    <h2>Blocked Requests</h2>
+    {details or "<p>No requests were blocked.</p>"}
+</body>
+</html>
+"""
+        report_filename = f"capture_profiles_{timestamp}.html"
+        with open(self.output_dir / report_filename, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+        return report_filename
+    
+    @staticmethod
+    def _route_slug(path):
+        """Filesystem-safe name for a route path."""
+        return re.sub(r"[^A-Za-z0-9_-]+", "-", path.strip("/")).strip("-") or "root"
+    
+    def _discover_links(self, driver, base_url):
+        """Same-origin link paths on the current page."""
+        base = urlparse(base_url)
+        try:
+            hrefs = driver.execute_script(LINK_DISCOVERY_SCRIPT) or []
+        except Exception:
+            return []
+        
+        paths = []
+        for href in hrefs:
+            parsed = urlparse(href)
+            if parsed.scheme not in ("http", "https") or parsed.netloc != base.netloc:
+                continue
+            path = parsed.path or "/"
+            if not CRAWL_SKIP_PATTERN.search(path):
+                paths.append(path)
+        return paths
+    
+    def _crawl_route(self, driver, app_name, path, timestamp, discover):
+        """Capture one route and time each step."""
+        url = urljoin(self.storefront_url if app_name == "storefront" else self.backoffice_url, path)
+        result = {'app': app_name, 'route': path, 'url': url, 'status': 'ok', 'widget': None, 'links': []}
+        start_time = time.perf_counter()
+        
+        try:
+            driver.get(url)
+            result['load_seconds'] = time.perf_counter() - start_time
+            
+            # Wait for the widget to mount, but never longer than chat_wait_time
+            try:
+                result['widget'] = WebDriverWait(driver, self.chat_wait_time, poll_frequency=0.25).until(
+                    lambda d: d.execute_script(CHAT_WIDGET_PROBE_SCRIPT, CHAT_BUTTON_SELECTORS)
+                )
+                result['widget_seconds'] = time.perf_counter() - start_time
+            except TimeoutException:
+                pass
+            
+            capture_start = time.perf_counter()
+            screenshot = f"{app_name}_{self._route_slug(path)}_{timestamp}.png"
+            self._save_capture(driver, screenshot)
+            result['screenshot'] = screenshot
+            result['capture_seconds'] = time.perf_counter() - capture_start
+            
+            try:
+                metrics = driver.execute_script(PERF_COLLECT_SCRIPT)
+                result['metrics'] = {
+                    'load_ms': (metrics.get('navigation') or {}).get('load_ms'),
+                    'first_contentful_paint_ms': metrics['paint']['first_contentful_paint_ms'],
+                    'largest_contentful_paint_ms': metrics['paint']['largest_contentful_paint_ms'],
+                    'transferred_bytes': metrics['transfer']['transferred_bytes'],
+                }
+            except Exception:
+                result['metrics'] = None
+            
+            if discover:
+                result['links'] = self._discover_links(driver, url)
+        except TimeoutException:
+            result['status'] = 'timeout'
+        except Exception as e:
+            result['status'] = 'error'
+            result['error'] = str(e).splitlines()[0] if str(e) else type(e).__name__
+        
+        result['total_seconds'] = time.perf_counter() - start_time
+        return result
+    
+    def run_crawl(self, routes=None, discover=True):
+        """Capture every route of both apps through a bounded browser pool.
+        
+        Routes come from ``routes`` (``{app: [paths]}``, default
+        DEFAULT_CRAWL_ROUTES) plus, with ``discover``, same-origin links found
+        on captured pages. Work stops being scheduled once ``crawl_budget``
+        seconds have elapsed; unvisited routes are reported as skipped.
+        """
+        routes = routes or DEFAULT_CRAWL_ROUTES
+        print(f"🕷️  Crawling {sum(len(p) for p in routes.values())} seed routes with "
+              f"{self.crawl_workers} browsers ({self.crawl_budget:.0f}s budget)")
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        pending = queue.Queue()
+        lock = threading.Lock()
+        seen = set()
+        per_app = {}
+        active = [0]
+        results = []
+        
+        def enqueue(app_name, path):
+            with lock:
+                if (app_name, path) in seen or per_app.get(app_name, 0) >= self.crawl_max_routes:
+                    return
+                seen.add((app_name, path))
+                per_app[app_name] = per_app.get(app_name, 0) + 1
+            pending.put((app_name, path))
+        
+        for app_name, paths in routes.items():
+            for path in paths:
+                enqueue(app_name, path)
+        
+        start_time = time.perf_counter()
+        deadline = time.monotonic() + self.crawl_budget
+        
+        def worker(index):
+            try:
+                driver = self._create_driver()
+                self._install_perf_observers(driver)
+                self._install_stabilizer(driver)
+                self._apply_capture_profile(driver, self.capture_profile)
+                driver.set_page_load_timeout(self.crawl_page_timeout)
+            except Exception as e:
+                print(f"  ❌ Browser {index} failed to start: {e}")
+                return
+            
+            try:
+                while time.monotonic() < deadline:
+                    # Stop only when the queue is empty and no route can still add links
+                    with lock:
+                        try:
+                            app_name, path = pending.get_nowait()
+                            active[0] += 1
+                        except queue.Empty:
+                            if active[0] == 0:
+                                return
+                            app_name = None
+                    if app_name is None:
+                        time.sleep(0.2)
+                        continue
+                    
+                    try:
+                        result = self._crawl_route(driver, app_name, path, timestamp, discover)
+                        result['worker'] = index
+                        for link in result.pop('links'):
+                            enqueue(app_name, link)
+                        results.append(result)
+                        icon = "✅" if result['status'] == 'ok' else "❌"
+                        print(f"  {icon} [{index}] {app_name} {path}: {result['total_seconds']:.2f}s"
+                              f"{'' if result['widget'] else ', no chat widget'}")
+                    finally:
+                        with lock:
+                            active[0] -= 1
+            finally:
+                self._release_driver(driver)
+        
+        with ThreadPoolExecutor(max_workers=self.crawl_workers) as pool:
+            list(pool.map(worker, range(1, self.crawl_workers + 1)))
+        wall_seconds = time.perf_counter() - start_time
+        
+        # Whatever is still queued did not fit in the budget
+        while not pending.empty():
+            app_name, path = pending.get_nowait()
+            results.append({'app': app_name, 'route': path, 'status': 'skipped', 'widget': None})
+        results.sort(key=lambda r: (r['app'], r['route']))
+        
+        summary = {
+            'timestamp': timestamp,
+            'wall_seconds': wall_seconds,
+            'route_seconds': sum(r.get('total_seconds', 0) for r in results),
+            'workers': self.crawl_workers,
+            'budget_seconds': self.crawl_budget,
+            'captured': sum(r['status'] == 'ok' for r in results),
+            'skipped': sum(r['status'] == 'skipped' for r in results),
+            'failed': sum(r['status'] in ('error', 'timeout') for r in results),
+            'routes': results,
+        }
+        with open(self.output_dir / f"crawl_index_{timestamp}.json", 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        summary['report'] = self._generate_crawl_report(summary)
+        
+        print(f"\n✅ Crawl finished in {wall_seconds:.1f}s: {summary['captured']} captured, "
+              f"{summary['failed']} failed, {summary['skipped']} skipped "
+              f"({summary['route_seconds']:.1f}s of route time)")
+        print(f"📄 Crawl index: {self.output_dir / summary['report']}")
+        return summary
+    
+    def _generate_crawl_report(self, summary):
+        """Write the indexed HTML report for a crawl."""
+        rows = ""
+        gallery = ""
+        for result in summary['routes']:
+            anchor = f"{result['app']}-{self._route_slug(result['route'])}"
+            widget = result['widget']
+            metrics = result.get('metrics') or {}
+            
+            def seconds(key):
+                return f"{result[key]:.2f}s" if key in result else "n/a"
+            
+            rows += f"""
+                <tr class="{result['status']}">
+                    <td>{result['app'].title()}</td>
+                    <td>{f'<a href="#{anchor}">{result["route"]}</a>' if result.get('screenshot') else result['route']}</td>
+                    <td>{result['status']}{f": {result['error']}" if result.get('error') else ''}</td>
+                    <td>{seconds('load_seconds')}</td>
+                    <td>{seconds('widget_seconds')}</td>
+                    <td>{seconds('capture_seconds')}</td>
+                    <td>{seconds('total_seconds')}</td>
+                    <td>{self._format_ms(metrics.get('largest_contentful_paint_ms'))}</td>
+                    <td>{f"{metrics['transferred_bytes'] / 1024:.1f} KB" if metrics else 'n/a'}</td>
+                    <td>{f"{widget['width']}x{widget['height']} @ {widget['x']},{widget['y']}" if widget else '—'}</td>
+                </tr>
+"""
+            if result.get('screenshot'):
+                gallery += f"""
+            <div class="capture" id="{anchor}">
+                <h3>{result['app'].title()} <code>{result['route']}</code></h3>
+                {self._report_image(result['screenshot'], f"{result['app']} {result['route']}")}
+            </div>
+"""
+        
+        html_content = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Route Crawl - {summary['timestamp']}</title>
+    <style>
+        body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; margin: 20px; }}
+        table {{ border-collapse: collapse; width: 100%; }}
+        th, td {{ padding: 8px 12px; border-bottom: 1px solid #ddd; text-align: left; }}
+        th {{ background-color: #f8f9fa; }}
+        tr.error, tr.timeout {{ background-color: #fdecea; }}
+        tr.skipped {{ color: #999; }}
+        .capture img {{ max-width: 100%; border: 1px solid #ddd; }}
+    </style>
+</head>
+<body>
+    <h1>🕷️ Route Crawl</h1>
+    <p>Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} &middot;
+       {summary['captured']} captured, {summary['failed']} failed, {summary['skipped']} skipped &middot;
+       {summary['wall_seconds']:.1f}s wall clock for {summary['route_seconds']:.1f}s of route time
+       on {summary['workers']} browsers (budget {summary['budget_seconds']:.0f}s)</p>
+    <table>
+        <thead>
+            <tr><th>App</th><th>Route</th><th>Status</th><th>Load</th><th>Widget</th><th>Capture</th>
+                <th>Total</th><th>LCP</th><th>Transferred</th><th>Chat button</th></tr>
+        </thead>
+        <tbody>{rows}
+        </tbody>
+    </table>
+    <h2>Captures</h2>
+    {gallery or "<p>No routes were captured.</p>"}
+</body>
+</html>
+"""
+        report_filename = f"crawl_index_{summary['timestamp']}.html"
+        with open(self.output_dir / report_filename, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+        return report_filename
+    
+    def _open_device_context(self, driver, device):
+        """Open a tab in a fresh browser context emulating ``device``.
+        
+        Returns ``(context_id, handle)``; ``context_id`` is None when the
+        browser refuses new contexts and the tab shares the default one.
+        """
+        context_id = None
+        try:
+            context_id = driver.execute_cdp_cmd("Target.createBrowserContext", {})["browserContextId"]
+        except Exception as e:
+            print(f"  ⚠️  Isolated contexts unavailable, sharing the default context: {e}")
+        
+        params = {"url": "about:blank"}
+        if context_id:
+            params["browserContextId"] = context_id
+        handle = driver.execute_cdp_cmd("Target.createTarget", params)["targetId"]
+        driver.switch_to.window(handle)
+        if not context_id:
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        
+        driver.execute_cdp_cmd("Emulation.setDeviceMetricsOverride", {
+            "width": device["width"],
+            "height": device["height"],
+            "deviceScaleFactor": device.get("dpr", 1),
+            "mobile": device.get("mobile", False),
+        })
+        driver.execute_cdp_cmd("Emulation.setTouchEmulationEnabled", {
+            "enabled": device.get("mobile", False), "maxTouchPoints": 5
+        })
+        if device.get("user_agent"):
+            driver.execute_cdp_cmd("Emulation.setUserAgentOverride", {"userAgent": device["user_agent"]})
+        
+        self._install_perf_observers(driver)
+        self._install_stabilizer(driver)
+        self._apply_capture_profile(driver, self.capture_profile)
+        return context_id, handle
+    
+    def _close_device_context(self, driver, context_id, home_handle):
+        """Close the current device tab and dispose of its browser context."""
+        try:
+            if driver.current_window_handle != home_handle:
+                driver.close()
+        finally:
+            driver.switch_to.window(home_handle)
+            if context_id:
+                driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context_id})
+    
+    def _capture_device(self, driver, device, app_name, url, home_handle, timestamp):
+        """Capture initial and opened widget states for one device and app."""
+        result = {'device': device['name'], 'app': app_name, 'status': 'ok', 'screenshots': {}}
+        start_time = time.perf_counter()
+        context_id = None
+        
+        try:
+            context_id, _ = self._open_device_context(driver, device)
+            result['setup_seconds'] = time.perf_counter() - start_time
+            
+            driver.get(url)
+            WebDriverWait(driver, 30).until(
+                lambda d: d.execute_script("return document.readyState") == "complete"
+            )
+            result['load_seconds'] = time.perf_counter() - start_time - result['setup_seconds']
+            
+            capture_start = time.perf_counter()
+            try:
+                widget = WebDriverWait(driver, self.chat_wait_time, poll_frequency=0.25).until(
+                    lambda d: d.execute_script(CHAT_WIDGET_PROBE_SCRIPT, CHAT_BUTTON_SELECTORS)
+                )
+            except TimeoutException:
+                widget = None
+            result['widget'] = widget
+            
+            initial = f"{app_name}_{device['name']}_initial_{timestamp}.png"
+            self._save_capture(driver, initial)
+            result['screenshots']['initial'] = initial
+            
+            if widget:
+                driver.find_element(By.CSS_SELECTOR, widget['selector']).click()
+                time.sleep(self.interaction_delay)
+                opened = f"{app_name}_{device['name']}_opened_{timestamp}.png"
+                self._save_capture(driver, opened)
+                result['screenshots']['opened'] = opened
+            
+            with Image.open(self.output_dir / initial) as img:
+                result['image_size'] = list(img.size)
+            result['capture_seconds'] = time.perf_counter() - capture_start
+        except Exception as e:
+            result['status'] = 'error'
+            result['error'] = str(e).splitlines()[0] if str(e) else type(e).__name__
+        finally:
+            try:
+                self._close_device_context(driver, context_id, home_handle)
+            except Exception as e:
+                print(f"  ⚠️  Could not close context for {device['name']}: {e}")
+        
+        result['total_seconds'] = time.perf_counter() - start_time
+        return result
+    
+    def run_device_matrix(self, devices=None):
+        """Capture both apps on every device from one warm browser.
+        
+        Each capture gets its own browser context (cookies, storage and cache
+        are not shared) with the device's viewport, DPR and user agent
+        emulated, so the driver is started once for the whole matrix.
+        """
+        devices = devices or DEVICE_MATRIX
+        apps = [("storefront", self.storefront_url), ("backoffice", self.backoffice_url)]
+        print(f"📱 Capturing {len(devices)} devices x {len(apps)} apps from one browser")
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        results = []
+        
+        start_time = time.perf_counter()
+        driver = self._create_driver()
+        driver_seconds = time.perf_counter() - start_time
+        home_handle = driver.current_window_handle
+        
+        try:
+            for device in devices:
+                for app_name, url in apps:
+                    result = self._capture_device(driver, device, app_name, url, home_handle, timestamp)
+                    # A fresh driver per capture would pay the startup cost instead of context setup
+                    if 'setup_seconds' in result:
+                        result['saved_seconds'] = driver_seconds - result['setup_seconds']
+                    results.append(result)
+                    if result['status'] == 'ok':
+                        print(f"  ✅ {device['name']:<14} {app_name:<10} {result['total_seconds']:.2f}s "
+                              f"(context {result['setup_seconds'] * 1000:.0f} ms)"
+                              f"{'' if result['widget'] else ', no chat widget'}")
+                    else:
+                        print(f"  ❌ {device['name']:<14} {app_name:<10} {result['error']}")
+        finally:
+            self._release_driver(driver)
+        
+        setup_total = sum(r.get('setup_seconds', 0) for r in results)
+        summary = {
+            'timestamp': timestamp,
+            'devices': devices,
+            'driver_seconds': driver_seconds,
+            'matrix_seconds': time.perf_counter() - start_time,
+            'context_setup_seconds': setup_total,
+            # Cold baseline: one driver start per capture instead of one context each
+            'estimated_saved_seconds': (len(results) - 1) * driver_seconds - setup_total,
+            'captures': results,
+        }
+        with open(self.output_dir / f"device_matrix_{timestamp}.json", 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        summary['report'] = self._generate_matrix_report(summary)
+        
+        print(f"\n✅ Matrix finished in {summary['matrix_seconds']:.1f}s "
+              f"(driver start {driver_seconds:.2f}s once, ~{summary['estimated_saved_seconds']:.1f}s "
+              f"saved over a driver per capture)")
+        print(f"📄 Matrix report: {self.output_dir / summary['report']}")
+        return summary
+    
+    def _generate_matrix_report(self, summary):
+        """Write the HTML timing table and capture gallery for a device matrix."""
+        devices = {device['name']: device for device in summary['devices']}
+        rows = ""
+        gallery = ""
+        for result in summary['captures']:
+            device = devices[result['device']]
+            ok = result['status'] == 'ok'
+            rows += f"""
+                <tr>
+                    <td>{device['name']}</td>
+                    <td>{device['width']}x{device['height']} @ {device.get('dpr', 1)}x</td>
+                    <td>{'mobile' if device.get('mobile') else 'desktop'}</td>
+                    <td>{result['app'].title()}</td>
+                    <td>{f"{result['setup_seconds'] * 1000:.0f} ms" if 'setup_seconds' in result else 'n/a'}</td>
+                    <td>{f"{result['load_seconds']:.2f}s" if ok else 'n/a'}</td>
+                    <td>{f"{result['capture_seconds']:.2f}s" if ok else 'n/a'}</td>
+                    <td>{result['total_seconds']:.2f}s</td>
+                    <td>{f"{result['saved_seconds']:+.2f}s" if 'saved_seconds' in result else 'n/a'}</td>
+                    <td>{'x'.join(map(str, result['image_size'])) if ok else result.get('error', '')}</td>
+                </tr>
+"""
+            for state, filename in result['screenshots'].items():
+                gallery += f"""
+            <div class="capture">
+                <h3>{device['name']} &middot; {result['app'].title()} &middot; {state}</h3>
+                {self._report_image(filename, f"{result['app']} {device['name']} {state}")}
+            </div>
+"""
+        
+        html_content = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Device Matrix - {summary['timestamp']}</title>
+    <style>
+        body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; margin: 20px; }}
+        table {{ border-collapse: collapse; width: 100%; }}
+        th, td {{ padding: 8px 12px; border-bottom: 1px solid #ddd; text-align: left; }}
+        th {{ background-color: #f8f9fa; }}
+        .gallery {{ display: flex; flex-wrap: wrap; gap: 20px; align-items: flex-start; }}
+        .capture img {{ max-width: 480px; max-height: 600px; border: 1px solid #ddd; }}
+    </style>
+</head>
+<body>
+    <h1>📱 Device Matrix</h1>
+    <p>Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} &middot;
+       {len(summary['captures'])} captures in {summary['matrix_seconds']:.1f}s &middot;
+       driver started once in {summary['driver_seconds']:.2f}s, {summary['context_setup_seconds']:.2f}s
+       of context setup in total &middot; <strong>~{summary['estimated_saved_seconds']:.1f}s saved</strong>
+       compared with a new driver per capture</p>
+    <table>
+        <thead>
+            <tr><th>Device</th><th>Viewport</th><th>Type</th><th>App</th><th>Context setup</th><th>Load</th>
+                <th>Capture</th><th>Total</th><th>Saved vs cold driver</th><th>Image</th></tr>
+        </thead>
+        <tbody>{rows}
+        </tbody>
+    </table>
+    <h2>Captures</h2>
+    <div class="gallery">{gallery or "<p>No captures.</p>"}
+    </div>
+</body>
+</html>
+"""
+        report_filename = f"device_matrix_{summary['timestamp']}.html"
+        with open(self.output_dir / report_filename, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+        return report_filename
+    
+    def run_comparison(self):
+        """Execute the complete screenshot comparison process."""
+        print("🚀 Starting Chat Widget Screenshot Comparison")
+        print(f"📁 Output directory: {self.output_dir}")
+        
+        storefront_screenshots = {}
+        backoffice_screenshots = {}
+        
+        # Create WebDriver
+        driver = self._create_driver()
+        self._install_perf_observers(driver)
+        self._install_stabilizer(driver)
+        self._apply_capture_profile(driver, self.capture_profile)
         
         try:
             # Capture storefront screenshots
@@ -529,7 +2705,7 @@ class ChatScreenshotComparator:
             )
             
         finally:
-            driver.quit()
+            self._release_driver(driver)
         
         # Create comparison images
         comparison_files = self._create_comparison_image(
@@ -538,7 +2714,8 @@ class ChatScreenshotComparator:
         
         # Generate HTML report
         report_file = self._generate_report(
-            storefront_screenshots, backoffice_screenshots, comparison_files
+            storefront_screenshots, backoffice_screenshots, comparison_files,
+            self.page_metrics, self.network_summaries, self.stability
         )
         
         print("\n✅ Screenshot comparison completed!")
@@ -549,6 +2726,12 @@ class ChatScreenshotComparator:
             'storefront': storefront_screenshots,
             'backoffice': backoffice_screenshots,
             'comparisons': comparison_files,
+            'metrics': self.page_metrics,
+            'network': self.network_summaries,
+            'stability': self.stability,
+            'budget_violations': {
+                app: summary['violations'] for app, summary in self.network_summaries.items() if summary['violations']
+            },
             'report': report_file
         }
 
@@ -573,11 +2756,174 @@ def main():
         default="http://backoffice-dev.aksa.ai/",
         help="Backoffice URL to test"
     )
+    parser.add_argument(
+        "--benchmark",
+        type=int,
+        metavar="N",
+        help="Send N scripted messages per app and report reply latency instead of screenshots"
+    )
+    parser.add_argument(
+        "--benchmark-messages",
+        help="Text file with one benchmark message per line (default: built-in script)"
+    )
+    parser.add_argument(
+        "--frame-timing",
+        action="store_true",
+        help="Record frame timing of the widget open animation and reply streaming"
+    )
+    parser.add_argument(
+        "--cpu-throttle",
+        type=float,
+        default=1,
+        help="CPU slowdown factor for frame timing, e.g. 4 for a low-end device (default: 1)"
+    )
+    parser.add_argument(
+        "--profile",
+        action="append",
+        choices=sorted(CAPTURE_PROFILES),
+        help="Capture profile that blocks resource classes (default: full). "
+             "Repeat to compare profiles instead of running the chat comparison"
+    )
+    parser.add_argument(
+        "--crawl",
+        action="store_true",
+        help="Capture every route of both apps through a browser pool and write an indexed report"
+    )
+    parser.add_argument(
+        "--routes",
+        help="JSON file mapping app name to seed route paths for --crawl (default: built-in list)"
+    )
+    parser.add_argument(
+        "--no-discover",
+        action="store_true",
+        help="Only crawl the seed routes, without following same-origin links"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=3,
+        help="Browsers in the --crawl pool (default: 3)"
+    )
+    parser.add_argument(
+        "--crawl-budget",
+        type=float,
+        default=600,
+        metavar="SECONDS",
+        help="Wall-clock budget for --crawl; unvisited routes are reported as skipped (default: 600)"
+    )
+    parser.add_argument(
+        "--matrix",
+        nargs="?",
+        const="",
+        metavar="FILE",
+        help="Capture both apps on a device matrix from one browser; optional JSON list of devices "
+             "with name, width, height, dpr, mobile and user_agent (default: built-in devices)"
+    )
+    parser.add_argument(
+        "--stabilize",
+        action="store_true",
+        help="Freeze animations, transitions, the caret and the clock and wait for images "
+             "before each capture, then report residual pixel variance"
+    )
+    parser.add_argument(
+        "--stability-samples",
+        type=int,
+        default=3,
+        help="Back-to-back captures used to measure residual variance with --stabilize (default: 3)"
+    )
+    parser.add_argument(
+        "--pin-time",
+        default="2025-01-01T09:00:00+00:00",
+        help="ISO timestamp the page clock starts from with --stabilize"
+    )
+    parser.add_argument(
+        "--budgets",
+        help="JSON file with network budgets per app (saleor-storefront / saleor-backoffice); each limit "
+             "given overrides the built-in one, and null removes it"
+    )
+    parser.add_argument(
+        "--full-page",
+        action="store_true",
+        help="Capture the whole page by scrolling and stitching viewport tiles"
+    )
+    parser.add_argument(
+        "--tiled-composition",
+        action="store_true",
+        help="Write comparison images strip by strip to bound memory use"
+    )
+    parser.add_argument(
+        "--thumbnails",
+        type=int,
+        default=1,
+        metavar="SCALE",
+        help="Show 1/SCALE thumbnails in the HTML report, linked to the full images"
+    )
+    parser.add_argument(
+        "--store",
+        help="Also add this run's files to a content-addressed store directory (see screenshot_store.py)"
+    )
+    parser.add_argument(
+        "--store-version",
+        help="Version label for --store entries (default: derived from --output-dir)"
+    )
+    parser.add_argument(
+        "--store-move",
+        action="store_true",
+        help="Delete this run's files from --output-dir once they are in the --store"
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Never download chromedriver; use the local cache or --driver-path only"
+    )
+    parser.add_argument(
+        "--driver-path",
+        help="Explicit chromedriver binary (default: $CHROMEDRIVER_PATH or the local cache)"
+    )
+    parser.add_argument(
+        "--driver-version",
+        help="Pin the cached chromedriver version (default: installed Chrome major version)"
+    )
+    parser.add_argument(
+        "--daemon",
+        choices=["start", "stop", "status"],
+        help="Manage a warm background browser shared across runs"
+    )
+    parser.add_argument(
+        "--use-daemon",
+        action="store_true",
+        help="Attach to the warm browser daemon instead of launching Chrome"
+    )
+    parser.add_argument(
+        "--daemon-port",
+        type=int,
+        default=9222,
+        help="Remote debugging port for the browser daemon (default: 9222)"
+    )
     
     args = parser.parse_args()
     
     # Create and run comparison
     comparator = ChatScreenshotComparator(args.output_dir)
+    comparator.offline = args.offline or comparator.offline
+    comparator.driver_path = args.driver_path or comparator.driver_path
+    comparator.driver_version = args.driver_version or comparator.driver_version
+    comparator.use_daemon = args.use_daemon
+    comparator.daemon_port = args.daemon_port
+    
+    if args.daemon:
+        try:
+            if args.daemon == "start":
+                comparator.start_browser_daemon()
+            elif args.daemon == "stop":
+                comparator.stop_browser_daemon()
+            else:
+                address = comparator._daemon_address()
+                print(f"✅ Browser daemon running at {address}" if address else "ℹ️  No browser daemon running")
+            return 0
+        except Exception as e:
+            print(f"❌ Daemon error: {e}")
+            return 1
     
     # Override URLs if provided
     if args.storefront_url:
@@ -585,8 +2931,99 @@ def main():
     if args.backoffice_url:
         comparator.backoffice_url = args.backoffice_url
     
+    comparator.cpu_throttle_rate = args.cpu_throttle
+    comparator.stabilize = args.stabilize
+    comparator.stability_samples = args.stability_samples
+    comparator.pinned_time = args.pin_time
+    comparator.full_page = args.full_page
+    comparator.tiled_composition = args.tiled_composition or args.full_page
+    comparator.thumbnail_scale = max(1, args.thumbnails)
+    
+    if args.budgets:
+        with open(args.budgets, encoding='utf-8') as f:
+            comparator.network_budgets = merge_budgets(DEFAULT_NETWORK_BUDGETS, json.load(f))
+    
+    if args.profile and len(args.profile) > 1:
+        try:
+            comparator.run_profile_comparison(args.profile)
+        except Exception as e:
+            print(f"❌ Error during profile comparison: {e}")
+            return 1
+        return 0
+    if args.profile:
+        comparator.capture_profile = args.profile[0]
+    
+    if args.matrix is not None:
+        devices = None
+        if args.matrix:
+            with open(args.matrix, encoding='utf-8') as f:
+                devices = json.load(f)
+            invalid = [d.get('name', '?') for d in devices if not {'name', 'width', 'height'} <= set(d)]
+            if invalid:
+                print(f"❌ Devices need name, width and height: {', '.join(invalid)}")
+                return 1
+        try:
+            summary = comparator.run_device_matrix(devices)
+        except Exception as e:
+            print(f"❌ Error during device matrix: {e}")
+            return 1
+        return 0 if any(c['status'] == 'ok' for c in summary['captures']) else 1
+    
+    if args.crawl:
+        routes = None
+        if args.routes:
+            with open(args.routes, encoding='utf-8') as f:
+                routes = json.load(f)
+            unknown = set(routes) - set(DEFAULT_CRAWL_ROUTES)
+            if unknown:
+                print(f"❌ Unknown apps in {args.routes}: {', '.join(sorted(unknown))}")
+                return 1
+        comparator.crawl_workers = max(1, args.workers)
+        comparator.crawl_budget = args.crawl_budget
+        try:
+            summary = comparator.run_crawl(routes, discover=not args.no_discover)
+        except Exception as e:
+            print(f"❌ Error during crawl: {e}")
+            return 1
+        return 0 if summary['captured'] else 1
+    
+    if args.frame_timing:
+        try:
+            results = comparator.run_frame_timing()
+        except Exception as e:
+            print(f"❌ Error during frame timing: {e}")
+            return 1
+        return 0 if any(r.get('phases') for r in results.values()) else 1
+    
+    if args.benchmark:
+        messages = None
+        if args.benchmark_messages:
+            with open(args.benchmark_messages, encoding='utf-8') as f:
+                messages = [line.strip() for line in f if line.strip()]
+        try:
+            results = comparator.run_benchmark(args.benchmark, messages)
+        except Exception as e:
+            print(f"❌ Error during benchmark: {e}")
+            return 1
+        return 0 if any(r.get('first_render_ms', {}).get('count') for r in results.values()) else 1
+    
     try:
         results = comparator.run_comparison()
+        if args.store:
+            from screenshot_store import ScreenshotStore
+            produced = (
+                list(results['storefront'].values()) + list(results['backoffice'].values())
+                + results['comparisons'] + [results['report']]
+                + [m['file'] for m in results['metrics'].values()]
+                + [n['file'] for n in results['network'].values()]
+            )
+            ScreenshotStore(args.store).ingest(
+                [comparator.output_dir / name for name in produced], version=args.store_version,
+                remove_originals=args.store_move
+            )
+        if results['budget_violations']:
+            print(f"❌ Network budgets exceeded: {', '.join(results['budget_violations'])}")
+            return 2
         return 0
     except Exception as e:
         print(f"❌ Error during comparison: {e}")
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Screenshot Store
+==================================
+
+Stores screenshots and analysis artifacts once per unique content. Blobs are
+keyed by a SHA-256 hash (of the decoded pixels for images, so re-encoded but
+visually identical PNGs deduplicate too) plus the file format, and a small
+JSON index maps app, state, version and timestamp to blobs.
+
+Requirements:
+- pillow (PIL)
+
+Usage:
+    python3 screenshot_store.py ingest screenshots* opencv_analysis [--recompress]
+    python3 screenshot_store.py stats
+    python3 screenshot_store.py list --app storefront --state opened
+    python3 screenshot_store.py export restored/ --version 2.1.0
+    python3 screenshot_store.py gc
+"""
+
+import os
+import re
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp"}
+CAPTURE_APPS = {"storefront", "backoffice", "comparison"}
+ARTIFACT_NAME = re.compile(r"^(?P<name>.+?)_(?P<timestamp>\d{8}_\d{6})\.(?P<ext>\w+)$")
+
+
+def parse_artifact_name(path):
+    """Split ``<app>_<state>_<YYYYmmdd_HHMMSS>.<ext>`` into index fields."""
+    path = Path(path)
+    match = ARTIFACT_NAME.match(path.name)
+    name = match.group("name") if match else path.stem
+    timestamp = match.group("timestamp") if match else None
+    
+    app, _, state = name.partition("_")
+    if app not in CAPTURE_APPS:
+        # Analysis artifacts such as heatmap_*.png or analysis_stats_*.json
+        app, state = "analysis", name
+    
+    # Directory names such as screenshots_v2.1.0 or screenshots_fixed carry the version
+    directory = path.parent.name
+    version = "unversioned"
+    if directory.startswith("screenshots_"):
+        version = directory[len("screenshots_"):]
+        if re.fullmatch(r"v\d+(?:\.\d+)+", version):
+            version = version[1:]
+    
+    return {"app": app, "state": state or "default", "timestamp": timestamp, "version": version}
+
+
+class ScreenshotStore:
+    """Deduplicating blob store with a metadata index."""
+    
+    def __init__(self, root="screenshot_store"):
+        self.root = Path(root)
+        self.blob_dir = self.root / "blobs"
+        self.index_file = self.root / "index.json"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.index = self._load_index()
+        self._entry_positions = {
+            (e["source"], e["blob"]): i for i, e in enumerate(self.index["entries"])
+        }
+    
+    def _load_index(self):
+        """Load the index, starting empty when none exists yet."""
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"blobs": {}, "entries": []}
+    
+    def save(self):
+        """Atomically persist the index."""
+        tmp_file = self.index_file.with_suffix(".json.tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp_file, self.index_file)
+    
+    @staticmethod
+    def content_hash(path):
+        """Hash decoded pixels for images and raw bytes for everything else."""
+        path = Path(path)
+        digest = hashlib.sha256()
+        if Image is not None and path.suffix.lower() in IMAGE_SUFFIXES:
+            try:
+                with Image.open(path) as img:
+                    digest.update(f"{img.mode}:{img.width}x{img.height}:".encode())
+                    digest.update(img.tobytes())
+                return "px-" + digest.hexdigest()
+            except OSError:
+                pass  # Not decodable, fall back to the file bytes
+        
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return "raw-" + digest.hexdigest()
+    
+    @classmethod
+    def blob_key(cls, path):
+        """Content hash qualified by format, so a blob always has the encoding its entries expect."""
+        path = Path(path)
+        return cls.content_hash(path) + path.suffix.lower()
+    
+    def _blob_path(self, key):
+        """Two-level fan-out so no directory holds every blob."""
+        name = key.split("-", 1)[1]
+        return self.blob_dir / name[:2] / name
+    
+    def _write_blob(self, source, target, recompress):
+        """Copy a blob into the store, optionally re-encoding PNGs losslessly."""
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_target = target.with_name(target.name + ".tmp")
+        if recompress and Image is not None and source.suffix.lower() == ".png":
+            with Image.open(source) as img:
+                img.save(tmp_target, format="PNG", optimize=True)
+            # Keep whichever encoding is smaller
+            if tmp_target.stat().st_size >= source.stat().st_size:
+                shutil.copyfile(source, tmp_target)
+        else:
+            shutil.copyfile(source, tmp_target)
+        os.replace(tmp_target, target)
+    
+    def put(self, path, recompress=False, **metadata):
+        """Add one file; returns its index entry and whether a new blob was stored."""
+        path = Path(path)
+        key = self.blob_key(path)
+        fields = parse_artifact_name(path)
+        fields.update({k: v for k, v in metadata.items() if v is not None})
+        
+        stored = key not in self.index["blobs"]
+        if stored:
+            blob_path = self._blob_path(key)
+            self._write_blob(path, blob_path, recompress)
+            self.index["blobs"][key] = {
+                "path": str(blob_path.relative_to(self.root)),
+                "size": blob_path.stat().st_size,
+                "original_size": path.stat().st_size,
+            }
+        
+        entry = {
+            **fields,
+            "name": path.name,
+            "source": str(path),
+            "blob": key,
+            "ingested_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        # Re-ingesting the same file must not duplicate its entry
+        position = self._entry_positions.get((entry["source"], key))
+        if position is None:
+            self._entry_positions[(entry["source"], key)] = len(self.index["entries"])
+            self.index["entries"].append(entry)
+        else:
+            self.index["entries"][position] = entry
+        return entry, stored
+    
+    def ingest(self, paths, recompress=False, remove_originals=False, **metadata):
+        """Add files and directories (recursively) to the store."""
+        files = []
+        for path in map(Path, paths):
+            if path.is_dir():
+                files.extend(sorted(p for p in path.rglob("*") if p.is_file() and self.root not in p.parents))
+            elif path.is_file():
+                files.append(path)
+        
+        new_blobs = 0
+        for file_path in files:
+            _, stored = self.put(file_path, recompress=recompress, **metadata)
+            new_blobs += stored
+            if remove_originals:
+                file_path.unlink()
+        self.save()
+        
+        print(f"📦 Ingested {len(files)} files: {new_blobs} new blobs, {len(files) - new_blobs} deduplicated")
+        return new_blobs
+    
+    def find(self, app=None, state=None, version=None):
+        """Index entries matching the given fields."""
+        return [
+            e for e in self.index["entries"]
+            if (app is None or e["app"] == app)
+            and (state is None or e["state"] == state)
+            and (version is None or e["version"] == version)
+        ]
+    
+    def path_for(self, entry):
+        """Filesystem path of an entry's blob."""
+        return self.root / self.index["blobs"][entry["blob"]]["path"]
+    
+    def export(self, destination, entries):
+        """Materialize entries under their original names (hard links when possible)."""
+        destination = Path(destination)
+        for entry in entries:
+            target = destination / entry["version"] / entry["name"]
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if target.exists():
+                continue
+            try:
+                os.link(self.path_for(entry), target)
+            except OSError:
+                shutil.copyfile(self.path_for(entry), target)
+        return len(entries)
+    
+    def gc(self):
+        """Delete blobs no index entry refers to."""
+        referenced = {e["blob"] for e in self.index["entries"]}
+        removed = 0
+        for key in list(self.index["blobs"]):
+            if key not in referenced:
+                (self.root / self.index["blobs"].pop(key)["path"]).unlink(missing_ok=True)
+                removed += 1
+        self.save()
+        return removed
+    
+    def stats(self):
+        """Deduplication and size statistics."""
+        blobs = self.index["blobs"]
+        logical = sum(blobs[e["blob"]]["original_size"] for e in self.index["entries"])
+        stored = sum(b["size"] for b in blobs.values())
+        return {
+            "entries": len(self.index["entries"]),
+            "blobs": len(blobs),
+            "logical_bytes": logical,
+            "stored_bytes": stored,
+            "savings_percentage": (1 - stored / logical) * 100 if logical else 0.0,
+        }
+
+
+def main():
+    """Main entry point for the script."""
+    parser = argparse.ArgumentParser(description="Content-addressed screenshot and artifact store")
+    parser.add_argument("--store", default="screenshot_store", help="Store directory (default: screenshot_store)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    ingest_parser = subparsers.add_parser("ingest", help="Add files or directories to the store")
+    ingest_parser.add_argument("paths", nargs="+")
+    ingest_parser.add_argument("--version", help="Version label (default: derived from the directory name)")
+    ingest_parser.add_argument("--recompress", action="store_true", help="Losslessly re-encode PNG blobs")
+    ingest_parser.add_argument("--remove-originals", action="store_true", help="Delete files once stored")
+    
+    for name in ("list", "export"):
+        sub = subparsers.add_parser(name, help=f"{name.title()} stored entries")
+        if name == "export":
+            sub.add_argument("destination")
+        sub.add_argument("--app")
+        sub.add_argument("--state")
+        sub.add_argument("--version")
+    
+    subparsers.add_parser("stats", help="Show deduplication statistics")
+    subparsers.add_parser("gc", help="Remove unreferenced blobs")
+    
+    args = parser.parse_args()
+    store = ScreenshotStore(args.store)
+    
+    if args.command == "ingest":
+        store.ingest(args.paths, recompress=args.recompress,
+                     remove_originals=args.remove_originals, version=args.version)
+    elif args.command == "list":
+        for entry in store.find(args.app, args.state, args.version):
+            print(f"  {entry['version']:<14} {entry['app']:<11} {entry['state']:<22} "
+                  f"{entry['timestamp'] or '-':<16} {entry['blob'][:16]}")
+    elif args.command == "export":
+        count = store.export(args.destination, store.find(args.app, args.state, args.version))
+        print(f"📁 Exported {count} files to {args.destination}")
+    elif args.command == "gc":
+        print(f"🧹 Removed {store.gc()} unreferenced blobs")
+    
+    stats = store.stats()
+    print(f"📊 {stats['entries']} entries in {stats['blobs']} blobs: "
+          f"{stats['stored_bytes'] / 1024:.1f} KB stored for {stats['logical_bytes'] / 1024:.1f} KB of files "
+          f"({stats['savings_percentage']:.1f}% saved)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())